@@ -1,25 +1,21 @@
 import time
 
 import keyboard
-import numpy as np
-import pyaudio
-from openwakeword.model import Model
 
-from constants import JARVIS_DETECTION_THRESHOLD
+from audio_capture import MicrophoneCapture
+from wakeword import WakeWordEngine
 
 
 class AssistantActivator:
-    def __init__(self):
+    def __init__(self, engine: WakeWordEngine):
         self.model_name = "jarvis"
 
-        # Load the wake word model
-        self.model = Model(wakeword_models=[f"{self.model_name}.tflite"])
+        # Shared wake word engine (one model and one thread for every keyword)
+        self.engine = engine
 
-        self.CHUNK = 1280
-        self.FORMAT = pyaudio.paInt16
-        self.CHANNELS = 1
-        self.SAMPLE_RATE = 16000
-        self.p = pyaudio.PyAudio()
+        # Capture frame index at which the last activation happened,
+        # recording starts from here so nothing said after it is lost
+        self.activation_frame = 0
 
     def wait_for_activation(self, trigger_key):
         """
@@ -27,53 +23,35 @@ class AssistantActivator:
         OR the trigger key is pressed.
         Returns: 'voice' or 'key'
         """
-        # The model reactivates multiple times if it hears the wake word continuously.
-        # Reset it to avoid this.
-        self.model.reset()
-
-        # Open the stream
-        stream = self.p.open(
-            format=self.FORMAT,
-            channels=self.CHANNELS,
-            rate=self.SAMPLE_RATE,
-            input=True,
-            frames_per_buffer=self.CHUNK,
-        )
+        # Arming also resets the model, so a continuous wake word doesn't fire again
+        self.engine.arm(self.model_name)
 
         triggered_by = None
-
         try:
             while True:
-                # Get audio
-                data = stream.read(self.CHUNK)
-                audio_np = np.frombuffer(data, dtype=np.int16)
-
-                # Predict
-                predictions = self.model.predict(audio_np)
-
-                # Check Wake Word
-                if predictions[self.model_name] >= JARVIS_DETECTION_THRESHOLD:
+                # Check Wake Word (about once per audio frame)
+                if self.engine.wait(self.model_name, timeout=0.08):
                     triggered_by = "voice"
+                    self.activation_frame = self.engine.detection_frame[self.model_name]
                     break
 
                 # Check Key Press
                 if keyboard.is_pressed(trigger_key):
                     triggered_by = "key"
+                    self.activation_frame = self.engine.capture.frame_index
                     break
-
         finally:
-            # Close stream so main.py can use the mic later
-            stream.stop_stream()
-            stream.close()
+            self.engine.disarm(self.model_name)
 
         return triggered_by
 
-    def __del__(self):
-        self.p.terminate()  # Cleanup when program exits
-
 
 if __name__ == "__main__":
-    activator = AssistantActivator()
+    capture = MicrophoneCapture()
+    capture.start()
+    engine = WakeWordEngine(capture)
+    engine.start()
+    activator = AssistantActivator(engine)
     while True:
         print("\nListening for wake word or key press...")
         source = activator.wait_for_activation("scroll lock")
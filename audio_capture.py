@@ -0,0 +1,225 @@
+import collections
+import io
+import queue
+import threading
+import time
+import wave
+
+import numpy as np
+import pyaudio
+
+# Capture format shared by every listener (openWakeWord expects 16 kHz int16)
+FRAME_SAMPLES = 1280  # 80 ms per frame
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+# How much recent audio the ring buffer keeps around
+RING_SECONDS = 10
+
+
+def to_wav(samples: np.ndarray) -> bytes:
+    """Wraps int16 mono samples in the capture format in a WAV container."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(CHANNELS)
+        wf.setsampwidth(SAMPLE_WIDTH)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(samples.astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+class Subscription:
+    """
+    A listener attached to the capture service.
+    Frames are delivered in order through a bounded queue; if the consumer falls
+    behind, the oldest frames are dropped instead of stalling the capture thread.
+    """
+
+    def __init__(self, capture: "MicrophoneCapture", maxsize: int):
+        self._capture = capture
+        self._queue: queue.Queue[tuple[int, np.ndarray]] = queue.Queue(maxsize=maxsize)
+        self.dropped_frames = 0
+        self.closed = False
+        # Capture index of the last frame returned by read()
+        self.last_index = -1
+
+    def _push(self, index: int, frame: np.ndarray):
+        item = (index, frame)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Drop the oldest frame to make room for the newest one
+            try:
+                self._queue.get_nowait()
+                self.dropped_frames += 1
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(item)
+
+    def read(self, timeout: float | None = None) -> np.ndarray | None:
+        """
+        Returns the next frame (FRAME_SAMPLES int16 samples),
+        or None if no frame arrived within the timeout.
+        """
+        try:
+            self.last_index, frame = self._queue.get(timeout=timeout)
+            return frame
+        except queue.Empty:
+            return None
+
+    def pending(self) -> int:
+        """Number of frames waiting to be read."""
+        return self._queue.qsize()
+
+    def close(self):
+        """Detach from the capture service."""
+        if not self.closed:
+            self.closed = True
+            self._capture.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class MicrophoneCapture:
+    """
+    Single long-lived microphone stream.
+    One background thread reads fixed-size frames into a ring buffer and fans
+    them out to every subscriber, so listeners can attach and detach
+    (wake word, cancellation, recorder) without reopening the device.
+    """
+
+    def __init__(self, ring_seconds: float = RING_SECONDS):
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = None
+        self._thread = None
+        self._running = False
+
+        ring_frames = int(ring_seconds * SAMPLE_RATE / FRAME_SAMPLES)
+        self._ring: collections.deque[tuple[int, np.ndarray]] = collections.deque(
+            maxlen=ring_frames
+        )
+        # Index of the next frame to be captured
+        self._frame_index = 0
+
+        self._subscribers: list[Subscription] = []
+        self._lock = threading.Lock()
+
+    @property
+    def frame_index(self) -> int:
+        """Index of the next frame that will be captured."""
+        return self._frame_index
+
+    def start(self):
+        """Open the device and start the capture thread (idempotent)."""
+        if self._running:
+            return
+
+        self._stream = self._pyaudio.open(
+            format=pyaudio.paInt16,
+            channels=CHANNELS,
+            rate=SAMPLE_RATE,
+            input=True,
+            frames_per_buffer=FRAME_SAMPLES,
+        )
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def _read_loop(self):
+        """The function that runs in the background capture thread."""
+        while self._running:
+            try:
+                data = self._stream.read(FRAME_SAMPLES, exception_on_overflow=False)
+            except OSError as e:
+                print(f"[!] Microphone read error: {e}")
+                time.sleep(0.1)
+                continue
+
+            frame = np.frombuffer(data, dtype=np.int16)
+            with self._lock:
+                index = self._frame_index
+                self._ring.append((index, frame))
+                self._frame_index += 1
+                subscribers = list(self._subscribers)
+
+            for subscription in subscribers:
+                subscription._push(index, frame)
+
+    def subscribe(
+        self, start_frame: int | None = None, maxsize: int | None = None
+    ) -> Subscription:
+        """
+        Attach a new listener.
+
+        Args:
+            start_frame (int | None): If given, frames from this index onwards that
+                are still in the ring buffer are delivered first (pre-roll).
+            maxsize (int | None): Queue size, defaults to the ring buffer length.
+
+        Returns:
+            Subscription: The listener handle, close it when done.
+        """
+        subscription = Subscription(self, maxsize or self._ring.maxlen or 1)
+        with self._lock:
+            if start_frame is not None:
+                for index, frame in self._ring:
+                    if index >= start_frame:
+                        subscription._push(index, frame)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def get_frames(self, start_frame: int, end_frame: int) -> np.ndarray:
+        """
+        Returns the samples of frames [start_frame, end_frame) that are still
+        in the ring buffer, concatenated into one int16 array.
+        """
+        with self._lock:
+            frames = [f for i, f in self._ring if start_frame <= i < end_frame]
+        if not frames:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(frames)
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stop(self):
+        """Stop the capture thread and close the device."""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._stream:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+    def __del__(self):
+        self.stop()
+        self._pyaudio.terminate()  # Cleanup when program exits
+
+
+if __name__ == "__main__":
+    capture = MicrophoneCapture()
+    capture.start()
+
+    # Attach two listeners to the same stream and print their levels
+    with capture.subscribe() as first, capture.subscribe() as second:
+        for _ in range(25):
+            a = first.read(timeout=1.0)
+            b = second.read(timeout=1.0)
+            if a is None or b is None:
+                print("No audio received")
+                break
+            print(
+                f"Level: {int(np.abs(a).mean()):5d} | Same frame: {np.array_equal(a, b)}"
+            )
+
+    capture.stop()
@@ -0,0 +1,402 @@
+"""
+Long-lived audio output.
+One output stream stays open for the whole session and a mixer thread sums
+every active voice into it block by block, so sounds can overlap (a cue over
+the speech) instead of queueing behind each other. Finished playbacks signal
+an Event, nothing polls.
+
+Recently played files are kept decoded in memory (under a byte cap), so a
+cached response starts within one block. NullSink and FileSink replace the
+sound card for headless runs and tests.
+"""
+
+import collections
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+import numpy as np
+
+SAMPLE_RATE = 24000  # edge-tts output rate
+BLOCK_SAMPLES = 192  # 8 ms, a new sound starts within one block
+# Decoded clips kept in memory
+CLIP_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def resample(
+    samples: np.ndarray, from_rate: int, to_rate: int = SAMPLE_RATE
+) -> np.ndarray:
+    """Linear-interpolation resampling of mono float32 audio."""
+    if from_rate == to_rate or not len(samples):
+        return samples.astype(np.float32, copy=False)
+    count = round(len(samples) * to_rate / from_rate)
+    positions = np.arange(count) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+# ================= Sinks =================
+class PyAudioSink:
+    """The default output device (blocking writes pace the mixer)."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        import pyaudio
+
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = self._pyaudio.open(
+            format=pyaudio.paFloat32,
+            channels=1,
+            rate=sample_rate,
+            output=True,
+            frames_per_buffer=BLOCK_SAMPLES,
+        )
+
+    def write(self, block: np.ndarray):
+        self._stream.write(block.tobytes())
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._pyaudio.terminate()
+
+
+class NullSink:
+    """Discards audio. With realtime=True it takes as long as playing would."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, realtime: bool = False):
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self.samples_written = 0
+        self.first_write: float | None = None
+
+    def write(self, block: np.ndarray):
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        self.samples_written += len(block)
+        if self.realtime:
+            time.sleep(len(block) / self.sample_rate)
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Writes everything that is played into a 16-bit WAV file."""
+
+    def __init__(self, path: str, sample_rate: int = SAMPLE_RATE):
+        # Open until close(), like the output stream of PyAudioSink
+        self._wav = wave.open(path, "wb")  # noqa: SIM115
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, block: np.ndarray):
+        self._wav.writeframes((block * 32767).astype(np.int16).tobytes())
+
+    def close(self):
+        self._wav.close()
+
+
+# ================= Voices =================
+class Playback:
+    """A sound being played. wait() returns once it has been fully written out."""
+
+    def __init__(self, samples: np.ndarray | None = None):
+        self._chunks: collections.deque[np.ndarray] = collections.deque()
+        if samples is not None and len(samples):
+            self._chunks.append(samples)
+        self._closed = samples is not None
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._engine: PlaybackEngine | None = None
+
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.started_at: float | None = None
+        self.stopped = False
+
+    def append(self, samples: np.ndarray):
+        """Add audio to a streamed playback (see PlaybackEngine.stream)."""
+        with self._lock:
+            if self.stopped:
+                return  # Still being synthesized when it was stopped
+            self._chunks.append(samples.astype(np.float32, copy=False))
+        self._notify()
+
+    def extend(self, samples: np.ndarray) -> bool:
+        """
+        Queues more audio after a playback that is still playing.
+
+        Returns:
+            bool: False if it has already played out (start a new one instead).
+        """
+        with self._lock:
+            if self.stopped or not self._chunks:
+                return False
+            self._chunks.append(samples.astype(np.float32, copy=False))
+        return True
+
+    def close(self):
+        """No more audio will be appended."""
+        with self._lock:
+            self._closed = True
+        self._notify()
+
+    def stop(self):
+        with self._lock:
+            self.stopped = True
+            self._chunks.clear()
+            self._closed = True
+        self._notify()
+
+    def _notify(self):
+        if self._engine is not None:
+            self._engine._wake()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self.done.wait(timeout)
+
+    @property
+    def finished(self) -> bool:
+        return self._closed and not self._chunks
+
+    def _read(self, count: int) -> np.ndarray:
+        """Up to count samples (fewer if a stream hasn't caught up)."""
+        pieces = []
+        with self._lock:
+            while count and self._chunks:
+                chunk = self._chunks[0]
+                piece = chunk[self._offset : self._offset + count]
+                pieces.append(piece)
+                count -= len(piece)
+                self._offset += len(piece)
+                if self._offset >= len(chunk):
+                    self._chunks.popleft()
+                    self._offset = 0
+        if pieces and not self.started.is_set():
+            self.started_at = time.perf_counter()
+            self.started.set()
+        return (
+            np.concatenate(pieces)
+            if len(pieces) > 1
+            else (pieces[0] if pieces else None)
+        )
+
+
+class _ClipCache:
+    """Decoded clips by path, least recently used dropped past the byte cap."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._clips: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> np.ndarray:
+        with self._lock:
+            clip = self._clips.get(path)
+            if clip is not None:
+                self._clips.move_to_end(path)
+                self.hits += 1
+                return clip
+
+        import soundfile as sf
+
+        audio, rate = sf.read(path, dtype="float32")
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        clip = resample(audio, rate)
+
+        with self._lock:
+            self.misses += 1
+            if clip.nbytes <= self.max_bytes:
+                self._clips[path] = clip
+                self.bytes += clip.nbytes
+                while self.bytes > self.max_bytes:
+                    _, old = self._clips.popitem(last=False)
+                    self.bytes -= old.nbytes
+        return clip
+
+
+# ================= Engine =================
+class PlaybackEngine:
+    def __init__(self, sink=None, clip_cache_bytes: int = CLIP_CACHE_BYTES):
+        self.sink = sink
+        self.clips = _ClipCache(clip_cache_bytes)
+
+        self._voices: list[Playback] = []
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        if self.sink is None:
+            try:
+                self.sink = PyAudioSink()
+            except (ImportError, OSError) as e:  # No PyAudio or no device
+                print(f"[!] No audio output ({e}), sound is discarded")
+                self.sink = NullSink()
+        self._running = True
+        self._thread = threading.Thread(target=self._mix_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for voice in self._voices:
+            voice.stop()
+            voice.started.set()
+            voice.done.set()
+        self._voices.clear()
+        self.sink.close()
+
+    def _add(self, playback: Playback) -> Playback:
+        if not self._running:
+            self.start()
+        playback._engine = self
+        with self._condition:
+            self._voices.append(playback)
+            self._condition.notify()
+        return playback
+
+    def _wake(self):
+        with self._condition:
+            self._condition.notify()
+
+    def play(self, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> Playback:
+        """Play mono float32 audio, mixed with whatever else is playing."""
+        return self._add(Playback(resample(samples, sample_rate)))
+
+    def preload(self, path: str):
+        """Decodes a clip into memory ahead of its first play."""
+        self.clips.get(path)
+
+    def play_file(self, path: str) -> Playback:
+        """Play a clip, decoded once and then served from memory."""
+        return self.play(self.clips.get(path))
+
+    def stream(self) -> Playback:
+        """A playback fed with append() as audio is produced, then close()."""
+        return self._add(Playback())
+
+    def _mix_loop(self):
+        block = np.zeros(BLOCK_SAMPLES, dtype=np.float32)
+        while True:
+            with self._condition:
+                while self._running and not self._voices:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                voices = list(self._voices)
+
+            block.fill(0.0)
+            mixed = False
+            for voice in voices:
+                samples = voice._read(BLOCK_SAMPLES)
+                if samples is not None:
+                    block[: len(samples)] += samples
+                    mixed = True
+
+            finished = [v for v in voices if v.finished]
+            if not mixed and not finished:
+                # Only streams that haven't caught up, wait for their next append
+                with self._condition:
+                    if not any(v._chunks or v.finished for v in self._voices):
+                        self._condition.wait()
+                continue
+
+            np.clip(block, -1.0, 1.0, out=block)
+
+            try:
+                self.sink.write(block)
+            except OSError as e:
+                print(f"[!] Audio output error: {e}")
+
+            if finished:
+                with self._condition:
+                    for voice in finished:
+                        self._voices.remove(voice)
+                for voice in finished:
+                    if not voice.started.is_set():  # Empty or stopped before it started
+                        voice.started_at = time.perf_counter()
+                        voice.started.set()
+                    voice.done.set()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "voices": len(self._voices),
+            "clip_cache_bytes": self.clips.bytes,
+            "clip_cache_hits": self.clips.hits,
+            "clip_cache_misses": self.clips.misses,
+        }
+
+
+_engine: PlaybackEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> PlaybackEngine:
+    """The session's playback engine, started on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PlaybackEngine()
+            _engine.start()
+    return _engine
+
+
+def set_sink(sink):
+    """Use another sink (NullSink, FileSink) for the session engine, before first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.stop()
+        _engine = PlaybackEngine(sink)
+        _engine.start()
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    import soundfile as sf
+
+    # Start latency of a cold (decoded from disk) and hot (in memory) clip
+    sink = NullSink(realtime=True)
+    engine = PlaybackEngine(sink)
+    engine.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "clip.wav")
+        t = np.arange(SAMPLE_RATE // 2) / SAMPLE_RATE
+        sf.write(path, 0.3 * np.sin(2 * np.pi * 440 * t), SAMPLE_RATE)
+
+        for label in ("cold", "hot", "hot"):
+            start_time = time.perf_counter()
+            playback = engine.play_file(path)
+            playback.started.wait()
+            latency = playback.started_at - start_time
+            playback.wait()
+            total = time.perf_counter() - start_time
+            print(
+                f"{label:5} start {latency * 1000:6.2f} ms, finished after {total:.2f}s"
+            )
+
+        # Overlapping voices are mixed, not queued
+        start_time = time.perf_counter()
+        first = engine.play_file(path)
+        second = engine.play(0.3 * np.sin(2 * np.pi * 880 * t), SAMPLE_RATE)
+        first.wait()
+        second.wait()
+        print(f"Two overlapping clips: {time.perf_counter() - start_time:.2f}s")
+
+    engine.stop()
+    print(f"Stats: {engine.stats()}")
@@ -0,0 +1,71 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+
+import os
+import random
+import sys
+from collections.abc import Callable
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident memory of this process in MB, None if it can't be measured."""
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def current_rss_mb() -> float | None:
+    """Current resident memory of this process in MB, None if it can't be measured."""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Parses a latency distribution, in seconds:
+        "0.3"                  constant
+        "uniform:0.2,0.4"      uniform between the bounds
+        "normal:0.3,0.05"      mean, standard deviation (clamped at 0)
+        "lognormal:0.3,0.5"    median, sigma of the underlying normal
+    """
+    kind, _, args = spec.partition(":")
+    if not args:
+        value = float(kind)
+        return lambda: value
+
+    a, b = (float(x) for x in args.split(","))
+    if kind == "uniform":
+        return lambda: random.uniform(a, b)
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(a, b))
+    if kind == "lognormal":
+        import math
+
+        mu = math.log(a)
+        return lambda: random.lognormvariate(mu, b)
+    raise ValueError(f"Unknown latency distribution: {spec}")
@@ -0,0 +1,239 @@
+"""
+Cooperative cancellation for the stages of a cycle.
+The cancellation watcher owns a token and cancels it when "Insa" is heard.
+Stages run on a small shared pool with the token as the current token, and
+either check it or register a callback that tears their work down (closing an
+HTTP stream, killing a subprocess). Waiting for a stage is a single Event wait,
+so an abort returns right away.
+"""
+
+import contextvars
+import subprocess
+import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Stages run one at a time; the extra workers absorb stages that were abandoned
+# and are still winding down
+MAX_WORKERS = 4
+
+
+class CancelledError(BaseException):
+    """
+    Raised inside a stage once its token is cancelled.
+    A BaseException so the stages' broad `except Exception` handlers don't swallow it.
+    """
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the token and run the registered callbacks (only the first time)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            # Any callback can fail, the others must still tear their work down
+            try:
+                callback()
+            except Exception as e:  # noqa: BLE001
+                print(f"[!] Error in cancellation callback: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run callback when the token is cancelled (right away if it already is).
+
+        Returns:
+            Callable: Unregisters the callback, call it once the work is done.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CancelledError()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._event.wait(timeout)
+
+
+# Never cancelled, the current token outside of any stage
+_NEVER = CancellationToken()
+_current_token: contextvars.ContextVar[CancellationToken] = contextvars.ContextVar(
+    "cancellation_token", default=_NEVER
+)
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="stage")
+
+
+def current_token() -> CancellationToken:
+    """Token of the stage running on this thread."""
+    return _current_token.get()
+
+
+def run_with_token(token: CancellationToken, func, *args, **kwargs):
+    """Calls func with token as the current token."""
+    reset = _current_token.set(token)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current_token.reset(reset)
+
+
+def submit(token: CancellationToken, func, *args, **kwargs) -> Future:
+    """Starts func on the shared stage pool with token as the current token."""
+    # Copy the context so tracing spans nest under the caller's
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, run_with_token, token, func, *args, **kwargs)
+
+
+def run_cancellable(func, token: CancellationToken, *args, **kwargs):
+    """
+    Runs func on the shared stage pool and waits for it or for the token.
+
+    Returns:
+        The result of func, or None if the token was cancelled first.
+    """
+    if token.cancelled:
+        return None
+    return wait_for(submit(token, func, *args, **kwargs), token)
+
+
+def wait_for(future: Future, token: CancellationToken):
+    """
+    Waits for a stage already started with submit, or for the token.
+
+    Returns:
+        The stage's result, or None if the token was cancelled first.
+    """
+    finished = threading.Event()
+    future.add_done_callback(lambda _: finished.set())
+    remove = token.on_cancel(finished.set)
+    try:
+        finished.wait()
+    finally:
+        remove()
+
+    if token.cancelled:
+        future.cancel()  # In case it never started
+        return None
+    try:
+        return future.result()
+    except CancelledError:
+        return None
+
+
+def run_process(
+    args, capture_output: bool = False, check: bool = False, **kwargs
+) -> subprocess.CompletedProcess:
+    """
+    subprocess.run that kills the process if the current token is cancelled.
+
+    Raises:
+        CancelledError: If the token was cancelled before or while it ran.
+    """
+    token = current_token()
+    token.raise_if_cancelled()
+
+    if capture_output:
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+
+    with subprocess.Popen(args, **kwargs) as process:
+        remove = token.on_cancel(process.kill)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            remove()
+
+    token.raise_if_cancelled()
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+def launch_detached(args, **kwargs) -> subprocess.Popen:
+    """
+    Starts a process meant to outlive the cycle (an application the user opened).
+    It isn't started if the current token is already cancelled, and an abort
+    later on leaves it running: only run_process work is torn down.
+
+    Raises:
+        CancelledError: If the token was cancelled before it started.
+    """
+    current_token().raise_if_cancelled()
+
+    if sys.platform == "win32":
+        kwargs["creationflags"] = (
+            kwargs.get("creationflags", 0)
+            | subprocess.DETACHED_PROCESS
+            | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        kwargs.setdefault("start_new_session", True)
+    return subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **kwargs,
+    )
+
+
+if __name__ == "__main__":
+    import time
+
+    # Abort stages that run a 30 s subprocess and check that every one of them
+    # is torn down: abort latency, live threads, leftover processes
+    baseline_threads = threading.active_count()
+    running = 0
+    running_lock = threading.Lock()
+
+    def stage():
+        global running
+        with running_lock:
+            running += 1
+        try:
+            run_process([sys.executable, "-c", "import time; time.sleep(30)"])
+        finally:
+            with running_lock:
+                running -= 1
+
+    latencies = []
+    for _ in range(20):
+        token = CancellationToken()
+        cancelled_at = []
+        token.on_cancel(lambda times=cancelled_at: times.append(time.perf_counter()))
+        timer = threading.Timer(0.2, token.cancel)
+        timer.start()
+        run_cancellable(stage, token)
+        latencies.append(time.perf_counter() - cancelled_at[0])
+        timer.join()
+
+    time.sleep(0.5)
+    extra_threads = threading.active_count() - baseline_threads
+    print(f"Abort latency: max {max(latencies) * 1000:.2f} ms")
+    print(f"Stages still running: {running}")
+    print(f"Threads above baseline: {extra_threads} (pool max {MAX_WORKERS})")
+    if running or extra_threads > MAX_WORKERS:
+        sys.exit(1)
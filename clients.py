@@ -0,0 +1,130 @@
+"""
+Shared Groq API client.
+One client (and one keep-alive connection pool) is reused for every transcription
+and intent call, instead of paying client construction and a TCP/TLS handshake
+on every utterance.
+"""
+
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+from groq import DefaultHttpxClient, Groq, GroqError
+
+load_dotenv()
+
+# Keep idle connections around between voice commands
+KEEPALIVE_SECONDS = 300
+MAX_KEEPALIVE_CONNECTIONS = 4
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    """HTTP transport that counts requests and the connections it had to open."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    def _trace(self, event_name: str, info: dict):
+        # httpcore trace events, emitted only when a connection is established
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        request.extensions = {**request.extensions, "trace": self._trace}
+        return super().handle_request(request)
+
+
+_lock = threading.Lock()
+_client: Groq | None = None
+_transport: _CountingTransport | None = None
+_prewarm_thread: threading.Thread | None = None
+
+
+def get_client() -> Groq:
+    """Returns the shared Groq client, creating it on first use."""
+    global _client, _transport
+    with _lock:
+        if _client is None:
+            _transport = _CountingTransport(
+                limits=httpx.Limits(
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_SECONDS,
+                )
+            )
+            _client = Groq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                http_client=DefaultHttpxClient(transport=_transport),
+            )
+        return _client
+
+
+def _prewarm():
+    try:
+        # Cheapest authenticated call, leaves a live connection in the pool
+        get_client().with_options(max_retries=0).models.list()
+    except GroqError as e:
+        print(f"[!] Error pre-warming API connection: {e}")
+
+
+def prewarm():
+    """
+    Opens (or refreshes) a pooled connection in the background,
+    so the next API call skips the handshake. Call it while the user is speaking.
+    """
+    global _prewarm_thread
+    with _lock:
+        if _prewarm_thread and _prewarm_thread.is_alive():
+            return
+        _prewarm_thread = threading.Thread(target=_prewarm, daemon=True)
+        _prewarm_thread.start()
+
+
+def connection_stats() -> dict[str, int]:
+    """Request and connection counters of the shared client."""
+    if _transport is None:
+        return {"requests": 0, "new_connections": 0, "reused": 0, "tls_handshakes": 0}
+    return {
+        "requests": _transport.requests,
+        "new_connections": _transport.new_connections,
+        "reused": _transport.requests - _transport.new_connections,
+        "tls_handshakes": _transport.tls_handshakes,
+    }
+
+
+def close():
+    """Close the shared client and its connections."""
+    global _client, _transport
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _transport = None
+
+
+if __name__ == "__main__":
+    # Verify connection reuse against the local stand-in server
+    from fake_groq import FakeGroqServer
+
+    with FakeGroqServer() as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        os.environ.setdefault("GROQ_API_KEY", "fake")
+
+        prewarm()
+        _prewarm_thread.join()  # type: ignore
+        for _ in range(10):
+            get_client().chat.completions.create(
+                model="fake-model", messages=[{"role": "user", "content": "hi"}]
+            )
+
+        print(f"Client stats: {connection_stats()}")
+        print(
+            f"Server saw {server.requests} requests on {server.connections} connections"
+        )
+        close()
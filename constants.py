@@ -1,25 +1,50 @@
-import threading
-import winsound
-from typing import Callable
+import os
+from collections.abc import Callable
 
 from tools.browsers import open_url, web_search
 from tools.miscellaneous import press_key, shutdown_system
 from tools.open_apps import open_application, open_directory, open_vscode_project
 
-
-def play_sound_async(freq, duration):
-    threading.Thread(target=winsound.Beep, args=(freq, duration), daemon=True).start()
-
-
 # User specific things, set by user in program settings
 PROJECTS_DIR = "D:/Projects/"
+DOWNLOADS_DIR = os.path.join(os.path.expanduser("~"), "Downloads")
 
 # Can use any qroq model, like "openai/gpt-oss-20b"
 LLM_MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"
 
+# Recording Settings
+# Audio kept from before the activation, as lead-in for a command that starts
+# right at the activation. Kept short so the wake word isn't transcribed.
+PREROLL_SECONDS = 0.3
+
+# Transcribe segments at short pauses while the user is still speaking
+STREAM_TRANSCRIPTION = True
+
+# Stream the LLM response and start the tool before the speech is generated
+STREAM_INTENT = True
+
+# Run the cycle on the asyncio pipeline, which synthesizes the response while
+# the tool runs
+ASYNC_PIPELINE = True
+
+# Fixed phrases, pre-synthesized at startup (see warmup.py)
+ACK_PHRASE = "Yes sir."
+ABORT_PHRASE = "Aborting."
+UNSURE_PHRASE = "I am unsure how to proceed with that request, sir."
+IDLE_PHRASE = "All systems operational. Ready for input."
+FIXED_PHRASES = [ACK_PHRASE, ABORT_PHRASE, UNSURE_PHRASE, IDLE_PHRASE]
+
 # Wake Word Model Settings
 JARVIS_DETECTION_THRESHOLD = 0.3
 INSA_DETECTION_THRESHOLD = 0.25
+# Inference backend: "tflite" or "onnx" (python wakeword.py compares them)
+WAKEWORD_BACKEND = "tflite"
+# openWakeWord's ncpu: threads of the melspectrogram/embedding front-end only,
+# the keyword heads always run on one thread
+WAKEWORD_THREADS = 1
+# Most queued frames passed to one predict call when the engine has fallen
+# behind (1 = one at a time). Fewer calls, the same work per frame
+WAKEWORD_CATCHUP_FRAMES = 1
 
 KEYWORDS: list[str] = [
     "Spotify",
@@ -90,7 +115,7 @@ TOOLS_SCHEMA: list[dict] = [
             {
                 "name": "path",
                 "type": "string",
-                "description": "The absolute path or a known shortcut (e.g., 'Downloads', 'C:/Projects').",
+                "description": "The absolute path, or the folder's name as spoken (e.g., 'Downloads', 'jarvis').",
             }
         ],
     },
@@ -102,7 +127,7 @@ TOOLS_SCHEMA: list[dict] = [
             {
                 "name": "path",
                 "type": "string",
-                "description": "The path to the project folder.",
+                "description": "The path to the project folder, or the project's name as spoken (e.g., 'jarvis').",
             }
         ],
     },
@@ -0,0 +1,120 @@
+"""
+Sound cues (the beeps).
+Every cue is rendered once as a numpy waveform and handed straight to the
+running mixer (audio_output.py), so it starts within one output block and mixes
+with the speech instead of waiting for it. A cue asked for while the previous
+one is still playing (the abort right after a success) is queued after it
+instead of overlapping.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+import audio_output
+
+# name -> tones as (frequency Hz, duration ms), played one after the other
+CUES: dict[str, list[tuple[int, int]]] = {
+    "ack": [(600, 100)],  # Activation
+    "listening": [(1000, 200)],
+    "success": [(800, 100), (1200, 100)],  # Low-High
+    "error": [(500, 500)],
+    "abort": [(500, 300), (400, 400)],
+}
+
+VOLUME = 0.3
+# Fade in/out of each tone, avoids clicks
+FADE_MS = 5
+
+
+def tone(
+    frequency: int, duration_ms: int, sample_rate: int = audio_output.SAMPLE_RATE
+) -> np.ndarray:
+    """A sine tone with short fades."""
+    count = int(sample_rate * duration_ms / 1000)
+    wave = VOLUME * np.sin(2 * np.pi * frequency * np.arange(count) / sample_rate)
+
+    fade = min(int(sample_rate * FADE_MS / 1000), count // 2)
+    if fade:
+        ramp = np.linspace(0.0, 1.0, fade)
+        wave[:fade] *= ramp
+        wave[-fade:] *= ramp[::-1]
+    return wave.astype(np.float32)
+
+
+def render_cue(tones: list[tuple[int, int]]) -> np.ndarray:
+    return np.concatenate([tone(frequency, duration) for frequency, duration in tones])
+
+
+class CuePlayer:
+    def __init__(self, engine: audio_output.PlaybackEngine | None = None):
+        self.engine = engine
+        self.waveforms = {name: render_cue(tones) for name, tones in CUES.items()}
+
+        # The cue playing last, the next one follows it
+        self._last: audio_output.Playback | None = None
+        self._lock = threading.Lock()
+
+    def play(self, name: str) -> audio_output.Playback | None:
+        """Starts a cue (or queues it after the one playing), returns immediately."""
+        if name not in self.waveforms:
+            print(f"[!] Unknown sound cue: {name}")
+            return None
+        waveform = self.waveforms[name]
+        with self._lock:
+            if self._last is None or not self._last.extend(waveform):
+                engine = self.engine or audio_output.get_engine()
+                self._last = engine.play(waveform)
+            return self._last
+
+
+_player: CuePlayer | None = None
+_player_lock = threading.Lock()
+
+
+def play_cue(name: str):
+    """Plays a cue from CUES without blocking."""
+    global _player
+    with _player_lock:
+        if _player is None:
+            _player = CuePlayer()
+    _player.play(name)
+
+
+if __name__ == "__main__":
+    # Cue start latency while speech is playing on the same output
+    MAX_LATENCY_MS = 10.0
+
+    engine = audio_output.PlaybackEngine(audio_output.NullSink(realtime=True))
+    engine.start()
+    player = CuePlayer(engine)
+
+    noise = np.random.default_rng(0).standard_normal(audio_output.SAMPLE_RATE * 15)
+    speech = engine.play(0.1 * noise.astype(np.float32))
+    latencies = []
+    for name in ("ack", "success", "error", "abort") * 5:
+        requested_at = time.perf_counter()
+        playback = player.play(name)
+        playback.started.wait()
+        latencies.append((playback.started_at - requested_at) * 1000)
+        playback.wait()
+        time.sleep(0.013)  # Land at different points of the output block
+
+    latencies = np.array(latencies)
+    print(
+        f"{len(latencies)} cues over speech: start latency "
+        f"mean {latencies.mean():.2f} ms, max {latencies.max():.2f} ms"
+    )
+    print(f"Speech still playing: {not speech.done.is_set()}")
+
+    # Back to back: the second cue follows the first
+    first = player.play("success")
+    second = player.play("abort")
+    print(f"Queued after the playing cue: {first is second}")
+    speech.stop()
+    engine.stop()
+
+    assert latencies.max() < MAX_LATENCY_MS, (
+        f"Cue start latency {latencies.max():.2f} ms over {MAX_LATENCY_MS} ms"
+    )
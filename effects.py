@@ -0,0 +1,228 @@
+"""
+The 'Iron Man Helmet' effects chain.
+The Pedalboard is built once per EffectsEngine and reused: audio is processed
+in fixed-size blocks as it arrives, flush() lets the reverb ring out at the end
+of an utterance and resets the chain for the next one.
+fingerprint() identifies the chain, the response cache keys on it.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from pedalboard import (
+    Chorus,
+    Compressor,
+    Gain,
+    HighpassFilter,
+    LowpassFilter,
+    Pedalboard,
+    Phaser,
+    Reverb,
+)
+
+# --- THE EFFECT CHAIN (The Tuning Lab) ---
+# Modify these numbers to change the 'flavor' of the robot.
+# Kept as data so the response cache can tell when the chain was retuned.
+DSP_CHAIN: list[tuple[str, dict]] = [
+    # A. PRE-FILTERING
+    # Cutting lows makes him sound crisp/digital.
+    ("HighpassFilter", {"cutoff_frequency_hz": 200}),
+    # B. COMPRESSION
+    # Keeps his voice volume perfectly steady, never whispering, never shouting.
+    ("Compressor", {"threshold_db": -15, "ratio": 4}),
+    #
+    # C. THE ROBOTIC TEXTURE (Choose ONE or mix gently)
+    # OPTION 1: CHORUS (The "Metallic Sheen") - Preferred for Jarvis
+    # Makes it sound like the voice is coming from multiple slightly sync-off speakers.
+    ("Chorus", {"rate_hz": 1.0, "depth": 0.1, "mix": 0.3}),
+    # OPTION 2: PHASER (The "Sci-Fi" wobble) - Use very low mix or it sounds like C-3PO
+    # ("Phaser", {"rate_hz": 0.5, "depth": 0.1, "mix": 0.1}),
+    #
+    # D. SPACE (The "Helmet" Environment)
+    ("Reverb", {"room_size": 0.1, "damping": 0.8, "wet_level": 0.1, "dry_level": 0.9}),
+    #
+    # E. FINAL POLISH
+    # Cutting ultra-high frequencies removes digital hiss
+    ("LowpassFilter", {"cutoff_frequency_hz": 7000}),
+    # Boost volume back up after filtering
+    ("Gain", {"gain_db": 3}),
+]
+
+_EFFECTS = {
+    "Chorus": Chorus,
+    "Compressor": Compressor,
+    "Gain": Gain,
+    "HighpassFilter": HighpassFilter,
+    "LowpassFilter": LowpassFilter,
+    "Phaser": Phaser,
+    "Reverb": Reverb,
+}
+
+# Samples per processing block
+BLOCK_SAMPLES = 512
+# Silence fed through the chain at the end of an utterance for the reverb tail
+TAIL_SECONDS = 0.4
+# The tail is cut once it decays below this level
+TAIL_THRESHOLD = 1e-4
+
+
+class EffectsEngine:
+    def __init__(
+        self,
+        chain: list[tuple[str, dict]] = DSP_CHAIN,
+        block_samples: int = BLOCK_SAMPLES,
+        tail_seconds: float = TAIL_SECONDS,
+    ):
+        self.chain = chain
+        self.block_samples = block_samples
+        self.tail_seconds = tail_seconds
+
+        self._board = Pedalboard([_EFFECTS[name](**params) for name, params in chain])
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def fingerprint(self) -> str:
+        """Stable identifier of the chain and its parameters."""
+        data = json.dumps(
+            {"chain": self.chain, "tail_seconds": self.tail_seconds}, sort_keys=True
+        )
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+    def reset(self):
+        """Clears the filter, compressor and reverb state for a new utterance."""
+        self._board.reset()
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Adds audio to the utterance.
+
+        Returns:
+            np.ndarray: The processed full blocks (the remainder waits for more audio).
+        """
+        self._pending = np.concatenate(
+            (self._pending, samples.astype(np.float32, copy=False))
+        )
+        ready = len(self._pending) - len(self._pending) % self.block_samples
+        if not ready:
+            return np.zeros(0, dtype=np.float32)
+
+        blocks = self._pending[:ready].reshape(-1, self.block_samples)
+        self._pending = self._pending[ready:]
+        return np.concatenate(
+            [self._board.process(block, sample_rate, reset=False) for block in blocks]
+        )
+
+    def flush(self, sample_rate: int) -> np.ndarray:
+        """
+        Ends the utterance: processes what is left plus the reverb tail, then resets.
+
+        Returns:
+            np.ndarray: The last of the processed audio.
+        """
+        tail_samples = int(self.tail_seconds * sample_rate)
+        tail_samples += -(len(self._pending) + tail_samples) % self.block_samples
+        audio = np.concatenate(
+            (self._pending, np.zeros(tail_samples, dtype=np.float32))
+        )
+        if not len(audio):
+            self.reset()
+            return audio
+
+        out = np.concatenate(
+            [
+                self._board.process(block, sample_rate, reset=False)
+                for block in audio.reshape(-1, self.block_samples)
+            ]
+        )
+        self.reset()
+
+        # Cut the tail where it has decayed to silence
+        loud = np.flatnonzero(np.abs(out) > TAIL_THRESHOLD)
+        end = max(len(audio) - tail_samples, loud[-1] + 1 if len(loud) else 0)
+        return out[:end]
+
+    def apply(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Processes a whole clip."""
+        out = self.process(samples, sample_rate)
+        return np.concatenate((out, self.flush(sample_rate)))
+
+
+# Idle engines, one is built per concurrent utterance and then reused
+_idle: list[EffectsEngine] = []
+_idle_lock = threading.Lock()
+
+
+@contextmanager
+def effects_engine():
+    """An engine for one utterance, returned for reuse afterwards (state reset)."""
+    with _idle_lock:
+        engine = _idle.pop() if _idle else EffectsEngine()
+    try:
+        yield engine
+    finally:
+        engine.reset()
+        with _idle_lock:
+            _idle.append(engine)
+
+
+def fingerprint() -> str:
+    """Fingerprint of the default chain."""
+    with effects_engine() as engine:
+        return engine.fingerprint()
+
+
+if __name__ == "__main__":
+    # Real-time factor on a long response (processing time / audio duration)
+    SAMPLE_RATE = 24000
+    DURATION = 30.0
+
+    rng = np.random.default_rng(0)
+    t = np.arange(int(SAMPLE_RATE * DURATION)) / SAMPLE_RATE
+    audio = (
+        0.3 * np.sin(2 * np.pi * 180 * t) * (1 + np.sin(2 * np.pi * 3 * t))
+        + 0.02 * rng.standard_normal(len(t))
+    ).astype(np.float32)
+    # Decoded MP3 arrives in uneven chunks
+    chunks = np.array_split(
+        audio, np.cumsum(rng.integers(800, 3000, len(audio) // 800))
+    )
+    chunks = [c for c in chunks if len(c)]
+
+    def rebuilt_per_utterance():
+        board = Pedalboard([_EFFECTS[name](**params) for name, params in DSP_CHAIN])
+        return board.process(audio, SAMPLE_RATE)
+
+    engine = EffectsEngine()
+
+    def streamed_blocks():
+        out = [engine.process(chunk, SAMPLE_RATE) for chunk in chunks]
+        out.append(engine.flush(SAMPLE_RATE))
+        return np.concatenate(out)
+
+    print(f"Fingerprint: {engine.fingerprint()}")
+    for label, func in (
+        ("rebuilt, whole clip", rebuilt_per_utterance),
+        ("engine, streamed blocks", streamed_blocks),
+    ):
+        func()  # Warm up
+        runs = 5
+        start_time = time.perf_counter()
+        for _ in range(runs):
+            out = func()
+        elapsed = (time.perf_counter() - start_time) / runs
+        print(
+            f"{label:24} RTF {elapsed / DURATION:.4f} "
+            f"({elapsed * 1000:.1f} ms for {DURATION:.0f}s, {len(out) / SAMPLE_RATE:.2f}s out)"
+        )
+
+    # Setup cost that is no longer paid per utterance
+    start_time = time.perf_counter()
+    for _ in range(20):
+        EffectsEngine()
+    print(
+        f"Chain construction: {(time.perf_counter() - start_time) / 20 * 1000:.2f} ms"
+    )
@@ -0,0 +1,266 @@
+"""
+Local stand-in for the Groq OpenAI-compatible API.
+Used to exercise the LLM/transcription code paths offline with controllable latency.
+
+Point the Groq client at it with the GROQ_BASE_URL environment variable:
+    with FakeGroqServer(chunk_delay=0.05) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+"""
+
+import email
+import email.policy
+import io
+import json
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_INTENT = (
+    '{"tool": "open_application", "parameters": {"app_name": "Spotify"}, '
+    '"speech": "Initializing Spotify protocols, sir. Enjoy your music."}'
+)
+
+
+def _sample(delay) -> float:
+    """Delays are either seconds or a callable returning seconds (a distribution)."""
+    return delay() if callable(delay) else delay
+
+
+def _describe_audio(audio: bytes, prompt: str) -> str:
+    return f"<{len(audio)} bytes of audio>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def setup(self):
+        # One handler per TCP connection, so this counts new connections
+        super().setup()
+        self.server.fake.connections += 1
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet
+
+    def do_GET(self):
+        if self.path.endswith("/models"):
+            self.server.fake.requests += 1
+            self._send_json(
+                200,
+                {
+                    "object": "list",
+                    "data": [{"id": "fake-model", "object": "model", "created": 0}],
+                },
+            )
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        if self.path.endswith("/chat/completions"):
+            self._chat_completions(json.loads(body or b"{}"))
+        elif self.path.endswith("/audio/transcriptions"):
+            self._transcriptions(body)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes):
+        """Write one HTTP/1.1 chunked transfer-encoding chunk."""
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _chat_completions(self, request: dict):
+        fake = self.server.fake
+        fake.requests += 1
+        content = fake.responder(request.get("messages", []))
+        created = int(time.time())
+        model = request.get("model", "fake-model")
+
+        time.sleep(_sample(fake.first_chunk_delay))
+
+        if not request.get("stream"):
+            self._send_json(
+                200,
+                {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                },
+            )
+            return
+
+        # Server-sent events, one delta per chunk
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        pieces = [
+            content[i : i + fake.chunk_chars]
+            for i in range(0, len(content), fake.chunk_chars)
+        ]
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(_sample(fake.chunk_delay))
+            event = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": piece},
+                        "finish_reason": "stop" if i == len(pieces) - 1 else None,
+                    }
+                ],
+            }
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _transcriptions(self, body: bytes):
+        fake = self.server.fake
+        fake.requests += 1
+
+        # Multipart form: parse it with the email package
+        message = email.message_from_bytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("ascii")
+            + body,
+            policy=email.policy.HTTP,
+        )
+        fields: dict[str, bytes] = {}
+        for part in message.iter_parts():  # type: ignore
+            name = part.get_param("name", header="content-disposition")
+            fields[name] = part.get_payload(decode=True)
+
+        audio = fields.get("file", b"")
+        try:
+            with wave.open(io.BytesIO(audio), "rb") as wf:
+                duration = wf.getnframes() / wf.getframerate()
+        except (wave.Error, EOFError):
+            duration = 0.0
+
+        prompt = fields.get("prompt", b"").decode("utf-8")
+        time.sleep(
+            _sample(fake.transcribe_delay)
+            + _sample(fake.transcribe_per_second) * duration
+        )
+        text = fake.transcriber(audio, prompt)
+        self._send_json(
+            200,
+            {
+                "task": "transcribe",
+                "language": "arabic",
+                "duration": duration,
+                "text": text,
+                "segments": [],
+            },
+        )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeGroqServer"
+
+
+class FakeGroqServer:
+    """
+    Threaded HTTP server that answers like the Groq API.
+
+    Delays are seconds, or callables returning seconds to draw them from a distribution.
+
+    Args:
+        responder: Returns the assistant message for a list of chat messages.
+            Defaults to always answering with DEFAULT_INTENT.
+        first_chunk_delay (float): Seconds before the first byte (time to first token).
+        chunk_delay (float): Seconds between streamed chunks.
+        chunk_chars (int): Characters of content per streamed chunk.
+        transcriber: Returns the text for (wav bytes, prompt).
+            Defaults to describing the audio length.
+        transcribe_delay (float): Fixed seconds per transcription request.
+        transcribe_per_second (float): Extra seconds per second of audio.
+    """
+
+    def __init__(
+        self,
+        responder=None,
+        first_chunk_delay: float = 0.0,
+        chunk_delay: float = 0.0,
+        chunk_chars: int = 8,
+        transcriber=None,
+        transcribe_delay: float = 0.0,
+        transcribe_per_second: float = 0.0,
+        port: int = 0,
+    ):
+        self.responder = responder or (lambda messages: DEFAULT_INTENT)
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_chars = chunk_chars
+        self.transcriber = transcriber or _describe_audio
+        self.transcribe_delay = transcribe_delay
+        self.transcribe_per_second = transcribe_per_second
+
+        # Stats
+        self.requests = 0
+        self.connections = 0
+
+        self._httpd = _Server(("127.0.0.1", port), _Handler)
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+
+if __name__ == "__main__":
+    # Serve until Ctrl+C, for pointing the assistant at it by hand
+    server = FakeGroqServer(first_chunk_delay=0.3, chunk_delay=0.05).start()
+    print(f"Fake Groq API listening on {server.base_url}")
+    print(f"Run with: GROQ_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
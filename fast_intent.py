@@ -0,0 +1,278 @@
+"""
+Local fast path for high-frequency commands ("fta7 spotify", "افتح discord").
+Resolves short verb + target commands straight to a tool call without the LLM,
+and returns None for anything it is not confident about.
+"""
+
+import json
+import time
+
+from constants import AVAILABLE_FUNCTIONS, DOWNLOADS_DIR, KEYWORDS, PROJECTS_DIR
+from normalization import normalize_text
+
+# Verbs, normalized on load (see normalization.normalize_text)
+OPEN_VERBS = {
+    # Arabic script
+    "افتح",
+    "فتح",
+    "افتحلي",
+    "فتحلي",
+    "شغل",
+    "شغللي",
+    "شغلي",
+    # Arabizi
+    "fta7",
+    "efta7",
+    "ifta7",
+    "fta7li",
+    "efta7li",
+    "ftah",
+    "eftah",
+    "iftah",
+    "shaghil",
+    "shaghel",
+    "sha8el",
+    "sha8il",
+    "shaghlli",
+    # English
+    "open",
+    "launch",
+    "start",
+}
+
+PRESS_VERBS = {
+    "اضغط",
+    "ضغط",
+    "دوس",
+    "كبس",
+    "edghat",
+    "2edghat",
+    "ed8at",
+    "doos",
+    "dous",
+    "kbos",
+    "press",
+    "hit",
+}
+
+# Words that can be dropped without changing the meaning
+FILLERS = {
+    "jarvis",
+    "جارفس",
+    "جارفيس",
+    "يا",
+    "ya",
+    "لي",
+    "li",
+    "ال",
+    "el",
+    "al",
+    "please",
+    "plz",
+    "the",
+    "منفضلك",
+    "بليز",
+}
+
+# Commands longer than this (after dropping fillers) go to the LLM
+MAX_TOKENS = 5
+
+# KEYWORD -> (tool, parameters, spoken name)
+# Ambiguous keywords (Portal, University, PSUT, Laptop, Folder) and Shutdown
+# are deliberately left to the LLM.
+_TARGETS: dict[str, tuple[str, dict, str]] = {
+    "Spotify": ("open_application", {"app_name": "Spotify"}, "Spotify"),
+    "Brave": ("open_application", {"app_name": "Brave"}, "Brave"),
+    "Netflix": ("open_application", {"app_name": "Netflix"}, "Netflix"),
+    "Terminal": ("open_application", {"app_name": "Terminal"}, "the terminal"),
+    "Powershell": ("open_application", {"app_name": "PowerShell"}, "PowerShell"),
+    "VSCode": (
+        "open_application",
+        {"app_name": "Visual Studio Code"},
+        "Visual Studio Code",
+    ),
+    "Settings": ("open_application", {"app_name": "Settings"}, "settings"),
+    "Discord": ("open_application", {"app_name": "Discord"}, "Discord"),
+    "Matlab": ("open_application", {"app_name": "MATLAB"}, "MATLAB"),
+    "GitHub": ("open_url", {"url": "https://github.com"}, "GitHub"),
+    "Downloads": ("open_directory", {"path": DOWNLOADS_DIR}, "your downloads"),
+    "Projects": ("open_directory", {"path": PROJECTS_DIR}, "your projects"),
+    "Space": ("press_keyboard_key", {"key": "space"}, "Space"),
+    "Enter": ("press_keyboard_key", {"key": "enter"}, "Enter"),
+    "Escape": ("press_keyboard_key", {"key": "escape"}, "Escape"),
+}
+
+# Extra spellings on top of the keyword itself (Arabic script and common splits)
+_ALIASES: dict[str, list[str]] = {
+    "Spotify": ["سبوتيفاي", "سبوتفاي", "spotifi"],
+    "Brave": ["بريف", "براف", "brave browser"],
+    "Netflix": ["نتفليكس", "نيتفليكس", "netflex"],
+    "Terminal": ["تيرمينال", "تيرمنال", "ترمنال"],
+    "Powershell": ["باورشيل", "باور شيل", "power shell"],
+    "VSCode": ["vs code", "visual studio code", "في اس كود", "فيجوال ستوديو كود"],
+    "Settings": ["الاعدادات", "اعدادات", "سيتينغز", "setting"],
+    "Discord": ["ديسكورد", "ديسكرد", "دسكورد"],
+    "Matlab": ["ماتلاب", "مات لاب", "mat lab"],
+    "GitHub": ["جيت هب", "جيتهب", "git hub"],
+    "Downloads": ["التنزيلات", "تنزيلات", "داونلودز", "download"],
+    "Projects": ["المشاريع", "مشاريع", "بروجكتس", "project"],
+    "Space": ["سبيس"],
+    "Enter": ["انتر"],
+    "Escape": ["اسكيب", "esc"],
+}
+
+_SPEECH = {
+    "open_application": "Initializing {name}, sir.",
+    "open_url": "Opening {name}, sir.",
+    "open_directory": "Opening {name}, sir.",
+    "press_keyboard_key": "Pressing {name}, sir.",
+}
+
+
+class FastIntentMatcher:
+    """
+    Dictionary based matcher: one verb followed by one known target.
+    Built from KEYWORDS, the tool names in AVAILABLE_FUNCTIONS and the verb lexicon.
+    """
+
+    def __init__(self):
+        self._open_verbs = {normalize_text(v) for v in OPEN_VERBS}
+        self._press_verbs = {normalize_text(v) for v in PRESS_VERBS}
+        self._fillers = {normalize_text(f) for f in FILLERS}
+
+        self._open_targets: dict[str, str] = {}
+        self._press_targets: dict[str, str] = {}
+        self._intents: dict[str, str] = {}
+
+        for keyword in KEYWORDS:
+            if keyword not in _TARGETS:
+                continue
+            tool, parameters, name = _TARGETS[keyword]
+            if tool not in AVAILABLE_FUNCTIONS:
+                continue
+
+            table = (
+                self._press_targets
+                if tool == "press_keyboard_key"
+                else self._open_targets
+            )
+            for alias in [keyword, *_ALIASES.get(keyword, [])]:
+                table[normalize_text(alias)] = keyword
+
+            # Pre-rendered response, same format as interpret_intent
+            self._intents[keyword] = json.dumps(
+                {
+                    "tool": tool,
+                    "parameters": parameters,
+                    "speech": _SPEECH[tool].format(name=name),
+                },
+                ensure_ascii=False,
+            )
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def _resolve(self, text: str) -> str | None:
+        tokens = [t for t in normalize_text(text).split() if t not in self._fillers]
+        if len(tokens) < 2 or len(tokens) > MAX_TOKENS:
+            return None
+
+        verb, target = tokens[0], " ".join(tokens[1:])
+        if verb in self._open_verbs:
+            table = self._open_targets
+        elif verb in self._press_verbs:
+            table = self._press_targets
+        else:
+            return None
+
+        keyword = table.get(target)
+        if keyword is None and target.startswith("ال"):
+            # Arabic definite article attached to the target
+            keyword = table.get(target[2:])
+        if keyword is None:
+            return None
+        return self._intents[keyword]
+
+    def match(self, text: str) -> str | None:
+        """
+        Returns the intent JSON for a high-confidence command, None otherwise.
+        """
+        start_time = time.perf_counter()
+        intent_json = self._resolve(text)
+        elapsed = time.perf_counter() - start_time
+
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        if intent_json:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return intent_json
+
+    def phrases(self) -> list[str]:
+        """Every response the fast path can speak."""
+        return sorted(
+            {json.loads(intent)["speech"] for intent in self._intents.values()}
+        )
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_us": self.total_time / total * 1e6 if total else 0.0,
+            "max_us": self.max_time * 1e6,
+        }
+
+
+_matcher = FastIntentMatcher()
+
+
+def match_intent(text: str) -> str | None:
+    return _matcher.match(text)
+
+
+def match_stats() -> dict[str, float]:
+    return _matcher.stats()
+
+
+def fast_path_phrases() -> list[str]:
+    return _matcher.phrases()
+
+
+if __name__ == "__main__":
+    # Benchmark: common commands should resolve well under a millisecond
+    samples = [
+        "fta7 spotify",
+        "Fta7 Spotify.",
+        "افتح سبوتيفاي",
+        "افتح ديسكورد",
+        "افتحلي الديسكورد",
+        "شغل نتفليكس",
+        "open vs code",
+        "اضغط انتر",
+        "press space",
+        "افتح المشاريع",
+        "fta7 github",
+        # Misses, these go to the LLM
+        "مرحبا كيفك؟ افتح لي Spotify.",
+        "ابحث عن طقس دمشق",
+        "kifak?",
+    ]
+    matcher = FastIntentMatcher()
+    for sample in samples:
+        print(f"{sample!r:40} -> {matcher.match(sample)}")
+
+    runs = 10000
+    matcher = FastIntentMatcher()
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        for sample in samples:
+            matcher.match(sample)
+    elapsed = time.perf_counter() - start_time
+    print(f"\nAverage: {elapsed / (runs * len(samples)) * 1e6:.2f} us per command")
+    print(f"Stats: {matcher.stats()}")
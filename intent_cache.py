@@ -0,0 +1,210 @@
+"""
+Persistent cache of interpreted intents.
+The LLM runs at temperature 0, so the same (normalized) transcription always
+maps to the same intent JSON. Entries are evicted LRU past MAX_ENTRIES, expire
+after TTL_SECONDS, and the whole cache is dropped when TOOLS_SCHEMA, LLM_MODEL or the
+system prompt changes.
+Storing an intent only updates memory; a background thread writes the file
+once the changes settle (SAVE_DELAY_SECONDS), so the cycle never waits on the disk.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from constants import LLM_MODEL, TOOLS_SCHEMA
+from normalization import normalize_text
+from prompt_builder import build_system_prompt
+
+CACHE_FILE = "intent_cache.json"
+MAX_ENTRIES = 500
+TTL_SECONDS = 7 * 24 * 3600
+# Changes within this long are written together
+SAVE_DELAY_SECONDS = 2.0
+
+
+class IntentCache:
+    def __init__(
+        self,
+        path: str = CACHE_FILE,
+        max_entries: int = MAX_ENTRIES,
+        ttl_seconds: float = TTL_SECONDS,
+        save_delay: float = SAVE_DELAY_SECONDS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.save_delay = save_delay
+
+        # normalized text -> (intent json, time stored), oldest first
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Everything the cached answers depend on, besides the text itself
+        version = (
+            json.dumps(TOOLS_SCHEMA, sort_keys=True) + LLM_MODEL + build_system_prompt()
+        )
+        self._version = hashlib.sha1(version.encode("utf-8")).hexdigest()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Expired or least recently used
+
+        self._load()
+
+        # Set when the file is behind memory
+        self._dirty = threading.Event()
+        self._save_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[!] Error loading intent cache: {e}")
+            return
+
+        if data.get("version") != self._version:
+            return  # Stale, start empty
+
+        now = time.time()
+        for key, intent_json, stored_at in data.get("entries", []):
+            if now - stored_at < self.ttl_seconds:
+                self._entries[key] = (intent_json, stored_at)
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(self.save_delay)  # Let a burst of changes settle
+            self.flush()
+
+    def flush(self):
+        """Writes pending changes now instead of after the save delay."""
+        with self._save_lock:
+            if self._dirty.is_set():
+                self._dirty.clear()
+                self._save()
+
+    def _save(self):
+        """Write the cache atomically (temp file + rename)."""
+        with self._lock:
+            data = {
+                "version": self._version,
+                "entries": [[k, v, t] for k, (v, t) in self._entries.items()],
+            }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[!] Error saving intent cache: {e}")
+
+    def get(self, text: str) -> str | None:
+        key = normalize_text(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[1] >= self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, text: str, intent_json: str):
+        key = normalize_text(text)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = (intent_json, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        self._dirty.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._dirty.set()
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+_cache: IntentCache | None = None
+
+
+def _get_cache() -> IntentCache:
+    global _cache
+    if _cache is None:
+        _cache = IntentCache()
+    return _cache
+
+
+def lookup(text: str) -> str | None:
+    """Returns the cached intent JSON for the transcription, if any."""
+    return _get_cache().get(text)
+
+
+def store(text: str, intent_json: str):
+    """Cache an intent, only if it is valid JSON."""
+    try:
+        json.loads(intent_json)
+    except (TypeError, json.JSONDecodeError):
+        return
+    _get_cache().put(text, intent_json)
+
+
+def stats() -> dict[str, float]:
+    return _get_cache().stats()
+
+
+def flush():
+    """Writes the pending changes (at shutdown)."""
+    if _cache is not None:
+        _cache.flush()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = IntentCache(os.path.join(tmp, "cache.json"), max_entries=2)
+        cache.put("افتحْ سبوتيفاي؟", '{"tool": "open_application"}')
+        print(f"Variant spelling hit: {cache.get('افتح سبوتيفاي') is not None}")
+
+        cache.put("fta7 discord", '{"tool": "open_application"}')
+        cache.put("ftah brave", '{"tool": "open_application"}')
+        print(f"LRU evicted oldest: {cache.get('افتح سبوتيفاي') is None}")
+        print(f"Arabizi normalized: {cache.get('FTAH Discord') is not None}")
+
+        start_time = time.perf_counter()
+        for i in range(100):
+            cache.put(f"command {i}", '{"tool": "none"}')
+        per_put = (time.perf_counter() - start_time) / 100
+        print(f"Put: {per_put * 1e6:.1f} us (cost to the cycle)")
+        cache.flush()
+        print(f"Reloaded: {len(IntentCache(cache.path)._entries)} entries")
+        print(f"Stats: {cache.stats()}")
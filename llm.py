@@ -1,9 +1,15 @@
+import json
 import os
+from collections.abc import Callable
 
+import httpx
 from dotenv import load_dotenv
-from groq import Groq
+from groq import GroqError
 
-from constants import LLM_MODEL, PROJECTS_DIR, TOOLS_SCHEMA
+from cancellation_token import current_token
+from clients import get_client
+from constants import LLM_MODEL
+from prompt_builder import build_system_prompt
 
 load_dotenv()
 
@@ -30,75 +36,159 @@ def clean_json_output(text: str | None) -> str | None:
     return cleaned.strip()
 
 
-def interpret_intent(transcribed_text: str) -> str | None:
-    projects = "\n - ".join(os.listdir(PROJECTS_DIR))
-    downloads_dir = os.path.join(os.path.expanduser("~"), "Downloads")
-
-    user_context = f"""
-    USER CONTEXT:
-    - Main Projects Directory: '{PROJECTS_DIR}'
-        {projects}
-    - Downloads Folder: '{downloads_dir}'
+class IncrementalJSONParser:
+    """
+    Parses a streamed JSON object chunk by chunk.
+    Each top-level field is decoded as soon as its value is complete and stored in
+    `fields`, without waiting for the rest of the object.
+    Text before the opening brace (e.g. ```json markers) is skipped.
     """
 
-    system_prompt = f"""
-    SYSTEM IDENTITY:
-    You are J.A.R.V.I.S, a smart desktop assistant for a developer.
-    
-    USER INPUT:
-    - The user speaks Syrian Arabic (Shami) mixed with English technical terms.
-    - Input may be in Arabic Script (e.g., "افتح سبوتيفاي") or Arabizi (e.g., "fta7 spotify").
-    - Transcriptions may contain slight errors; infer intent where possible.
-    
-    YOUR TASKS:
-    1. Analyze the user's request based on the context below.
-    2. Map it to the correct tool function.
-    3. Generate a "speech" response in ENGLISH.
-    
-    SPEECH GUIDELINES (JARVIS PERSONA):
-    - Tone: Calm, dry, British wit, highly professional.
-    - Content: Concise updates. No fake enthusiasm (no exclamation marks).
-    - Style: Use words like "Protocols", "Initializing", "Sir", "Aborting".
-    
-    {user_context}
-
-    AVAILABLE TOOLS:
-    {TOOLS_SCHEMA}
-        
-    RESPONSE FORMAT:
-    You must ONLY respond with a JSON object. DO NOT respond with anything else.
-    {{
-        "tool": "tool_name_or_none",
-        "parameters": {{ ... }},
-        "speech": "The verbal response in English."
-    }}
-
-    HANDLING RULES:
-    - If the user wants to open Netflix, use "open_application" with "Netflix".
-    
-    - If the user says 'Insa', 'Cancel', 'Khalas', or similar:
-      Output: {{"tool": "none", "parameters": {{}}, "speech": "Aborting."}}
-      
-    - If no tool fits the request (or you are just chatting):
-      Output: {{"tool": "none", "parameters": {{}}, "speech": "I am unsure how to proceed with that request, sir."}}
-      
-    - If the request is purely conversational (e.g., "Kifak?"):
-      Output: {{"tool": "none", "parameters": {{}}, "speech": "All systems operational. Ready for input."}}
+    def __init__(self):
+        self.fields: dict = {}
+        self.done = False
+
+        self._text = ""
+        self._pos = 0  # Next character to scan
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+        # What the top-level object expects next: "key", "colon", "value" or "comma"
+        self._expect = "key"
+        self._key: str | None = None
+        self._token_start = -1
+        # Start of a bare value (number, true, false, null)
+        self._bare_start = -1
+
+    def feed(self, text: str) -> list[str]:
+        """
+        Feed the next chunk of text.
+
+        Returns:
+            list[str]: Names of the fields completed by this chunk.
+        """
+        self._text += text
+        completed: list[str] = []
+
+        while self._pos < len(self._text) and not self.done:
+            i = self._pos
+            ch = self._text[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._end_top_level_string(i, completed)
+                continue
+
+            if self._depth == 0:
+                # Skip everything until the object starts
+                if ch == "{":
+                    self._depth = 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect in ("key", "value"):
+                    self._token_start = i
+            elif ch in "{[":
+                if self._depth == 1 and self._expect == "value":
+                    self._token_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 1:
+                    # End of the object
+                    self._end_bare_value(i, completed)
+                    self.done = True
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "value":
+                    self._complete(self._token_start, i + 1, completed)
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect = "value"
+                elif ch == ",":
+                    self._end_bare_value(i, completed)
+                    self._expect = "key"
+                elif (
+                    not ch.isspace()
+                    and self._expect == "value"
+                    and self._bare_start == -1
+                ):
+                    self._bare_start = i
+
+        return completed
+
+    def _end_top_level_string(self, end: int, completed: list[str]):
+        if self._expect == "key":
+            try:
+                self._key = json.loads(self._text[self._token_start : end + 1])
+            except json.JSONDecodeError:
+                self._key = None
+            self._expect = "colon"
+        elif self._expect == "value":
+            self._complete(self._token_start, end + 1, completed)
+
+    def _end_bare_value(self, end: int, completed: list[str]):
+        if self._bare_start != -1 and self._expect == "value":
+            self._complete(self._bare_start, end, completed)
+        self._bare_start = -1
+
+    def _complete(self, start: int, end: int, completed: list[str]):
+        """Decode the value in text[start:end] for the current key."""
+        self._expect = "comma"
+        if self._key is None:
+            return
+        try:
+            self.fields[self._key] = json.loads(self._text[start:end])
+            completed.append(self._key)
+        except json.JSONDecodeError:
+            pass
+        self._key = None
+
+
+def _tool_call(parser: IncrementalJSONParser) -> tuple[str, dict] | None:
+    """
+    (tool, parameters) once both are final: the parameters are parsed, or a field
+    after the tool completed without them (the model moved on), or the object ended.
+    A field before the tool (e.g. the speech first) says nothing about the parameters.
     """
+    fields = parser.fields
+    if "tool" not in fields:
+        return None
+    # fields are in the order they completed
+    moved_on = list(fields).index("tool") < len(fields) - 1
+    if "parameters" in fields or moved_on or parser.done:
+        return str(fields["tool"]), fields.get("parameters") or {}
+    return None
+
+
+def _build_messages(transcribed_text: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": build_system_prompt(),
+        },
+        {
+            "role": "user",
+            "content": transcribed_text,
+        },
+    ]
+
+
+def interpret_intent(transcribed_text: str) -> str | None:
+    if current_token().cancelled:
+        return None
     try:
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        client = get_client()
         completion = client.chat.completions.create(
             model=LLM_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": transcribed_text,
-                },
-            ],
+            messages=_build_messages(transcribed_text),
             temperature=0,
             reasoning_effort="medium" if "gpt-oss" in LLM_MODEL else None,
             stream=False,
@@ -110,9 +200,90 @@ def interpret_intent(transcribed_text: str) -> str | None:
         return None
 
 
+def interpret_intent_stream(
+    transcribed_text: str,
+    on_tool: Callable[[str, dict], None] | None = None,
+) -> str | None:
+    """
+    Streaming version of interpret_intent.
+    Calls on_tool(tool, parameters) as soon as both fields are complete,
+    while the rest of the response (the speech) is still being generated.
+
+    The stream is closed as soon as the current cancellation token is cancelled.
+
+    Returns:
+        str: The full cleaned JSON, same as interpret_intent.
+    """
+    token = current_token()
+    if token.cancelled:
+        return None
+    remove = None
+    try:
+        client = get_client()
+        stream = client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=_build_messages(transcribed_text),
+            temperature=0,
+            reasoning_effort="medium" if "gpt-oss" in LLM_MODEL else None,
+            stream=True,
+        )
+        # Tear the HTTP response down on abort instead of reading it to the end
+        remove = token.on_cancel(stream.close)
+
+        parser = IncrementalJSONParser()
+        pieces: list[str] = []
+        dispatched = False
+
+        for chunk in stream:
+            if token.cancelled:
+                return None
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+
+            pieces.append(delta)
+            parser.feed(delta)
+
+            if not dispatched and on_tool:
+                tool_call = _tool_call(parser)
+                if tool_call:
+                    dispatched = True
+                    on_tool(*tool_call)
+
+        return clean_json_output("".join(pieces)) or None
+    except (GroqError, httpx.HTTPError, httpx.StreamError) as e:
+        if not token.cancelled:  # Closing the stream makes the read fail
+            print(f"[!] Error interpreting intent: {e}")
+        return None
+    finally:
+        if remove:
+            remove()
+
+
 if __name__ == "__main__":
+    import sys
+    import time
+
+    # python llm.py --fake : run against the local stand-in server instead of Groq
+    if "--fake" in sys.argv:
+        from fake_groq import FakeGroqServer
+
+        server = FakeGroqServer(first_chunk_delay=0.3, chunk_delay=0.05).start()
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        os.environ.setdefault("GROQ_API_KEY", "fake")
+
     sample_text = "مرحبا كيفك؟ افتح لي Spotify."
-    print("Interpretation Result:")
-    print(interpret_intent(sample_text))
-    if not interpret_intent(sample_text):
-        exit(1)
+    start_time = time.perf_counter()
+
+    def on_tool(tool: str, parameters: dict):
+        print(
+            f"Tool ready after {time.perf_counter() - start_time:.2f}s: {tool} {parameters}"
+        )
+
+    result = interpret_intent_stream(sample_text, on_tool)
+    print(f"Full response after {time.perf_counter() - start_time:.2f}s:")
+    print(result)
+    if not result:
+        sys.exit(1)
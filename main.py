@@ -1,47 +1,32 @@
-import json
-import threading
+import asyncio
 import time
 
-import speech_recognizer
+import audio_output
+import intent_cache
+import stages
+import tracing
 from activator import AssistantActivator
+from audio_capture import MicrophoneCapture
 from cancellation import CancellationWatcher
-from constants import AVAILABLE_FUNCTIONS, play_sound_async
-from llm import interpret_intent
+from cancellation_token import current_token, run_cancellable
+from constants import ASYNC_PIPELINE, AVAILABLE_FUNCTIONS
+from cues import play_cue
+from pipeline import AsyncPipeline
+from recording_archive import get_archive
+from tools.app_index import get_app_index
+from tools.project_index import get_project_index
 from tts import speak
-
-
-def run_interruptible(func, watcher, *args, **kwargs):
-    """
-    Runs a function in a separate thread to allow main thread to check for cancellation.
-    Returns early if watcher detects abortion.
-    """
-    result = [None]
-    exception = [None]
-
-    def target():
-        try:
-            result[0] = func(*args, **kwargs)
-        except Exception as e:
-            exception[0] = e
-
-    t = threading.Thread(target=target)
-    t.start()
-
-    while t.is_alive():
-        if watcher.was_aborted():
-            return None
-        time.sleep(0.1)
-
-    if exception[0]:
-        raise exception[0]
-
-    return result[0]
+from wakeword import WakeWordEngine
+from warmup import Warmup
 
 
 def execute_function(function_name: str, args: dict):
     """
     Maps the string function name from the LLM to the actual Python function.
     """
+    # Never start a tool once the cycle was aborted
+    current_token().raise_if_cancelled()
+
     # Map of string names to actual function objects
 
     if function_name in AVAILABLE_FUNCTIONS:
@@ -52,129 +37,132 @@ def execute_function(function_name: str, args: dict):
         return f"Error: Function {function_name} is not implemented."
 
 
-def run_conversation_cycle(cancellation_watcher: CancellationWatcher):
+def run_conversation_cycle(
+    capture: MicrophoneCapture,
+    cancellation_watcher: CancellationWatcher,
+    activation_frame: int | None = None,
+):
     """
     Runs one full cycle: Record -> Transcribe -> Interpret -> Execute
+    Each stage is a span of the current trace (see stages.py and tracing.py).
     """
-    start_time = time.perf_counter()
-
     # =============== Record Audio ===============
-    # Mute pc audio during recording, restore previous state after
-    audio_data = speech_recognizer.record()
-
-    print(f"Recording Time: {time.perf_counter() - start_time:.2f} seconds")
-    start_time = time.perf_counter()
+    audio_data, transcriber = stages.record(capture, activation_frame)
     if not audio_data:
         return
 
     # Start watching for "Insa" now that we are processing
     cancellation_watcher.start()
+    token = cancellation_watcher.token
+    transcription = intent_json = None
 
     try:
         # =============== Transcribe Audio ===============
-        transcription = run_interruptible(
-            speech_recognizer.transcribe, cancellation_watcher, audio_data
-        )
-
-        if cancellation_watcher.was_aborted():
-            return
+        transcription = stages.transcribe(token, audio_data, transcriber)
         if not transcription:
             return
 
-        print(f"\n User said: {transcription}")
-        print(f"Transcription Time: {time.perf_counter() - start_time:.2f} seconds")
-        start_time = time.perf_counter()
-
         # ============== Interpret Intent ===============
-        intent_json = run_interruptible(
-            interpret_intent, cancellation_watcher, transcription
-        )
-
-        if cancellation_watcher.was_aborted():
+        # The tool starts as soon as it is known, while the speech streams
+        tool = stages.ToolDispatch(token, execute_function)
+        intent_json = stages.interpret(token, transcription, tool)
+        intent = stages.parse_intent(intent_json)
+        if intent is None:
             return
 
-        print(f"Intent: {intent_json}")
-        print(f"Interpretation Time: {time.perf_counter() - start_time:.2f} seconds")
-        start_time = time.perf_counter()
-
         # ============= Execute ===============
-        if intent_json:
-            try:
-                intent = json.loads(intent_json)
-                tool_name = intent.get("tool")
-                parameters = intent.get("parameters", {})
-                if not tool_name or tool_name.lower() == "none":
-                    print("No applicable tool found for the request.")
-                    play_sound_async(500, 500)  # Error sound
-                else:
-                    print(f"Executing: {tool_name} with {parameters}")
-                    result = run_interruptible(
-                        execute_function, cancellation_watcher, tool_name, parameters
-                    )
-
-                    if cancellation_watcher.was_aborted():
-                        return
-
-                    print(f"Result: {result}")
-                    print(
-                        f"Execution Time: {time.perf_counter() - start_time:.2f} seconds"
-                    )
-
-                    # Play a success sound (Low-High)
-                    play_sound_async(800, 100)
-                    play_sound_async(1200, 100)
-
-                # ============== Speak the response ===============
-                speech = intent.get("speech", "")
-                if speech:
-                    speak(speech)
-
-            except json.JSONDecodeError:
-                print("Error: Failed to parse the intent JSON.")
-                play_sound_async(500, 500)  # Error sound
+        stages.execute(token, tool, intent)
+        if token.cancelled:
+            return
 
-        speech_recognizer.save_recording(audio_data)
+        # ============== Speak the response ===============
+        speech = intent.get("speech", "")
+        if speech:
+            # With the token, so "Insa" stops the playback
+            run_cancellable(speak, token, speech)
 
     finally:
-        # Ensure we always stop the watcher (releases microphone)
+        if transcription and not token.cancelled:
+            stages.save(audio_data, transcription, intent_json)
+        # Ensure we always stop the watcher (disarms "insa")
         cancellation_watcher.stop()
 
 
 def main():
     TRIGGER_KEY = "scroll lock"
-    activator = AssistantActivator()
 
-    cancellation_watcher = CancellationWatcher()
+    # One microphone stream shared by every listener for the whole session
+    capture = MicrophoneCapture()
+    capture.start()
 
-    print("🤖 Assistant is running...")
-    print(f"👉 Say 'Jarvis' or Press '{TRIGGER_KEY}' to speak.")
+    # One wake word model and thread for both "jarvis" and "insa"
+    engine = WakeWordEngine(capture)
+    engine.start()
 
-    while True:
-        try:
-            trigger_source = activator.wait_for_activation(TRIGGER_KEY)
-            if trigger_source == "voice":
-                print("\n[Activated by Voice]")
-            elif trigger_source == "key":
-                print("\n[Activated by Key Press]")
-            else:
-                print("\n[Unknown Activation]")
-                continue
+    activator = AssistantActivator(engine)
+    cancellation_watcher = CancellationWatcher(engine)
+
+    # The output device stays open for the session
+    output = audio_output.get_engine()
 
-            # Acknowledgement beep
-            play_sound_async(600, 100)
+    # Render the common phrases missing from the response cache, in the background
+    Warmup().start()
 
-            run_conversation_cycle(cancellation_watcher)
-            print("\n Waiting for trigger ...")
+    # Installed applications and project folders, kept fresh in the background
+    get_app_index()
+    get_project_index()
 
-            # Small buffer to prevent immediate re-triggering
-            time.sleep(1.5)
+    print("🤖 Assistant is running...")
+    print(f"👉 Say 'Jarvis' or Press '{TRIGGER_KEY}' to speak.")
 
+    if ASYNC_PIPELINE:
+        pipeline = AsyncPipeline(
+            capture, activator, cancellation_watcher, execute_function
+        )
+        try:
+            asyncio.run(pipeline.run_forever(TRIGGER_KEY))
         except KeyboardInterrupt:
-            break
-        except Exception as e:
-            print(f"Critical Error in main loop: {e}")
-            # Sleep briefly to avoid infinite error loops
-            time.sleep(1)
+            pass
+    else:
+        while True:
+            try:
+                with tracing.trace("cycle"):
+                    with tracing.span("activation") as span:
+                        trigger_source = activator.wait_for_activation(TRIGGER_KEY)
+                        span.set(trigger=trigger_source)
+
+                    if trigger_source == "voice":
+                        print("\n[Activated by Voice]")
+                    elif trigger_source == "key":
+                        print("\n[Activated by Key Press]")
+                    else:
+                        print("\n[Unknown Activation]")
+                        continue
+
+                    # Acknowledgement beep
+                    play_cue("ack")
+
+                    run_conversation_cycle(
+                        capture, cancellation_watcher, activator.activation_frame
+                    )
+                print("\n Waiting for trigger ...")
+
+                # Small buffer to prevent immediate re-triggering
+                time.sleep(1.5)
+
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                print(f"Critical Error in main loop: {e}")
+                # Sleep briefly to avoid infinite error loops
+                time.sleep(1)
+
+    engine.stop()
+    output.stop()
+    capture.stop()
+    get_archive().close()
+    print(f"Intent cache: {intent_cache.stats()}")
+    intent_cache.flush()
 
 
 if __name__ == "__main__":
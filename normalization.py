@@ -0,0 +1,56 @@
+"""
+Text normalization for transcriptions (Arabic script, Arabizi and English).
+Used wherever transcriptions are compared or looked up locally.
+"""
+
+import re
+import unicodedata
+
+# Harakat, Quranic marks and superscript alef
+_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]")
+_TATWEEL = "\u0640"
+
+# Letter variants Whisper uses interchangeably
+_LETTER_FOLDS = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ة": "ه",
+        "ى": "ي",
+        "ؤ": "و",
+        "ئ": "ي",
+    }
+)
+
+# Anything that is not a letter, digit or whitespace (includes ؟ and ،)
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+
+# Arabic-Indic and Persian digits to ASCII
+_DIGITS = str.maketrans(
+    {chr(0x0660 + i): str(i) for i in range(10)}
+    | {chr(0x06F0 + i): str(i) for i in range(10)}
+)
+
+# Arabizi letters written as digits (only inside Latin words, "fta7" -> "ftah")
+_ARABIZI_DIGITS = str.maketrans(
+    {"2": "a", "3": "a", "5": "kh", "6": "t", "7": "h", "8": "gh", "9": "s"}
+)
+_HAS_DIGIT = re.compile(r"[0-9]")
+_LATIN_WORD = re.compile(r"\b(?=\w*[a-z])[a-z0-9]+\b")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Strips diacritics and punctuation, folds letter variants and case,
+    maps Arabic digits to ASCII and Arabizi digits to letters,
+    and collapses whitespace.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = _DIACRITICS.sub("", text).replace(_TATWEEL, "")
+    text = text.translate(_LETTER_FOLDS).translate(_DIGITS).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    if _HAS_DIGIT.search(text):
+        text = _LATIN_WORD.sub(lambda m: m.group().translate(_ARABIZI_DIGITS), text)
+    return " ".join(text.split())
@@ -0,0 +1,180 @@
+"""
+asyncio version of the conversation loop in main.py, running the same stages
+(stages.py). Each blocking stage runs in a worker thread and they are awaited one
+after another; the one overlap main.py doesn't have is synthesizing the response
+speech while the tool runs. (Both loops already play the acknowledgement while
+recording, and stream transcription and the tool dispatch within their stages.)
+
+Each cycle is traced as before; with the timeline on, the critical path of
+every cycle is printed when it ends (see tracing.format_timeline).
+"""
+
+import asyncio
+import contextlib
+from collections.abc import Callable
+from concurrent.futures import Future
+
+import stages
+import tracing
+import tts
+from cancellation_token import CancellationToken, CancelledError, submit
+from cues import play_cue
+
+
+class AsyncPipeline:
+    def __init__(
+        self,
+        capture,
+        activator,
+        cancellation_watcher,
+        execute_function: Callable[[str, dict], str],
+    ):
+        self.capture = capture
+        self.activator = activator
+        self.cancellation_watcher = cancellation_watcher
+        self.execute_function = execute_function
+
+    async def _wait(self, token: CancellationToken, future: Future):
+        """
+        Waits for a stage running on the stage pool, or for the token.
+
+        Returns:
+            The stage's result, None if the token was cancelled first.
+        """
+        loop = asyncio.get_running_loop()
+        cancelled = loop.create_future()
+
+        def on_cancel():
+            loop.call_soon_threadsafe(
+                lambda: cancelled.done() or cancelled.set_result(None)
+            )
+
+        wrapped = asyncio.wrap_future(future)
+        remove = token.on_cancel(on_cancel)
+        try:
+            await asyncio.wait(
+                {wrapped, cancelled}, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            remove()
+            cancelled.cancel()
+            # Given up on (token or task cancelled): its outcome is dropped
+            wrapped.cancel()
+
+        if token.cancelled:
+            return None
+        try:
+            return future.result()
+        except CancelledError:
+            return None
+
+    async def _stage(self, token: CancellationToken, func, *args, **kwargs):
+        """Runs a blocking stage with the token, see _wait."""
+        return await self._wait(token, submit(token, func, *args, **kwargs))
+
+    async def run_cycle(self, activation_frame: int | None = None):
+        """
+        One cycle: Record -> Transcribe -> Interpret -> Execute + Synthesize -> Speak
+        Same stages and spans as main.run_conversation_cycle (see stages.py).
+        """
+        watcher = self.cancellation_watcher
+
+        # =============== Record Audio ===============
+        # The acknowledgement plays while recording (see speech_recognizer.record)
+        audio_data, transcriber = await asyncio.to_thread(
+            stages.record, self.capture, activation_frame
+        )
+        if not audio_data:
+            return
+
+        # Start watching for "Insa" now that we are processing
+        watcher.start()
+        token = watcher.token
+        transcription = intent_json = None
+        synthesis: asyncio.Future | None = None
+
+        try:
+            # =============== Transcribe Audio ===============
+            transcription = await asyncio.to_thread(
+                stages.transcribe, token, audio_data, transcriber
+            )
+            if not transcription:
+                return
+
+            # ============== Interpret Intent ===============
+            # The tool starts as soon as it is known, while the speech streams
+            tool = stages.ToolDispatch(token, self.execute_function)
+            intent_json = await asyncio.to_thread(
+                stages.interpret, token, transcription, tool
+            )
+            intent = stages.parse_intent(intent_json)
+            if intent is None:
+                return
+
+            # ====== Synthesize the response while the tool runs ======
+            speech = intent.get("speech", "")
+            synthesis = (
+                asyncio.ensure_future(self._stage(token, tts.synthesize, speech))
+                if speech
+                else None
+            )
+
+            # ============= Execute ===============
+            await asyncio.to_thread(stages.execute, token, tool, intent)
+            if token.cancelled:
+                return
+
+            # ============== Speak the response ===============
+            if synthesis:
+                print(f"🗣️ Jarvis: {speech}")
+                with tracing.span("speak"):
+                    path = await synthesis
+                    if path and not token.cancelled:
+                        await self._stage(token, tts.play, path)
+
+        finally:
+            # Aborted or failed before speaking: don't leave the synthesis behind
+            if synthesis and not synthesis.done():
+                synthesis.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await synthesis
+            if transcription and not token.cancelled:
+                stages.save(audio_data, transcription, intent_json)
+            # Ensure we always stop the watcher (disarms "insa")
+            watcher.stop()
+
+    async def run_forever(self, trigger_key: str):
+        """The main loop: wait for activation, then run a cycle."""
+        tracing.tracer.timeline = True
+
+        while True:
+            try:
+                with tracing.trace("cycle"):
+                    with tracing.span("activation") as span:
+                        trigger_source = await asyncio.to_thread(
+                            self.activator.wait_for_activation, trigger_key
+                        )
+                        span.set(trigger=trigger_source)
+
+                    if trigger_source == "voice":
+                        print("\n[Activated by Voice]")
+                    elif trigger_source == "key":
+                        print("\n[Activated by Key Press]")
+                    else:
+                        print("\n[Unknown Activation]")
+                        continue
+
+                    # Acknowledgement beep
+                    play_cue("ack")
+
+                    await self.run_cycle(self.activator.activation_frame)
+                print("\n Waiting for trigger ...")
+
+                # Small buffer to prevent immediate re-triggering
+                await asyncio.sleep(1.5)
+
+            # Like main.py's loop: keep listening whatever a cycle raised
+            except Exception as e:  # noqa: BLE001
+                print(f"Critical Error in main loop: {e}")
+                # Sleep briefly to avoid infinite error loops
+                await asyncio.sleep(1)
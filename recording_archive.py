@@ -0,0 +1,290 @@
+"""
+Write-behind archive of the recorded commands.
+save_recording only queues the audio (a bounded queue, dropped when full, the
+cycle never waits on the disk); one background thread compresses it to FLAC,
+appends a line to metadata.jsonl (transcript, intent, stage timings) and then
+applies the retention limits, oldest recordings first.
+The readers (vad.py, replay_bench.py, wakeword_eval.py) take FLAC and WAV.
+"""
+
+import io
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import soundfile as sf
+
+RECORDINGS_DIR = "recordings"
+METADATA_FILE = "metadata.jsonl"
+EXTENSIONS = (".flac", ".wav")
+
+# Recordings waiting to be written
+QUEUE_SIZE = 8
+# Retention
+MAX_BYTES = 500 * 1024 * 1024
+MAX_AGE_SECONDS = 30 * 24 * 3600
+
+
+def list_recordings(directory: str, recursive: bool = False) -> list[str]:
+    """Audio files in a directory (FLAC and the older WAV recordings), sorted."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        paths += [
+            os.path.join(root, f) for f in files if f.lower().endswith(EXTENSIONS)
+        ]
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def read_recording(path: str, sample_rate: int = 16000) -> np.ndarray | None:
+    """
+    Reads a recording as int16 mono samples.
+
+    Returns:
+        np.ndarray: The samples, None if the file isn't at the expected rate.
+    """
+    data, rate = sf.read(path, dtype="int16", always_2d=True)
+    if rate != sample_rate:
+        print(f"[!] Skipping {path}: expected {sample_rate // 1000} kHz audio")
+        return None
+    return data[:, 0]
+
+
+def read_metadata(directory: str) -> dict[str, dict]:
+    """Metadata lines of a recordings directory, by file name."""
+    records = {}
+    path = os.path.join(directory, METADATA_FILE)
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                records[record["file"]] = record
+            except (json.JSONDecodeError, KeyError):
+                continue  # A line cut short by a crash
+    return records
+
+
+class RecordingArchive:
+    def __init__(
+        self,
+        directory: str = RECORDINGS_DIR,
+        max_bytes: int = MAX_BYTES,
+        max_age_seconds: float = MAX_AGE_SECONDS,
+        queue_size: int = QUEUE_SIZE,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue: queue.Queue[tuple[str, bytes, dict] | None] = queue.Queue(
+            queue_size
+        )
+        # name -> (mtime, size) of the archived recordings
+        self._files: dict[str, tuple[float, int]] = {}
+        self.total_bytes = 0
+
+        # Stats
+        self.written = 0
+        self.dropped = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _name(self) -> str:
+        """Timestamped and unique, even for several recordings in the same second."""
+        now = datetime.now()
+        return f"recording_{now:%Y%m%d_%H%M%S}_{now.microsecond // 1000:03d}_{uuid.uuid4().hex[:6]}"
+
+    def submit(self, audio_data: bytes, **metadata) -> str | None:
+        """
+        Queues a WAV recording, returns right away.
+
+        Returns:
+            str: File name it will be archived as, None if the queue was full.
+        """
+        name = f"{self._name()}.flac"
+        try:
+            self._queue.put_nowait((name, audio_data, metadata))
+        except queue.Full:
+            self.dropped += 1
+            print("[!] Recording archive is behind, recording dropped")
+            return None
+        return name
+
+    def flush(self):
+        """Waits until everything queued is written."""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            self._scan()
+            self._apply_retention()
+        except (OSError, ValueError) as e:
+            print(f"[!] Error scanning recordings: {e}")
+
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                self._write(*item)
+                self._apply_retention()
+            except (sf.SoundFileError, OSError, ValueError) as e:
+                print(f"[!] Error saving recording: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _scan(self):
+        for path in list_recordings(self.directory):
+            stat = os.stat(path)
+            self._files[os.path.basename(path)] = (stat.st_mtime, stat.st_size)
+            self.total_bytes += stat.st_size
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))  # Interrupted writes
+
+    def _write(self, name: str, audio_data: bytes, metadata: dict):
+        samples, sample_rate = sf.read(io.BytesIO(audio_data), dtype="int16")
+        path = os.path.join(self.directory, name)
+
+        tmp_path = f"{path}.tmp"
+        sf.write(tmp_path, samples, sample_rate, format="FLAC", subtype="PCM_16")
+        os.replace(tmp_path, path)
+
+        size = os.path.getsize(path)
+        self._files[name] = (time.time(), size)
+        self.total_bytes += size
+        self.written += 1
+
+        record = {
+            "file": name,
+            "time": time.time(),
+            "duration": round(len(samples) / sample_rate, 3),
+            "wav_bytes": len(audio_data),
+            "flac_bytes": size,
+            **metadata,
+        }
+        with open(
+            os.path.join(self.directory, METADATA_FILE), "a", encoding="utf-8"
+        ) as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def _apply_retention(self):
+        """Drop recordings past the age limit, then the oldest until under the size limit."""
+        oldest_first = sorted(self._files.items(), key=lambda item: item[1][0])
+        cutoff = time.time() - self.max_age_seconds
+
+        removed = []
+        for name, (mtime, size) in oldest_first:
+            if mtime >= cutoff and self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            del self._files[name]
+            self.total_bytes -= size
+            removed.append(name)
+
+        if removed:
+            self._rewrite_metadata()
+
+    def _rewrite_metadata(self):
+        """Keeps only the lines of recordings that still exist (temp file + rename)."""
+        path = os.path.join(self.directory, METADATA_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+
+        kept = []
+        for line in lines:
+            try:
+                if json.loads(line).get("file") in self._files:
+                    kept.append(line)
+            except json.JSONDecodeError:
+                continue
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(kept)
+        os.replace(tmp_path, path)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "files": len(self._files),
+            "bytes": self.total_bytes,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+
+_archive: RecordingArchive | None = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> RecordingArchive:
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = RecordingArchive()
+    return _archive
+
+
+if __name__ == "__main__":
+    import tempfile
+    import wave
+
+    def to_wav(samples: np.ndarray) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(samples.astype(np.int16).tobytes())
+        return buffer.getvalue()
+
+    # 4 s of speech-like audio: a tone with noise and a quiet tail
+    rng = np.random.default_rng(0)
+    t = np.arange(16000 * 4) / 16000
+    samples = 3000 * np.sin(2 * np.pi * 220 * t) * (t < 3) + rng.normal(0, 50, len(t))
+    audio_data = to_wav(samples)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = RecordingArchive(tmp, max_bytes=10 * len(audio_data) // 3)
+
+        start_time = time.perf_counter()
+        names = [
+            archive.submit(audio_data, transcript=f"command {i}") for i in range(8)
+        ]
+        per_submit = (time.perf_counter() - start_time) / len(names)
+        print(f"Submit: {per_submit * 1e6:.1f} us per recording (cost to the cycle)")
+
+        start_time = time.perf_counter()
+        archive.flush()
+        print(f"Written in the background in {time.perf_counter() - start_time:.2f}s")
+        print(f"Unique names: {len(set(names)) == len(names)}")
+
+        stats = archive.stats()
+        flac_bytes = stats["bytes"] / max(stats["files"], 1)
+        print(
+            f"FLAC {flac_bytes / 1024:.0f} KB vs WAV {len(audio_data) / 1024:.0f} KB per recording"
+        )
+        print(f"Kept under the size limit: {stats}")
+        print(f"Metadata lines: {len(read_metadata(tmp))}")
+        print(f"Read back: {len(read_recording(os.path.join(tmp, names[-1])))} samples")
+        archive.close()
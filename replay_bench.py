@@ -0,0 +1,335 @@
+"""
+End-to-end replay benchmark.
+Feeds recordings (e.g. everything save_recording archived into recordings/)
+through run_conversation_cycle with every external dependency swapped for a
+local stand-in: transcription and chat completions go to the fake Groq server,
+TTS and tool execution sleep for a configurable latency distribution. The
+stand-in transcription returns only the words of the audio it is sent, so
+cycles whose merged transcript isn't the recording's text are reported.
+
+Reports per-stage and total latency percentiles, throughput and peak RSS, and
+can compare against a stored baseline to catch regressions:
+    python replay_bench.py recordings/ --save-baseline bench_baseline.json
+    python replay_bench.py recordings/ --baseline bench_baseline.json
+
+--pipeline picks the sequential loop in main.py or the asyncio pipeline.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+import benchmark_utils
+import tracing
+from cancellation_token import CancellationToken
+from fake_groq import DEFAULT_INTENT, FakeGroqServer
+from recording_archive import list_recordings, read_metadata, read_recording
+
+FRAME_SAMPLES = 1280
+SAMPLE_RATE = 16000
+
+
+class _StubWatcher:
+    """Cancellation watcher that never fires (no microphone in the benchmark)."""
+
+    def __init__(self):
+        self.token = CancellationToken()
+
+    def start(self):
+        self.token = CancellationToken()
+
+    def stop(self):
+        pass
+
+    def was_aborted(self):
+        return self.token.cancelled
+
+
+def load_recordings(directory: str) -> list[dict]:
+    """
+    Loads 16 kHz mono recordings (FLAC or WAV). The transcript the stand-in
+    transcription returns comes from a sidecar <name>.txt, else from the archive's
+    metadata.jsonl, else the file name.
+    """
+    metadata = read_metadata(directory)
+    recordings = []
+    for path in list_recordings(directory):
+        samples = read_recording(path, SAMPLE_RATE)
+        if samples is None:
+            continue
+
+        name = os.path.basename(path)
+        stem = os.path.splitext(path)[0]
+        text = metadata.get(name, {}).get("transcript") or os.path.basename(stem)
+        if os.path.exists(stem + ".txt"):
+            with open(stem + ".txt", "r", encoding="utf-8") as f:
+                text = f.read().strip()
+
+        recordings.append({"name": name, "samples": samples, "text": text})
+    return recordings
+
+
+def _segment_text(recording: dict, audio: bytes) -> str:
+    """
+    The words spoken during a transcribed segment: the words are spread evenly
+    over the loud part of the recording and the segment is located in it, so the
+    segments only add up to the full text if they are cut and merged correctly.
+    """
+    with wave.open(io.BytesIO(audio), "rb") as wf:
+        segment = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    samples = recording["samples"]
+    words = recording["text"].split()
+    if not len(segment) or not words:
+        return ""
+
+    data, needle = samples.tobytes(), segment.tobytes()
+    offset = data.find(needle)
+    while offset > 0 and offset % 2:  # Not aligned on a sample
+        offset = data.find(needle, offset + 1)
+    if offset < 0:
+        return "<segment not in the recording>"
+    start = offset // 2
+    end = start + len(segment)
+
+    level = np.abs(samples.astype(np.int32))
+    loud = np.flatnonzero(level >= 0.1 * level.max())
+    first, last = loud[0], loud[-1] + 1
+    positions = first + (np.arange(len(words)) + 0.5) / len(words) * (last - first)
+    return " ".join(w for w, p in zip(words, positions) if start <= p < end)
+
+
+def _install_stand_ins(args, current: dict, tmp_dir: str):
+    """Swap the pipeline's external dependencies for local stand-ins."""
+    import audio_output
+    import intent_cache
+    import main
+    import speech_recognizer
+    import tts
+    from audio_capture import to_wav
+
+    tts_latency = benchmark_utils.parse_latency(args.tts)
+    playback_latency = benchmark_utils.parse_latency(args.playback)
+    tool_latency = benchmark_utils.parse_latency(args.tool)
+
+    def fake_record(
+        capture,
+        activation_frame=None,
+        preroll_seconds=0.0,
+        on_frame=None,
+        on_ack_end=None,
+    ):
+        # No acknowledgement plays, every frame is the command
+        if on_ack_end:
+            on_ack_end(None)
+        samples = current["samples"]
+        for i in range(0, len(samples), FRAME_SAMPLES):
+            if on_frame:
+                on_frame(samples[i : i + FRAME_SAMPLES])
+            if args.realtime:
+                time.sleep(FRAME_SAMPLES / SAMPLE_RATE)
+        return to_wav(samples)
+
+    def fake_synthesize(text: str) -> str:
+        with tracing.span("tts.synth", chars=len(text)):
+            time.sleep(tts_latency())
+        return "response.wav"
+
+    def fake_play(path: str):
+        with tracing.span("tts.playback"):
+            time.sleep(playback_latency())
+
+    def fake_speak(text: str):
+        fake_play(fake_synthesize(text))
+
+    def fake_execute(function_name: str, args: dict):
+        time.sleep(tool_latency())
+        return "Opened"
+
+    def fake_save_recording(audio_data: bytes, **metadata):
+        # The transcript the cycle ended up with, checked by run()
+        current["transcript"] = metadata.get("transcript")
+
+    speech_recognizer.record = fake_record
+    speech_recognizer.save_recording = fake_save_recording
+    main.speak = fake_speak
+    main.execute_function = fake_execute
+    tts.synthesize = fake_synthesize
+    tts.play = fake_play
+    # Cues play for real, into the void
+    audio_output.set_sink(audio_output.NullSink())
+
+    if args.no_intent_cache:
+        intent_cache.lookup = lambda text: None
+        # Nor write the real cache file
+        intent_cache.store = lambda text, intent_json: None
+    else:
+        intent_cache._cache = intent_cache.IntentCache(
+            path=os.path.join(tmp_dir, "intent_cache.json")
+        )
+    return main
+
+
+def compare(summary: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Stages whose p50/p95 got slower than the baseline by more than the tolerance."""
+    regressions = []
+    for name, old in baseline.get("stages", {}).items():
+        new = summary["stages"].get(name)
+        if not new:
+            continue
+        for q in ("p50", "p95"):
+            # Ignore sub-millisecond noise
+            if new[q] > old[q] * (1 + tolerance) and new[q] - old[q] > 1.0:
+                regressions.append(
+                    f"{name} {q}: {old[q]:.1f} ms -> {new[q]:.1f} ms "
+                    f"(+{(new[q] / old[q] - 1) * 100 if old[q] else float('inf'):.0f}%)"
+                )
+    old_tp, new_tp = baseline.get("throughput"), summary["throughput"]
+    if old_tp and new_tp < old_tp * (1 - tolerance):
+        regressions.append(f"throughput: {old_tp:.2f} -> {new_tp:.2f} cycles/s")
+    return regressions
+
+
+def run(args) -> dict:
+    recordings = load_recordings(args.directory)
+    if not recordings:
+        raise SystemExit(f"No 16 kHz recordings found in {args.directory}")
+
+    current: dict = {}
+
+    def transcriber(audio: bytes, prompt: str) -> str:
+        return _segment_text(current, audio)
+
+    server = FakeGroqServer(
+        responder=lambda messages: args.intent,
+        first_chunk_delay=benchmark_utils.parse_latency(args.llm_first_token),
+        chunk_delay=benchmark_utils.parse_latency(args.llm_chunk_delay),
+        transcriber=transcriber,
+        transcribe_delay=benchmark_utils.parse_latency(args.transcribe),
+        transcribe_per_second=args.transcribe_per_second,
+    ).start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY") or "fake"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        main = _install_stand_ins(args, current, tmp_dir)
+        trace_path = os.path.join(tmp_dir, "traces.jsonl")
+        tracing.tracer = tracing.Tracer(
+            path=trace_path, echo=args.verbose, timeline=args.pipeline == "async"
+        )
+        watcher = _StubWatcher()
+        mismatches: list[str] = []
+
+        def start_replay(recording: dict):
+            current.update(recording, transcript=None)
+
+        def check_transcript():
+            """The merged transcription must give back the recording's text."""
+            if current["transcript"] != current["text"]:
+                mismatches.append(
+                    f"{current['name']}: {current['transcript']!r} != {current['text']!r}"
+                )
+
+        async def replay_async():
+            from pipeline import AsyncPipeline
+
+            async_pipeline = AsyncPipeline(None, None, watcher, main.execute_function)
+            for _ in range(args.repeat):
+                for recording in recordings:
+                    start_replay(recording)
+                    with tracing.trace("cycle", file=recording["name"]):
+                        await async_pipeline.run_cycle(None)
+                    check_transcript()
+
+        start_time = time.perf_counter()
+        if args.pipeline == "async":
+            asyncio.run(replay_async())
+        else:
+            for _ in range(args.repeat):
+                for recording in recordings:
+                    start_replay(recording)
+                    with tracing.trace("cycle", file=recording["name"]):
+                        main.run_conversation_cycle(None, watcher, None)
+                    check_transcript()
+        wall = time.perf_counter() - start_time
+        cycles = args.repeat * len(recordings)
+
+        summary = {
+            "stages": tracing.summarize(trace_path),
+            "cycles": cycles,
+            "throughput": cycles / wall,
+            "transcript_mismatches": mismatches,
+            "peak_rss_mb": benchmark_utils.peak_rss_mb(),
+        }
+        # The cache file lives in the temporary directory
+        main.intent_cache.flush()
+
+    server.stop()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay recordings through the pipeline."
+    )
+    parser.add_argument("directory", nargs="?", default="recordings")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--realtime", action="store_true", help="Pace audio at real time"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Print every cycle")
+    parser.add_argument("--pipeline", choices=["sync", "async"], default="sync")
+
+    latency = parser.add_argument_group(
+        "stand-in latencies (seconds: 0.3, uniform:a,b, normal:mean,sd, lognormal:median,sigma)"
+    )
+    latency.add_argument("--transcribe", default="normal:0.35,0.05")
+    latency.add_argument("--transcribe-per-second", type=float, default=0.03)
+    latency.add_argument("--llm-first-token", default="lognormal:0.25,0.3")
+    latency.add_argument("--llm-chunk-delay", default="0.005")
+    latency.add_argument("--tts", default="normal:0.4,0.1")
+    latency.add_argument("--playback", default="0")
+    latency.add_argument("--tool", default="uniform:0.05,0.2")
+
+    parser.add_argument("--intent", default=DEFAULT_INTENT, help="Stand-in LLM answer")
+    parser.add_argument("--no-intent-cache", action="store_true")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    summary = run(args)
+
+    tracing.print_summary(summary["stages"])
+    print(
+        f"\nCycles: {summary['cycles']}, throughput: {summary['throughput']:.2f} cycles/s"
+    )
+    if summary["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {summary['peak_rss_mb']:.1f} MB")
+    if summary["transcript_mismatches"]:
+        print("\n[!] Transcriptions that don't match the recording's text:")
+        for line in summary["transcript_mismatches"]:
+            print(f" - {line}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args.tolerance)
+        if regressions:
+            print("\n[!] Regressions against the baseline:")
+            for line in regressions:
+                print(f" - {line}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
@@ -1,95 +1,202 @@
-import os
+import contextvars
+import sys
+import threading
 import time
-from datetime import datetime
+from collections.abc import Callable
 
-import speech_recognition as sr
+import numpy as np
 from dotenv import load_dotenv
-from groq import Groq
 
-from constants import KEYWORDS, play_sound_async  # noqa: F401
+from audio_capture import (
+    FRAME_SAMPLES,
+    SAMPLE_RATE,
+    MicrophoneCapture,
+    to_wav,
+)
+from cancellation_token import current_token
+from clients import get_client
+from constants import ACK_PHRASE, PREROLL_SECONDS
+from recording_archive import get_archive
 from tts import speak
+from vad import Endpointer
 from volume_control import VolumeMuter
 
 load_dotenv()
 
-
-def record() -> bytes | None:
+# Give up if nothing is said within this long after activation
+NO_SPEECH_TIMEOUT = 6.0
+# Hard cap on a single command
+MAX_RECORD_SECONDS = 20.0
+# Audio kept around the detected speech
+LEAD_SECONDS = 0.3
+TRAIL_SECONDS = 0.2
+
+TRANSCRIPTION_PROMPT = (
+    "This is a conversation in Syrian Arabic (Levantine) mixed with English technical terms. "
+    "Do not translate technical terms. Write technical terms in Latin script. "
+    "These are some terms the user might use:"
+    "3mel Search عميل سيرش, Fta7 فتاح, Shaghil شغل, Saakker سكر"
+)
+# Whisper only looks at the end of long prompts, keep the carried text short
+MAX_CONTEXT_CHARS = 200
+
+
+def record(
+    capture: MicrophoneCapture,
+    activation_frame: int | None = None,
+    preroll_seconds: float = PREROLL_SECONDS,
+    on_frame: Callable[[np.ndarray], None] | None = None,
+    on_ack_end: Callable[[float | None], None] | None = None,
+) -> bytes | None:
     """
+    Records a command, starting from the moment of activation and ending as soon
+    as the endpointer hears the end of speech.
+    The acknowledgement plays concurrently instead of delaying the recording.
+
+    Args:
+        capture (MicrophoneCapture): The shared microphone stream to record from.
+        activation_frame (int | None): Capture frame index of the activation,
+            defaults to the current frame.
+        preroll_seconds (float): Audio from before the activation that the
+            lead-in before the speech may reach into.
+        on_frame (Callable | None): Called with every frame recorded after the
+            acknowledgement, as it arrives (e.g. StreamingTranscriber.feed).
+        on_ack_end (Callable | None): Called once the acknowledgement has finished,
+            before the first on_frame, with the noise floor heard so far
+            (e.g. StreamingTranscriber.set_noise_floor).
     Returns:
         bytes: The audio data of the recording.
     """
-    # Record speech using speechrecognition library
-    try:
-        recognizer = sr.Recognizer()
-
-        # How long of a pause indicates the end of a sentence
-        recognizer.pause_threshold = 1.3
-        # Minimum audio energy to consider for recording
-        recognizer.energy_threshold = 500
-
-        recognizer.dynamic_energy_threshold = False  # Faster startup
+    if activation_frame is None:
+        activation_frame = capture.frame_index
+
+    # A short pre-roll, only used as lead-in when the speech starts right at
+    # the activation (longer would bring back the wake word)
+    preroll_frames = int(preroll_seconds * SAMPLE_RATE / FRAME_SAMPLES)
+    preroll = capture.get_frames(activation_frame - preroll_frames, activation_frame)
+
+    # Mute the PC only once the acknowledgement has finished playing
+    muter = VolumeMuter()
+    muted = threading.Event()
+
+    def acknowledge():
+        try:
+            speak(ACK_PHRASE)
+        finally:
+            muter.__enter__()
+            muted.set()
+
+    # Run in a copy of the current context so its spans land in this trace
+    ack_thread = threading.Thread(
+        target=contextvars.copy_context().run, args=(acknowledge,), daemon=True
+    )
 
-        # higher sample rate for better quality
-        with sr.Microphone(sample_rate=16000) as source:
-            speak("Yes sir.")
+    try:
+        endpointer = Endpointer()
+        # The acknowledgement may be picked up as speech: once it has finished the
+        # endpointer starts over, from this sample of the recording
+        ack_end: int | None = None
+        ack_endpointer = endpointer
+        frames: list[np.ndarray] = []
+        max_frames = int(MAX_RECORD_SECONDS * SAMPLE_RATE / FRAME_SAMPLES)
+        no_speech_frames = int(NO_SPEECH_TIMEOUT * SAMPLE_RATE / FRAME_SAMPLES)
+
+        with capture.subscribe(start_frame=activation_frame) as subscription:
+            ack_thread.start()
             print("Please speak now...")
             # Play a sound to indicate recording started
-            # play_sound_async(1000, 200)
-            with VolumeMuter():
-                audio_data = recognizer.listen(source)
-                wav_data = audio_data.get_wav_data()
-                print("Recording finished")
-
-        return wav_data
+            # play_cue("listening")
+            while len(frames) < max_frames:
+                frame = subscription.read(timeout=1.0)
+                if frame is None:
+                    raise RuntimeError("Microphone stopped delivering audio")
+                if ack_end is None and muted.is_set():
+                    ack_end = len(frames) * FRAME_SAMPLES
+                    endpointer = Endpointer()
+                    endpointer.noise_floor = ack_endpointer.noise_floor
+                    if on_ack_end:
+                        on_ack_end(endpointer.noise_floor)
+                frames.append(frame)
+                # The wake word and the acknowledgement aren't transcribed
+                if on_frame and ack_end is not None:
+                    on_frame(frame)
+
+                # Only the endpointer that started after the acknowledgement
+                # can end the command
+                if endpointer.process(frame) and ack_end is not None:
+                    break
+                if not endpointer.speech_detected and len(frames) >= no_speech_frames:
+                    break
+            print("Recording finished")
+
+        if not endpointer.speech_detected:
+            print("No speech detected")
+            return None
+
+        offset = ack_end or 0
+        speech_start = offset + endpointer.speech_start_sample
+        if ack_end and endpointer.speech_start_sample == 0:
+            # Already speaking when the acknowledgement ended, keep the words
+            # said over it
+            speech_start = ack_endpointer.speech_start_sample
+
+        # Drop the silence before the speech and most of the hangover after it.
+        # The pre-roll and the recording are one continuous buffer
+        audio = np.concatenate([preroll, *frames])
+        speech_start += len(preroll)
+        speech_end = len(preroll) + offset + endpointer.speech_end_sample
+        start = max(0, speech_start - int(LEAD_SECONDS * SAMPLE_RATE))
+        end = speech_end + int(TRAIL_SECONDS * SAMPLE_RATE)
+        return to_wav(audio[start:end])
     except Exception as e:
         print(f"Error during recording: {e}")
         return None
+    finally:
+        if ack_thread.ident is not None:
+            ack_thread.join()
+        if muted.is_set():
+            muter.__exit__(None, None, None)
 
 
-def save_recording(audio_data: bytes) -> str | None:
+def save_recording(audio_data: bytes, **metadata) -> str | None:
     """
-    Saves the audio data to a file.
+    Queues the audio data for the recording archive (written in the background).
 
     Args:
         audio_data (bytes): The audio data to save.
+        **metadata: Stored next to the recording (transcript, intent, timings).
 
     Returns:
-        str: The filename where the audio was saved.
+        str: The file name the recording is archived as, None if it was dropped.
     """
     try:
-        os.makedirs("recordings", exist_ok=True)
-        filename = (
-            f"recordings/recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
-        )
-        with open(filename, "wb") as f:
-            f.write(audio_data)
-        print("Recording saved")
-        return filename
+        return get_archive().submit(audio_data, **metadata)
     except Exception as e:
         print(f"Error saving recording: {e}")
         return None
 
 
-def transcribe(audio_data: bytes) -> str | None:
+def transcribe(audio_data: bytes, context: str | None = None) -> str | None:
     """
     Args:
         audio_data (bytes): The audio data to transcribe.
+        context (str | None): Text said just before this audio (earlier segments),
+            added to the prompt so the transcription continues it.
     Returns:
         str: Transcribed text from the audio data.
     """
     if not audio_data:
         print("Error: No audio data provided for transcription.")
         return None
+    if current_token().cancelled:
+        return None
 
     # Transcribe the recorded audio using Groq API
     try:
-        client = Groq()
-        system_prompt: str = (
-            "This is a conversation in Syrian Arabic (Levantine) mixed with English technical terms. "
-            "Do not translate technical terms. Write technical terms in Latin script. "
-            "These are some terms the user might use:"
-            "3mel Search عميل سيرش, Fta7 فتاح, Shaghil شغل, Saakker سكر"
-        )
+        client = get_client()
+        system_prompt = TRANSCRIPTION_PROMPT
+        if context:
+            system_prompt += " " + context[-MAX_CONTEXT_CHARS:]
         transcription = client.audio.transcriptions.create(
             file=("recording.wav", audio_data),
             model="whisper-large-v3",
@@ -105,9 +212,11 @@ def transcribe(audio_data: bytes) -> str | None:
 
 
 if __name__ == "__main__":
-    audio_data = record()
+    capture = MicrophoneCapture()
+    capture.start()
+    audio_data = record(capture)
     if not audio_data:
-        exit(1)
+        sys.exit(1)
 
     start_time = time.perf_counter()
     transcription = transcribe(audio_data)  # type: ignore
@@ -115,10 +224,11 @@ if __name__ == "__main__":
     print("Transcription:")
     print(transcription)
 
-    save_recording(audio_data)  # type: ignore
+    save_recording(audio_data, transcript=transcription)  # type: ignore
+    get_archive().flush()
 
     with open("test.txt", "w", encoding="utf-8") as f:
         f.write(transcription or "")
 
     if not transcription:
-        exit(1)
+        sys.exit(1)
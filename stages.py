@@ -0,0 +1,198 @@
+"""
+Stages of a conversation cycle, shared by the sequential loop in main.py and the
+asyncio pipeline in pipeline.py. Each stage is blocking, opens its span of the
+current trace and gives up (returns None) once the cycle's token is cancelled.
+"""
+
+import json
+from collections.abc import Callable
+from concurrent.futures import Future
+
+import clients
+import intent_cache
+import speech_recognizer
+import tracing
+from cancellation_token import CancellationToken, run_cancellable, submit, wait_for
+from constants import LLM_MODEL, STREAM_INTENT, STREAM_TRANSCRIPTION
+from cues import play_cue
+from fast_intent import match_intent, match_stats
+from llm import interpret_intent, interpret_intent_stream
+from streaming_transcription import StreamingTranscriber
+
+
+def record(
+    capture, activation_frame: int | None = None
+) -> tuple[bytes | None, StreamingTranscriber | None]:
+    """
+    Records the command.
+
+    Returns:
+        tuple: (audio data, the streaming transcriber fed while recording)
+    """
+    with tracing.span("record") as span:
+        # Open the API connection while the user is still speaking
+        clients.prewarm()
+
+        # Segments are transcribed at pauses while the user is still speaking
+        transcriber = StreamingTranscriber() if STREAM_TRANSCRIPTION else None
+
+        # The acknowledgement plays while recording, the PC is muted once it is done
+        audio_data = speech_recognizer.record(
+            capture,
+            activation_frame,
+            on_frame=transcriber.feed if transcriber else None,
+            on_ack_end=transcriber.set_noise_floor if transcriber else None,
+        )
+        span.set(bytes=len(audio_data or b""))
+
+    if not audio_data and transcriber:
+        transcriber.cancel()
+        transcriber = None
+    return audio_data, transcriber
+
+
+def transcribe(
+    token: CancellationToken,
+    audio_data: bytes,
+    transcriber: StreamingTranscriber | None = None,
+) -> str | None:
+    if transcriber:
+        # Drop the segments still queued on abort
+        token.on_cancel(transcriber.cancel)
+
+    with tracing.span("transcribe", streaming=bool(transcriber)) as span:
+        if transcriber:
+            # Only the last segment should still be in flight
+            transcription = run_cancellable(transcriber.finish, token)
+            span.set(segments=transcriber.segments_sent)
+        else:
+            transcription = run_cancellable(
+                speech_recognizer.transcribe, token, audio_data
+            )
+        span.set(chars=len(transcription or ""))
+
+    if token.cancelled or not transcription:
+        return None
+    print(f"\n User said: {transcription}")
+    return transcription
+
+
+class ToolDispatch:
+    """
+    Starts the tool once: as soon as the streamed intent names it, or else
+    when the execute stage gets to it.
+    """
+
+    def __init__(
+        self, token: CancellationToken, execute_function: Callable[[str, dict], str]
+    ):
+        self.token = token
+        self.execute_function = execute_function
+        self.future: Future | None = None
+
+    def __call__(self, tool_name: str, parameters: dict):
+        if self.future is not None or self.token.cancelled:
+            return
+        if not tool_name or tool_name.lower() == "none":
+            return
+        print(f"Executing: {tool_name} with {parameters}")
+        self.future = submit(self.token, self.execute_function, tool_name, parameters)
+
+
+def interpret(
+    token: CancellationToken, transcription: str, tool: ToolDispatch
+) -> str | None:
+    """
+    Common commands are resolved locally, then previously seen transcriptions
+    come from the cache, everything else goes to the LLM.
+
+    Returns:
+        str: The intent JSON.
+    """
+    with tracing.span("interpret") as span:
+        intent_json = match_intent(transcription)
+        if intent_json:
+            span.set(source="fast_path")
+        else:
+            intent_json = intent_cache.lookup(transcription)
+            if intent_json:
+                span.set(source="cache")
+            elif STREAM_INTENT:
+                span.set(source="llm", model=LLM_MODEL, stream=True)
+                intent_json = run_cancellable(
+                    interpret_intent_stream, token, transcription, on_tool=tool
+                )
+            else:
+                span.set(source="llm", model=LLM_MODEL, stream=False)
+                intent_json = run_cancellable(interpret_intent, token, transcription)
+
+            if intent_json and not token.cancelled:
+                intent_cache.store(transcription, intent_json)
+
+        cache_stats = intent_cache.stats()
+        span.set(
+            early_dispatch=tool.future is not None,
+            fast_path=match_stats(),
+            intent_cache=cache_stats,
+        )
+        # Shown next to the stage's time in the cycle's summary
+        if span.attributes.get("source") == "fast_path":
+            span.set(summary="fast path")
+        else:
+            cache = "hit" if span.attributes.get("source") == "cache" else "miss"
+            span.set(summary=f"cache={cache}, hit rate {cache_stats['hit_rate']:.0%}")
+
+    if token.cancelled:
+        return None
+    print(f"Intent: {intent_json}")
+    return intent_json
+
+
+def parse_intent(intent_json: str | None) -> dict | None:
+    if not intent_json:
+        return None
+    try:
+        return json.loads(intent_json)
+    except json.JSONDecodeError:
+        print("Error: Failed to parse the intent JSON.")
+        play_cue("error")
+        return None
+
+
+def execute(token: CancellationToken, tool: ToolDispatch, intent: dict) -> str | None:
+    """
+    Runs the intent's tool (or waits for the one already dispatched) and plays
+    the success or error cue.
+
+    Returns:
+        str: The tool's result, None if there was no tool or the cycle was aborted.
+    """
+    tool_name = intent.get("tool")
+    if not tool_name or tool_name.lower() == "none":
+        print("No applicable tool found for the request.")
+        play_cue("error")
+        return None
+
+    with tracing.span("execute", tool=tool_name) as span:
+        tool(tool_name, intent.get("parameters", {}))
+        result = wait_for(tool.future, token) if tool.future else None
+        span.set(result=result)
+
+    if token.cancelled:
+        return None
+    print(f"Result: {result}")
+
+    # Play a success sound (Low-High)
+    play_cue("success")
+    return result
+
+
+def save(audio_data: bytes, transcription: str, intent_json: str | None):
+    """Archives the recording (written by the archive's thread)."""
+    speech_recognizer.save_recording(
+        audio_data,
+        transcript=transcription,
+        intent=intent_json,
+        timings=tracing.stage_timings(),
+    )
+    tracing.set_attributes(api_connections=clients.connection_stats())
@@ -0,0 +1,170 @@
+"""
+Transcription that runs while the user is still speaking.
+Audio is cut into segments at short pauses and each segment is sent as soon as
+it closes, carrying the text so far as the prompt for the next one. When speech
+ends only the last short segment is still outstanding.
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+from audio_capture import SAMPLE_RATE, to_wav
+from speech_recognizer import LEAD_SECONDS, TRAIL_SECONDS, transcribe
+from vad import Endpointer
+
+# A pause this long closes the current segment
+SEGMENT_PAUSE_SECONDS = 0.25
+# Shorter segments are merged into the next one (Whisper does badly on tiny clips)
+MIN_SEGMENT_SECONDS = 1.0
+
+
+class StreamingTranscriber:
+    """
+    Feed it every recorded frame in order, then call finish() for the full text.
+    Segments are transcribed one at a time, in order, on a background thread.
+    """
+
+    def __init__(self, transcribe_func=transcribe):
+        self._transcribe = transcribe_func
+        self._endpointer = Endpointer(hangover_seconds=SEGMENT_PAUSE_SECONDS)
+
+        self._chunks: list[np.ndarray] = []
+        self._position = 0  # Samples fed so far
+        self._buffer_start = 0  # Sample position of self._chunks[0]
+        self._cut = 0  # End of the last segment sent
+
+        self._texts: list[str] = []
+        self._queue: queue.Queue[bytes | None] = queue.Queue()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+
+        # Stats
+        self.segments_sent = 0
+
+    def _work(self):
+        while True:
+            wav = self._queue.get()
+            if wav is None:
+                break
+            text = self._transcribe(wav, " ".join(self._texts) or None)
+            if text:
+                self._texts.append(text.strip())
+
+    def set_noise_floor(self, noise_floor: float | None):
+        """Start from the room's noise floor (heard before the first frame)."""
+        self._endpointer.noise_floor = noise_floor
+
+    def feed(self, frame: np.ndarray):
+        """Add the next frame of audio; closes a segment at a pause."""
+        self._chunks.append(frame)
+        self._position += len(frame)
+        self._endpointer.process(frame)
+
+        endpointer = self._endpointer
+        if (
+            endpointer.speech_end_sample > self._cut
+            and endpointer.silence_seconds >= SEGMENT_PAUSE_SECONDS
+            and self._position - self._cut >= MIN_SEGMENT_SECONDS * SAMPLE_RATE
+        ):
+            self._send(self._position)
+
+    def _send(self, end: int):
+        audio = np.concatenate(self._chunks)
+
+        start = self._cut
+        if self.segments_sent == 0:
+            # Drop the silence before the first speech
+            lead = int(LEAD_SECONDS * SAMPLE_RATE)
+            start = max(start, self._endpointer.speech_start_sample - lead)
+
+        segment = audio[start - self._buffer_start : end - self._buffer_start]
+        remainder = audio[end - self._buffer_start :]
+        self._chunks = [remainder] if len(remainder) else []
+        self._buffer_start = end
+        self._cut = end
+
+        self._queue.put(to_wav(segment))
+        self.segments_sent += 1
+
+    def finish(self) -> str | None:
+        """
+        Sends whatever speech is left and waits for all segments.
+
+        Returns:
+            str: The merged transcription.
+        """
+        endpointer = self._endpointer
+        if endpointer.speech_end_sample > self._cut:
+            end = endpointer.speech_end_sample + int(TRAIL_SECONDS * SAMPLE_RATE)
+            self._send(min(end, self._position))
+
+        self._queue.put(None)
+        self._worker.join()
+        return " ".join(self._texts) or None
+
+    def cancel(self):
+        """Drop pending segments and stop the worker (it finishes the current one)."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(None)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from fake_groq import FakeGroqServer
+    from recording_archive import list_recordings, read_recording
+
+    parser = argparse.ArgumentParser(
+        description="Compare batch and streaming transcription latency on saved recordings, "
+        "against the local stand-in transcription endpoint."
+    )
+    parser.add_argument("directory", nargs="?", default="recordings")
+    parser.add_argument(
+        "--base-delay", type=float, default=0.3, help="Seconds per request"
+    )
+    parser.add_argument(
+        "--per-second", type=float, default=0.15, help="Seconds per second of audio"
+    )
+    parser.add_argument("--limit", type=int, default=10, help="Max files to replay")
+    args = parser.parse_args()
+
+    with FakeGroqServer(
+        transcribe_delay=args.base_delay, transcribe_per_second=args.per_second
+    ) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        os.environ.setdefault("GROQ_API_KEY", "fake")
+
+        paths = list_recordings(args.directory)[: args.limit]
+        for path in paths:
+            samples = read_recording(path, SAMPLE_RATE)
+            if samples is None:
+                continue
+
+            # Batch: everything is sent once the recording is done
+            start_time = time.perf_counter()
+            transcribe(to_wav(samples))
+            batch = time.perf_counter() - start_time
+
+            # Streaming: replay in real time, then only the tail is outstanding
+            transcriber = StreamingTranscriber()
+            frame_seconds = 1280 / SAMPLE_RATE
+            for i in range(0, len(samples), 1280):
+                transcriber.feed(samples[i : i + 1280])
+                time.sleep(frame_seconds)
+            start_time = time.perf_counter()
+            transcriber.finish()
+            streaming = time.perf_counter() - start_time
+
+            print(
+                f"{os.path.basename(path):40} batch {batch * 1000:5.0f} ms  "
+                f"streaming {streaming * 1000:5.0f} ms  "
+                f"({transcriber.segments_sent} segments)"
+            )
@@ -0,0 +1,90 @@
+"""
+Application lookups in the in-memory index, with a fixture enumerator.
+    python -m unittest test_app_index
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tools.app_index import AppIndex, desktop_entry_apps, fixture_apps
+
+APPS = [
+    ["Spotify", "SpotifyAB.Spotify"],
+    ["Visual Studio Code", "Microsoft.VisualStudioCode"],
+    ["Visual Studio Installer", "Microsoft.VisualStudio.Installer"],
+    ["Microsoft Edge", "MSEdge"],
+    ["Settings", "windows.immersivecontrolpanel"],
+]
+
+
+class LookupTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        fixture = os.path.join(self.tmp, "apps.json")
+        with open(fixture, "w", encoding="utf-8") as f:
+            json.dump(APPS, f)
+        self.path = os.path.join(self.tmp, "app_index.json")
+        self.index = AppIndex(fixture_apps(fixture), path=self.path)
+        self.assertTrue(self.index.refresh())
+
+    def test_exact_normalized_name(self):
+        self.assertEqual(self.index.lookup("spotify!"), tuple(APPS[0]))
+
+    def test_shortest_name_containing_the_query(self):
+        self.assertEqual(self.index.lookup("visual studio"), tuple(APPS[1]))
+
+    def test_word_start_is_preferred(self):
+        self.assertEqual(self.index.lookup("edge"), tuple(APPS[3]))
+
+    def test_miss(self):
+        self.assertIsNone(self.index.lookup("nonexistent"))
+        self.assertIsNone(self.index.lookup("?!"))
+
+    def test_reloaded_from_disk(self):
+        reloaded = AppIndex(list, path=self.path)
+        self.assertEqual(len(reloaded), len(APPS))
+        self.assertEqual(reloaded.lookup("settings"), tuple(APPS[4]))
+
+    def test_failing_enumerator_keeps_the_index(self):
+        def fail():
+            raise OSError("no Start menu")
+
+        self.index.enumerate_apps = fail
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertFalse(self.index.refresh())
+        self.assertEqual(self.index.lookup("spotify"), tuple(APPS[0]))
+
+
+class DesktopEntryTest(unittest.TestCase):
+    def test_unreadable_and_hidden_entries_are_skipped(self):
+        user, system = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, user)
+        self.addCleanup(shutil.rmtree, system)
+        entry = "[Desktop Entry]\n"
+        entries = {
+            (user, "firefox.desktop"): entry + "Name=Firefox (mine)\n",
+            (system, "firefox.desktop"): entry + "Name=Firefox\n",
+            (system, "gimp.desktop"): entry + "Name=GIMP\nType=Application\n",
+            (system, "hidden.desktop"): entry + "Name=Hidden\nNoDisplay=true\n",
+            (system, "link.desktop"): entry + "Name=Link\nType=Link\n",
+            (system, "no_section.desktop"): "[Other]\nName=Other\n",
+            (system, "garbage.desktop"): "not an ini file\n",
+        }
+        for (directory, name), text in entries.items():
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                f.write(text)
+
+        self.assertEqual(
+            sorted(desktop_entry_apps([user, system])),
+            [("Firefox (mine)", "firefox.desktop"), ("GIMP", "gimp.desktop")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Mixing voices in the playback engine, with a sink in place of the sound card.
+    python -m unittest test_audio_output
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+from audio_output import BLOCK_SAMPLES, SAMPLE_RATE, NullSink, PlaybackEngine
+
+
+class RecordingSink(NullSink):
+    """Keeps every block written."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocks = []
+
+    def write(self, block: np.ndarray):
+        super().write(block)
+        self.blocks.append(block.copy())
+
+    def audio(self) -> np.ndarray:
+        return np.concatenate(self.blocks) if self.blocks else np.zeros(0)
+
+
+class MixerTest(unittest.TestCase):
+    def setUp(self):
+        self.sink = RecordingSink()
+        self.engine = PlaybackEngine(self.sink)
+        self.engine.start()
+        self.addCleanup(self.engine.stop)
+
+    def test_overlapping_voices_are_summed(self):
+        samples = np.full(BLOCK_SAMPLES * 4, 0.25, dtype=np.float32)
+        first = self.engine.play(samples)
+        second = self.engine.play(samples)
+        self.assertTrue(first.wait(5) and second.wait(5))
+
+        audio = self.sink.audio()
+        self.assertAlmostEqual(audio.max(), 0.5)
+        # Played together, not one after the other
+        self.assertLess(np.count_nonzero(audio), len(samples) * 2)
+
+    def test_mix_is_clipped(self):
+        playbacks = [self.engine.play(np.full(BLOCK_SAMPLES, 0.6)) for _ in range(3)]
+        for playback in playbacks:
+            self.assertTrue(playback.wait(5))
+        self.assertLessEqual(self.sink.audio().max(), 1.0)
+
+    def test_other_rates_are_resampled(self):
+        playback = self.engine.play(np.full(SAMPLE_RATE // 4, 0.1), SAMPLE_RATE // 2)
+        self.assertTrue(playback.wait(5))
+        self.assertAlmostEqual(
+            np.count_nonzero(self.sink.audio()), SAMPLE_RATE // 2, delta=BLOCK_SAMPLES
+        )
+
+    def test_stream_plays_what_is_appended(self):
+        playback = self.engine.stream()
+        for _ in range(3):
+            playback.append(np.full(BLOCK_SAMPLES, 0.1))
+        self.assertFalse(playback.wait(0.1))  # Waits for more until closed
+        playback.close()
+        self.assertTrue(playback.wait(5))
+        self.assertEqual(np.count_nonzero(self.sink.audio()), BLOCK_SAMPLES * 3)
+
+    def test_stop(self):
+        self.sink.realtime = True
+        playback = self.engine.play(np.full(SAMPLE_RATE * 60, 0.1))
+        playback.started.wait(5)
+        playback.stop()
+        self.assertTrue(playback.wait(5))
+        self.assertLess(self.sink.samples_written, SAMPLE_RATE * 5)
+        playback.append(np.full(BLOCK_SAMPLES, 0.1))  # Ignored once stopped
+        self.assertFalse(playback.extend(np.full(BLOCK_SAMPLES, 0.1)))
+
+    def test_extend_queues_after_the_playback(self):
+        self.sink.realtime = True
+        first = np.full(BLOCK_SAMPLES * 10, 0.1)
+        playback = self.engine.play(first)
+        self.assertTrue(playback.extend(np.full(BLOCK_SAMPLES, 0.2)))
+        self.assertTrue(playback.wait(5))
+        self.assertFalse(playback.extend(first))  # Played out
+
+        audio = self.sink.audio()
+        expected = np.concatenate([first, np.full(BLOCK_SAMPLES, 0.2)])
+        self.assertTrue(np.allclose(audio[audio > 0], expected))
+
+
+class ClipCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def clip(self, name: str, seconds: float) -> str:
+        path = os.path.join(self.tmp, name)
+        sf.write(path, np.full(int(SAMPLE_RATE * seconds), 0.1), SAMPLE_RATE)
+        return path
+
+    def test_least_recently_used_clip_is_dropped(self):
+        one_second = SAMPLE_RATE * 4  # float32 bytes
+        engine = PlaybackEngine(NullSink(), clip_cache_bytes=int(one_second * 2.5))
+        first, second, third = (self.clip(f"{i}.wav", 1) for i in range(3))
+
+        engine.preload(first)
+        engine.preload(second)
+        engine.preload(first)  # Now the most recent
+        engine.preload(third)
+        self.assertEqual((engine.clips.hits, engine.clips.misses), (1, 3))
+        self.assertLessEqual(engine.clips.bytes, engine.clips.max_bytes)
+
+        engine.preload(first)
+        engine.preload(second)  # Was dropped
+        self.assertEqual((engine.clips.hits, engine.clips.misses), (2, 4))
+
+    def test_clip_larger_than_the_cap_is_not_kept(self):
+        engine = PlaybackEngine(NullSink(), clip_cache_bytes=1024)
+        engine.preload(self.clip("long.wav", 1))
+        self.assertEqual(engine.clips.bytes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
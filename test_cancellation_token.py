@@ -0,0 +1,103 @@
+"""
+Cancelling stages through a token.
+    python -m unittest test_cancellation_token
+"""
+
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+from cancellation_token import (
+    CancellationToken,
+    CancelledError,
+    current_token,
+    run_cancellable,
+    run_process,
+    run_with_token,
+)
+
+SLEEP_30 = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+class TokenTest(unittest.TestCase):
+    def test_callbacks_run_once(self):
+        token = CancellationToken()
+        calls = []
+        token.on_cancel(lambda: calls.append(1))
+        token.cancel()
+        token.cancel()
+        self.assertEqual(calls, [1])
+        self.assertTrue(token.cancelled)
+
+    def test_callback_runs_right_away_once_cancelled(self):
+        token = CancellationToken()
+        token.cancel()
+        calls = []
+        token.on_cancel(lambda: calls.append(1))
+        self.assertEqual(calls, [1])
+
+    def test_removed_callback_does_not_run(self):
+        token = CancellationToken()
+        calls = []
+        remove = token.on_cancel(lambda: calls.append(1))
+        remove()
+        token.cancel()
+        self.assertEqual(calls, [])
+
+    def test_current_token(self):
+        token = CancellationToken()
+        self.assertIs(run_with_token(token, current_token), token)
+        self.assertIsNot(current_token(), token)
+        self.assertIs(run_cancellable(current_token, token), token)
+
+
+class RunProcessTest(unittest.TestCase):
+    def test_output(self):
+        result = run_process(
+            [sys.executable, "-c", "print('ok')"], capture_output=True, text=True
+        )
+        self.assertEqual(result.stdout.strip(), "ok")
+
+    def test_check(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            run_process([sys.executable, "-c", "raise SystemExit(3)"], check=True)
+
+    def test_not_started_once_cancelled(self):
+        token = CancellationToken()
+        token.cancel()
+        with self.assertRaises(CancelledError):
+            run_with_token(token, run_process, SLEEP_30)
+
+    def test_child_is_killed_on_cancel(self):
+        processes = []
+        popen = subprocess.Popen
+
+        def recording_popen(*args, **kwargs):
+            processes.append(popen(*args, **kwargs))
+            return processes[-1]
+
+        finished = threading.Event()
+
+        def stage():
+            try:
+                run_process(SLEEP_30)
+            finally:
+                finished.set()
+
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+        with mock.patch.object(subprocess, "Popen", side_effect=recording_popen):
+            start_time = time.perf_counter()
+            self.assertIsNone(run_cancellable(stage, token))
+            self.assertLess(time.perf_counter() - start_time, 5)
+            self.assertTrue(finished.wait(5))
+
+        self.assertEqual(len(processes), 1)
+        self.assertIsNotNone(processes[0].poll())  # Killed, not left running
+
+
+if __name__ == "__main__":
+    unittest.main()
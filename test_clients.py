@@ -0,0 +1,53 @@
+"""
+Connection reuse of the shared Groq client, against the local stand-in.
+    python -m unittest test_clients
+"""
+
+import os
+import unittest
+from unittest import mock
+
+import clients
+from fake_groq import FakeGroqServer
+
+
+class SharedClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeGroqServer(first_chunk_delay=0, chunk_delay=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+        environ = {"GROQ_BASE_URL": self.server.base_url, "GROQ_API_KEY": "fake"}
+        patcher = mock.patch.dict(os.environ, environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        clients.close()  # Picks up the stand-in's URL
+        self.addCleanup(clients.close)
+
+    def complete(self):
+        clients.get_client().chat.completions.create(
+            model="fake-model", messages=[{"role": "user", "content": "hi"}]
+        )
+
+    def test_one_client_for_the_session(self):
+        self.assertIs(clients.get_client(), clients.get_client())
+
+    def test_calls_reuse_one_connection(self):
+        for _ in range(5):
+            self.complete()
+        stats = clients.connection_stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["new_connections"], 1)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_prewarm_opens_the_connection_ahead(self):
+        clients.prewarm()
+        clients._prewarm_thread.join(5)
+        self.complete()
+        stats = clients.connection_stats()
+        self.assertEqual((stats["requests"], stats["reused"]), (2, 1))
+        self.assertEqual(self.server.connections, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Local fast path for common commands.
+    python -m unittest test_fast_intent
+"""
+
+import json
+import unittest
+
+from fast_intent import FastIntentMatcher
+
+
+class MatchTest(unittest.TestCase):
+    def setUp(self):
+        self.matcher = FastIntentMatcher()
+
+    def intent(self, text: str) -> tuple[str, dict] | None:
+        intent_json = self.matcher.match(text)
+        if intent_json is None:
+            return None
+        intent = json.loads(intent_json)
+        self.assertTrue(intent["speech"])
+        return intent["tool"], intent["parameters"]
+
+    def test_arabizi_arabic_and_english(self):
+        spotify = ("open_application", {"app_name": "Spotify"})
+        for text in ("fta7 spotify", "Fta7 Spotify.", "افتح سبوتيفاي", "open spotify"):
+            self.assertEqual(self.intent(text), spotify, text)
+
+    def test_fillers_and_attached_article(self):
+        discord = ("open_application", {"app_name": "Discord"})
+        self.assertEqual(self.intent("jarvis please open discord"), discord)
+        self.assertEqual(self.intent("افتحلي الديسكورد"), discord)
+
+    def test_multi_word_alias(self):
+        self.assertEqual(
+            self.intent("open vs code"),
+            ("open_application", {"app_name": "Visual Studio Code"}),
+        )
+
+    def test_press_verbs_only_press_keys(self):
+        self.assertEqual(
+            self.intent("اضغط انتر"), ("press_keyboard_key", {"key": "enter"})
+        )
+        self.assertIsNone(self.intent("press spotify"))
+        self.assertIsNone(self.intent("open enter"))
+
+    def test_left_to_the_llm(self):
+        for text in (
+            "spotify",  # No verb
+            "مرحبا كيفك؟ افتح لي Spotify.",  # More than a command
+            "ابحث عن طقس دمشق",  # Unknown verb
+            "open university",  # Ambiguous keyword
+            "open spotify and discord and brave",  # Too long
+        ):
+            self.assertIsNone(self.intent(text), text)
+
+    def test_stats(self):
+        self.matcher.match("fta7 spotify")
+        self.matcher.match("kifak?")
+        stats = self.matcher.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_phrases_are_the_spoken_responses(self):
+        speech = json.loads(self.matcher.match("fta7 spotify"))["speech"]
+        self.assertIn(speech, self.matcher.phrases())
+
+
+if __name__ == "__main__":
+    unittest.main()
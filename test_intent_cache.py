@@ -0,0 +1,99 @@
+"""
+Intent cache eviction, expiry and invalidation.
+    python -m unittest test_intent_cache
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import intent_cache
+from intent_cache import IntentCache
+
+INTENT = '{"tool": "open_application", "parameters": {"app_name": "Spotify"}}'
+
+
+class IntentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "intent_cache.json")
+
+    def cache(self, **kwargs) -> IntentCache:
+        # Saved by flush() only, not by the writer after the test is over
+        return IntentCache(self.path, save_delay=3600, **kwargs)
+
+    def test_normalized_spellings_share_an_entry(self):
+        cache = self.cache()
+        cache.put("افتحْ سبوتيفاي؟", INTENT)
+        self.assertEqual(cache.get("افتح سبوتيفاي"), INTENT)
+        cache.put("fta7 spotify", INTENT)
+        self.assertEqual(cache.get("FTAH Spotify!"), INTENT)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = self.cache(max_entries=2)
+        cache.put("open spotify", INTENT)
+        cache.put("open discord", INTENT)
+        cache.get("open spotify")  # Now the most recent
+        cache.put("open brave", INTENT)
+
+        self.assertIsNone(cache.get("open discord"))
+        self.assertEqual(cache.get("open spotify"), INTENT)
+        self.assertEqual(cache.get("open brave"), INTENT)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_entries_expire(self):
+        cache = self.cache(ttl_seconds=60)
+        cache.put("open spotify", INTENT)
+        with mock.patch.object(
+            intent_cache.time, "time", return_value=time.time() + 61
+        ):
+            self.assertIsNone(cache.get("open spotify"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_stats(self):
+        cache = self.cache()
+        cache.put("open spotify", INTENT)
+        cache.get("open spotify")
+        cache.get("open discord")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_reloaded_after_flush(self):
+        cache = self.cache()
+        cache.put("open spotify", INTENT)
+        cache.flush()
+        self.assertEqual(self.cache().get("open spotify"), INTENT)
+
+    def test_expired_entries_are_not_reloaded(self):
+        cache = self.cache(ttl_seconds=60)
+        cache.put("open spotify", INTENT)
+        cache.flush()
+        with mock.patch.object(
+            intent_cache.time, "time", return_value=time.time() + 61
+        ):
+            reloaded = self.cache(ttl_seconds=60)
+        self.assertEqual(reloaded.stats()["size"], 0)
+
+    def test_dropped_when_the_model_changes(self):
+        cache = self.cache()
+        cache.put("open spotify", INTENT)
+        cache.flush()
+        with mock.patch.object(intent_cache, "LLM_MODEL", "another-model"):
+            self.assertIsNone(self.cache().get("open spotify"))
+
+    def test_dropped_when_the_tools_change(self):
+        cache = self.cache()
+        cache.put("open spotify", INTENT)
+        cache.flush()
+        with mock.patch.object(intent_cache, "TOOLS_SCHEMA", []):
+            self.assertIsNone(self.cache().get("open spotify"))
+
+
+if __name__ == "__main__":
+    unittest.main()
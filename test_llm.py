@@ -0,0 +1,114 @@
+"""
+Incremental parsing and early tool dispatch of the streamed intent.
+    python -m unittest test_llm
+"""
+
+import json
+import os
+import unittest
+
+import clients
+from fake_groq import FakeGroqServer
+from llm import IncrementalJSONParser, _tool_call, interpret_intent_stream
+
+SPEECH_FIRST = json.dumps(
+    {
+        "speech": "Opening Spotify, sir.",
+        "tool": "open_application",
+        "parameters": {"app_name": "Spotify"},
+    }
+)
+
+
+class IncrementalJSONParserTest(unittest.TestCase):
+    def test_any_chunking_gives_the_same_fields(self):
+        text = (
+            '```json\n{"tool": "open_url", "parameters": {"url": "https://x.y/{a}"}, '
+            '"speech": "Opening \\"X\\", sir. {ok} \\u0645", "count": 2, '
+            '"ok": true, "none": null, "list": [1, [2, {"b": "]"}]]}\n```'
+        )
+        expected = json.loads(text[text.index("{") : text.rindex("}") + 1])
+        for size in (1, 2, 3, 7, len(text)):
+            parser = IncrementalJSONParser()
+            for start in range(0, len(text), size):
+                parser.feed(text[start : start + size])
+            self.assertEqual(parser.fields, expected, size)
+            self.assertTrue(parser.done)
+
+    def test_fields_complete_as_soon_as_their_value_ends(self):
+        parser = IncrementalJSONParser()
+        self.assertEqual(parser.feed('{"tool": "none", "speech": "Hel'), ["tool"])
+        self.assertEqual(parser.feed('lo", "n": 12'), ["speech"])
+        self.assertEqual(parser.feed("}"), ["n"])
+        self.assertEqual(parser.fields, {"tool": "none", "speech": "Hello", "n": 12})
+
+    def test_text_after_the_object_is_ignored(self):
+        parser = IncrementalJSONParser()
+        parser.feed('{"tool": "none"} {"tool": "other"}')
+        self.assertEqual(parser.fields, {"tool": "none"})
+
+
+class ToolCallTest(unittest.TestCase):
+    def feed_until_dispatch(self, text: str) -> tuple[tuple[str, dict], int]:
+        """Feeds one character at a time, returns the tool call and where it fired."""
+        parser = IncrementalJSONParser()
+        for i, ch in enumerate(text):
+            parser.feed(ch)
+            tool_call = _tool_call(parser)
+            if tool_call:
+                return tool_call, i
+        self.fail("The tool was never dispatched")
+
+    def test_speech_first_waits_for_parameters(self):
+        tool_call, position = self.feed_until_dispatch(SPEECH_FIRST)
+        self.assertEqual(tool_call, ("open_application", {"app_name": "Spotify"}))
+        self.assertGreater(position, SPEECH_FIRST.index('"parameters"'))
+
+    def test_tool_first_dispatches_before_speech(self):
+        text = json.dumps(
+            {
+                "tool": "open_application",
+                "parameters": {"app_name": "Spotify"},
+                "speech": "Opening Spotify, sir.",
+            }
+        )
+        tool_call, position = self.feed_until_dispatch(text)
+        self.assertEqual(tool_call, ("open_application", {"app_name": "Spotify"}))
+        self.assertLess(position, text.index('"speech"'))
+
+    def test_no_parameters_once_the_model_moves_on(self):
+        text = '{"tool": "none", "speech": "I can\'t do that, sir."}'
+        tool_call, position = self.feed_until_dispatch(text)
+        self.assertEqual(tool_call, ("none", {}))
+        self.assertLess(position, len(text) - 1)
+
+    def test_tool_last_without_parameters(self):
+        text = '{"speech": "Hello, sir.", "tool": "none"}'
+        tool_call, position = self.feed_until_dispatch(text)
+        self.assertEqual(tool_call, ("none", {}))
+        self.assertEqual(position, len(text) - 1)
+
+
+class InterpretIntentStreamTest(unittest.TestCase):
+    def test_speech_first_dispatches_the_parameters(self):
+        calls = []
+        with FakeGroqServer(
+            responder=lambda messages: SPEECH_FIRST, first_chunk_delay=0, chunk_delay=0
+        ) as server:
+            os.environ["GROQ_BASE_URL"] = server.base_url
+            os.environ.setdefault("GROQ_API_KEY", "fake")
+            clients._client = None  # Picks up the stand-in's URL
+            try:
+                result = interpret_intent_stream(
+                    "افتح سبوتيفاي", on_tool=lambda *call: calls.append(call)
+                )
+            finally:
+                clients._client = None
+                del os.environ["GROQ_BASE_URL"]
+
+        self.assertEqual(json.loads(result), json.loads(SPEECH_FIRST))
+        self.assertEqual(calls, [("open_application", {"app_name": "Spotify"})])
+
+
+if __name__ == "__main__":
+    unittest.main()
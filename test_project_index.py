@@ -0,0 +1,76 @@
+"""
+Resolving spoken project names on a temporary tree.
+    python -m unittest test_project_index
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tools.project_index import ProjectIndex
+
+
+class ResolveTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for name in (
+            "Jarvis-Assistant",
+            "jarvis",
+            "UniversityPortal",
+            "wake_word_training",
+            os.path.join("web_group", "chat-bot"),
+            os.path.join("node_modules", "jarvis-lib"),
+        ):
+            os.makedirs(os.path.join(self.root, name))
+        self.index = ProjectIndex([(self.root, 2)])
+        self.index.refresh()
+
+    def resolve(self, spoken: str) -> str | None:
+        path = self.index.resolve(spoken)
+        return path and os.path.relpath(path, self.root)
+
+    def test_fillers_are_dropped(self):
+        self.assertEqual(self.resolve("el jarvis project"), "jarvis")
+
+    def test_arabic_script(self):
+        self.assertEqual(self.resolve("افتح مشروع جارفيس"), "jarvis")
+
+    def test_words_of_a_camel_case_name(self):
+        self.assertEqual(self.resolve("university portal"), "UniversityPortal")
+
+    def test_part_of_the_name(self):
+        self.assertEqual(self.resolve("wake word"), "wake_word_training")
+
+    def test_misspelled(self):
+        self.assertEqual(self.resolve("unversity portl"), "UniversityPortal")
+
+    def test_nested_directory(self):
+        self.assertEqual(
+            self.resolve("chat bot"), os.path.join("web_group", "chat-bot")
+        )
+
+    def test_nothing_close(self):
+        self.assertIsNone(self.resolve("quantum spreadsheet"))
+
+    def test_skipped_directories_are_not_indexed(self):
+        self.assertNotIn(
+            os.path.join("node_modules", "jarvis-lib"),
+            [os.path.relpath(p, self.root) for _, p in self.index.search("jarvis lib")],
+        )
+
+    def test_refresh_lists_only_changed_directories(self):
+        listings = self.index.listings
+        self.index.refresh()
+        self.assertEqual(self.index.listings, listings)
+
+        os.mkdir(os.path.join(self.root, "new_project"))
+        os.rmdir(os.path.join(self.root, "jarvis"))
+        self.index.refresh()
+        self.assertEqual(self.resolve("new project"), "new_project")
+        self.assertEqual(self.resolve("jarvis"), "Jarvis-Assistant")
+
+
+if __name__ == "__main__":
+    unittest.main()
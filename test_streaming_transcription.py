@@ -0,0 +1,129 @@
+"""
+Recording with the streaming transcriber: the wake word and the acknowledgement
+must not reach it.
+    python -m unittest test_streaming_transcription
+"""
+
+import contextlib
+import io
+import threading
+import unittest
+import wave
+from unittest import mock
+
+import numpy as np
+
+import speech_recognizer
+from audio_capture import FRAME_SAMPLES, SAMPLE_RATE
+from streaming_transcription import StreamingTranscriber
+
+rng = np.random.default_rng(0)
+
+
+def tone(seconds: float, amplitude: float, frequency: float = 300.0) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return amplitude * np.sin(2 * np.pi * frequency * t) + rng.normal(0, 30, len(t))
+
+
+def quiet(seconds: float) -> np.ndarray:
+    return rng.normal(0, 30, int(seconds * SAMPLE_RATE))
+
+
+def read_wav(data: bytes) -> np.ndarray:
+    with wave.open(io.BytesIO(data)) as wf:
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+
+WAKE_WORD = tone(0.3, 10000, 500)
+ACK_FRAMES = 8
+# The acknowledgement is picked up by the microphone, the user waits for it
+ACK = np.concatenate(
+    [quiet(0.2), tone(ACK_FRAMES * FRAME_SAMPLES / SAMPLE_RATE - 0.2, 8000, 1000)]
+)
+SPEECH = tone(1.2, 3000)
+RECORDING = np.concatenate([ACK, quiet(0.4), SPEECH, quiet(1.5)]).astype(np.int16)
+
+
+class FakeCapture:
+    """Replays RECORDING; the acknowledgement ends once its frames are read."""
+
+    frame_index = 0
+
+    def __init__(self):
+        self.ack_heard = threading.Event()
+        self.muted = threading.Event()
+
+    def get_frames(self, start_frame: int, end_frame: int) -> np.ndarray:
+        preroll = WAKE_WORD.astype(np.int16)
+        return preroll[-(end_frame - start_frame) * FRAME_SAMPLES :]
+
+    @contextlib.contextmanager
+    def subscribe(self, start_frame: int = 0):
+        capture = self
+
+        class Subscription:
+            index = 0
+
+            def read(self, timeout=None):
+                if self.index == ACK_FRAMES:
+                    capture.ack_heard.set()
+                    capture.muted.wait(timeout)
+                frame = RECORDING[self.index * FRAME_SAMPLES :][:FRAME_SAMPLES]
+                self.index += 1
+                if len(frame) < FRAME_SAMPLES:
+                    return np.zeros(FRAME_SAMPLES, dtype=np.int16)
+                return frame
+
+        yield Subscription()
+
+
+class RecordTest(unittest.TestCase):
+    def record(self, **kwargs) -> bytes | None:
+        capture = FakeCapture()
+
+        class FakeMuter:
+            def __enter__(self):
+                capture.muted.set()
+
+            def __exit__(self, exc_type, exc_val, exc_tb):
+                pass
+
+        def fake_speak(text: str):
+            capture.ack_heard.wait(5)
+
+        with (
+            mock.patch.object(speech_recognizer, "speak", fake_speak),
+            mock.patch.object(speech_recognizer, "VolumeMuter", FakeMuter),
+        ):
+            return speech_recognizer.record(capture, **kwargs)
+
+    def test_streamed_segment_starts_after_the_ack(self):
+        segments = []
+
+        def fake_transcribe(wav: bytes, context: str | None = None) -> str:
+            segments.append(read_wav(wav))
+            return "command"
+
+        transcriber = StreamingTranscriber(fake_transcribe)
+        audio_data = self.record(
+            on_frame=transcriber.feed, on_ack_end=transcriber.set_noise_floor
+        )
+        self.assertEqual(transcriber.finish(), "command")
+
+        self.assertIsNotNone(audio_data)
+        self.assertEqual(len(segments), 1)
+        segment = segments[0]
+        # Neither the wake word nor the acknowledgement, only the command
+        self.assertLess(np.abs(segment).max(), 4000)
+        self.assertGreater(len(segment), len(SPEECH))
+        self.assertLess(len(segment), len(SPEECH) + SAMPLE_RATE)
+
+    def test_recording_has_no_wake_word(self):
+        audio = read_wav(self.record())
+        self.assertLess(np.abs(audio).max(), 4000)
+        self.assertGreater(len(audio), len(SPEECH))
+        self.assertLess(len(audio), len(SPEECH) + SAMPLE_RATE)
+
+
+if __name__ == "__main__":
+    unittest.main()
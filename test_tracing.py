@@ -0,0 +1,132 @@
+"""
+Span nesting, export and the trace summaries.
+    python -m unittest test_tracing
+"""
+
+import contextlib
+import contextvars
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from tracing import Tracer, _percentile, critical_path, summarize
+
+
+def record(span: int, name: str, start_ms: float, duration_ms: float, parent=1):
+    return {
+        "trace": "t",
+        "span": span,
+        "parent": parent,
+        "name": name,
+        "start_ms": start_ms,
+        "duration_ms": duration_ms,
+    }
+
+
+class TracerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "traces.jsonl")
+        self.tracer = Tracer(self.path, echo=False)
+
+    def records(self) -> list[dict]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_spans_nest_and_are_exported(self):
+        with self.tracer.trace("cycle", source="test"):
+            with self.tracer.span("record"):
+                pass
+            with self.tracer.span("interpret") as span:
+                span.set(cache={"hit": True})
+                with self.tracer.span("llm"):
+                    pass
+
+        by_name = {r["name"]: r for r in self.records()}
+        self.assertEqual(set(by_name), {"cycle", "record", "interpret", "llm"})
+        cycle = by_name["cycle"]
+        self.assertIsNone(cycle["parent"])
+        self.assertEqual(cycle["attributes"], {"source": "test"})
+        self.assertEqual(by_name["record"]["parent"], cycle["span"])
+        self.assertEqual(by_name["llm"]["parent"], by_name["interpret"]["span"])
+        self.assertEqual(by_name["interpret"]["attributes"], {"cache": {"hit": True}})
+        self.assertEqual(len({r["trace"] for r in self.records()}), 1)
+
+    def test_span_outside_a_trace_is_a_no_op(self):
+        with self.tracer.span("orphan") as span:
+            span.set(ignored=True)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_spans_on_other_threads_join_the_trace(self):
+        def stage():
+            with self.tracer.span("worker"):
+                pass
+
+        with self.tracer.trace("cycle"):
+            context = contextvars.copy_context()
+            thread = threading.Thread(target=context.run, args=(stage,))
+            thread.start()
+            thread.join()
+
+        by_name = {r["name"]: r for r in self.records()}
+        self.assertEqual(by_name["worker"]["parent"], by_name["cycle"]["span"])
+
+    def test_echo_includes_the_summary(self):
+        tracer = Tracer(self.path)
+        output = io.StringIO()
+        with (
+            contextlib.redirect_stdout(output),
+            tracer.trace("cycle"),
+            tracer.span("interpret") as span,
+        ):
+            span.set(summary="cache=hit, hit rate 50%")
+        self.assertIn("interpret", output.getvalue())
+        self.assertIn("(cache=hit, hit rate 50%)", output.getvalue())
+
+
+class SummaryTest(unittest.TestCase):
+    def test_nearest_rank_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(_percentile(values, 50), 50.0)
+        self.assertEqual(_percentile(values, 95), 95.0)
+        self.assertEqual(_percentile(values, 99), 99.0)
+        self.assertEqual(_percentile([7.0], 99), 7.0)
+        self.assertEqual(_percentile([1.0, 2.0], 0), 1.0)
+
+    def test_summarize(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "traces.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(
+                json.dumps(record(i, "tts", 0, float(i))) + "\n" for i in range(1, 21)
+            )
+            f.write("truncated line\n")
+
+        summary = summarize(path)["tts"]
+        self.assertEqual(summary["count"], 20)
+        self.assertEqual((summary["p50"], summary["p95"]), (10.0, 19.0))
+        self.assertEqual((summary["p99"], summary["max"]), (20.0, 20.0))
+
+    def test_critical_path_skips_overlapped_stages(self):
+        records = [
+            record(1, "cycle", 0, 1000, parent=None),
+            record(2, "record", 0, 300),
+            record(3, "interpret", 300, 200),
+            record(4, "tool", 500, 400),
+            record(5, "synthesize", 500, 150),  # Overlapped by the tool
+            record(6, "speak", 900, 100),
+        ]
+        self.assertEqual(
+            [r["name"] for r in critical_path(records)],
+            ["record", "interpret", "tool", "speak"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
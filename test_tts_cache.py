@@ -0,0 +1,90 @@
+"""
+Eviction and integrity checks of the synthesized response cache.
+    python -m unittest test_tts_cache
+"""
+
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import tts_cache
+from tts_cache import TTSCache
+
+# 1 s, about 48 KB as a 16-bit WAV
+AUDIO = np.zeros(24000, dtype=np.float32)
+CLIP_BYTES = 48 * 1024
+
+
+class TTSCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        # Every call is a second later, so last_used never ties
+        clock = itertools.count(1_000_000)
+        patcher = mock.patch.object(
+            tts_cache.time, "time", side_effect=lambda: next(clock)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_least_recently_used_clips_are_evicted(self):
+        cache = TTSCache("voice", self.tmp, max_bytes=int(CLIP_BYTES * 3.5))
+        for i in range(3):
+            cache.put(f"phrase {i}", AUDIO, 24000)
+        cache.get("phrase 0")  # Now the most recent
+        cache.put("phrase 3", AUDIO, 24000)
+
+        self.assertIsNone(cache.peek("phrase 1"))
+        for i in (0, 2, 3):
+            self.assertIsNotNone(cache.peek(f"phrase {i}"))
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+        clips = [name for name in os.listdir(self.tmp) if name.endswith(".wav")]
+        self.assertEqual(len(clips), 3)
+
+    def test_smaller_budget_evicts_at_startup(self):
+        cache = TTSCache("voice", self.tmp)
+        for i in range(4):
+            cache.put(f"phrase {i}", AUDIO, 24000)
+        smaller = TTSCache("voice", self.tmp, max_bytes=int(CLIP_BYTES * 2.5))
+        self.assertEqual(smaller.stats()["clips"], 2)
+        self.assertIsNotNone(smaller.peek("phrase 3"))
+
+    def test_fingerprint_is_part_of_the_key(self):
+        TTSCache("voice-a", self.tmp).put("Yes, sir.", AUDIO, 24000)
+        self.assertIsNone(TTSCache("voice-b", self.tmp).get("Yes, sir."))
+        self.assertIsNotNone(TTSCache("voice-a", self.tmp).get("Yes, sir."))
+
+    def test_most_used(self):
+        cache = TTSCache("voice", self.tmp)
+        for text, plays in (("Yes, sir.", 3), ("Done.", 1), ("Hello.", 0)):
+            cache.put(text, AUDIO, 24000)
+            for _ in range(plays):
+                cache.get(text)
+        self.assertEqual(cache.most_used(2), ["Yes, sir.", "Done."])
+
+    def test_scan_reconciles_index_and_files(self):
+        cache = TTSCache("voice", self.tmp)
+        cache.put("Yes, sir.", AUDIO, 24000)
+        cache.put("Done.", AUDIO, 24000)
+        os.remove(cache.peek("Yes, sir."))
+        for name in ("stray.wav", "interrupted.wav.tmp", "response_1.mp3"):
+            open(os.path.join(self.tmp, name), "wb").close()
+
+        rescanned = TTSCache("voice", self.tmp)
+        self.assertEqual(rescanned.stats()["clips"], 1)
+        self.assertEqual(
+            rescanned.total_bytes, os.path.getsize(rescanned.peek("Done."))
+        )
+        self.assertEqual(
+            sorted(n for n in os.listdir(self.tmp) if not n.startswith("index")),
+            [f"{rescanned.key('Done.')}.wav"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+End-of-speech detection on synthetic audio.
+    python -m unittest test_vad
+"""
+
+import unittest
+
+import numpy as np
+
+from vad import HANGOVER_SECONDS, SAMPLE_RATE, Endpointer
+
+FRAME_SAMPLES = 1280
+rng = np.random.default_rng(0)
+
+
+def noise(seconds: float, level: float = 30.0) -> np.ndarray:
+    return rng.normal(0, level, int(seconds * SAMPLE_RATE))
+
+
+def speech(seconds: float, amplitude: float = 3000.0) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return amplitude * np.sin(2 * np.pi * 300 * t) + noise(seconds)
+
+
+def feed(endpointer: Endpointer, audio: np.ndarray) -> int | None:
+    """Feeds frame by frame, returns the sample where the command ended."""
+    audio = audio.astype(np.int16)
+    for start in range(0, len(audio), FRAME_SAMPLES):
+        if endpointer.process(audio[start : start + FRAME_SAMPLES]):
+            return start + FRAME_SAMPLES
+    return None
+
+
+class EndpointerTest(unittest.TestCase):
+    def test_ends_after_the_hangover(self):
+        audio = np.concatenate([noise(0.5), speech(1.0), noise(2.0)])
+        endpointer = Endpointer()
+        ended_at = feed(endpointer, audio)
+
+        self.assertIsNotNone(ended_at)
+        speech_end = int(1.5 * SAMPLE_RATE)
+        self.assertGreaterEqual(ended_at, speech_end + HANGOVER_SECONDS * SAMPLE_RATE)
+        self.assertLess(ended_at, speech_end + (HANGOVER_SECONDS + 0.2) * SAMPLE_RATE)
+
+    def test_speech_bounds(self):
+        endpointer = Endpointer()
+        feed(endpointer, np.concatenate([noise(0.5), speech(1.0), noise(2.0)]))
+        self.assertAlmostEqual(
+            endpointer.speech_start_sample, 0.5 * SAMPLE_RATE, delta=320
+        )
+        self.assertAlmostEqual(
+            endpointer.speech_end_sample, 1.5 * SAMPLE_RATE, delta=320
+        )
+
+    def test_short_pause_does_not_end_the_command(self):
+        audio = np.concatenate(
+            [noise(0.5), speech(0.5), noise(0.3), speech(0.5), noise(2.0)]
+        )
+        endpointer = Endpointer()
+        ended_at = feed(endpointer, audio)
+        self.assertGreater(ended_at, int(1.8 * SAMPLE_RATE))
+
+    def test_silence_alone_never_ends(self):
+        self.assertIsNone(feed(Endpointer(), noise(3.0)))
+
+    def test_click_is_not_speech(self):
+        audio = np.concatenate([noise(0.5), speech(0.02, 10000), noise(2.0)])
+        endpointer = Endpointer()
+        self.assertIsNone(feed(endpointer, audio))
+        self.assertFalse(endpointer.speech_detected)
+
+    def test_noise_floor_adapts_to_a_loud_room(self):
+        # A fan loud enough to pass a fixed threshold becomes the noise floor
+        loud = 800.0
+        audio = np.concatenate(
+            [
+                noise(1.0, loud),
+                speech(1.0, loud * 8) + noise(1.0, loud),
+                noise(2.0, loud),
+            ]
+        )
+        endpointer = Endpointer()
+        self.assertIsNotNone(feed(endpointer, audio))
+        self.assertAlmostEqual(endpointer.speech_start_sample, SAMPLE_RATE, delta=1600)
+
+    def test_any_frame_size(self):
+        audio = np.concatenate([noise(0.5), speech(1.0), noise(2.0)]).astype(np.int16)
+        whole, odd = Endpointer(), Endpointer()
+        whole.process(audio)
+        for start in range(0, len(audio), 333):
+            odd.process(audio[start : start + 333])
+        self.assertEqual(whole.speech_start_sample, odd.speech_start_sample)
+        self.assertEqual(whole.speech_end_sample, odd.speech_end_sample)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,321 @@
+"""
+In-memory index of the installed applications, for open_application.
+All entries are enumerated in one bulk call (Get-StartApps on Windows, the
+.desktop files elsewhere, or a JSON fixture), looked up by normalized name,
+saved compactly between runs and refreshed in the background. Resolving a name
+never spawns a process, only launching the app does.
+"""
+
+import configparser
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+
+# Launched apps keep running when the cycle is aborted
+from cancellation_token import launch_detached
+from normalization import normalize_text
+
+# Kept next to this module, like the cache of the previous per-name lookups
+INDEX_FILE = os.path.join(os.path.dirname(__file__), "app_index.json")
+LEGACY_CACHE_FILE = os.path.join(os.path.dirname(__file__), "app_cache.json")
+
+REFRESH_SECONDS = 6 * 3600
+# How long a lookup waits for the first enumeration (no index saved yet)
+READY_TIMEOUT = 10.0
+# A miss triggers a refresh (something newly installed), at most this often
+MISS_REFRESH_SECONDS = 60
+
+# (display name, launch id)
+App = tuple[str, str]
+
+
+# ================= Enumerators =================
+def start_menu_apps() -> list[App]:
+    """Every Start menu entry, with a single PowerShell call."""
+    result = subprocess.run(
+        [
+            "powershell",
+            "-NoProfile",
+            "-Command",
+            "Get-StartApps | Select-Object Name, AppID | ConvertTo-Json -Compress",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
+    entries = json.loads(result.stdout or "[]")
+    if isinstance(entries, dict):  # A single app isn't wrapped in a list
+        entries = [entries]
+    return [
+        (e["Name"], e["AppID"]) for e in entries if e.get("Name") and e.get("AppID")
+    ]
+
+
+DESKTOP_DIRS = [
+    os.path.expanduser("~/.local/share/applications"),
+    "/usr/local/share/applications",
+    "/usr/share/applications",
+]
+
+
+def desktop_entry_apps(directories: list[str] = DESKTOP_DIRS) -> list[App]:
+    """Applications from freedesktop .desktop files (launch id is the file name)."""
+    apps = {}
+    for directory in directories:
+        for path in glob.glob(os.path.join(directory, "*.desktop")):
+            desktop_id = os.path.basename(path)
+            if desktop_id in apps:
+                continue  # The user's entries come first and win
+
+            parser = configparser.ConfigParser(interpolation=None, strict=False)
+            try:
+                parser.read(path, encoding="utf-8")
+                entry = parser["Desktop Entry"]
+            except (configparser.Error, OSError, KeyError):
+                continue
+            if entry.get("Type", "Application") != "Application":
+                continue
+            if any(entry.getboolean(key, False) for key in ("NoDisplay", "Hidden")):
+                continue
+            if entry.get("Name"):
+                apps[desktop_id] = entry["Name"]
+    return [(name, desktop_id) for desktop_id, name in apps.items()]
+
+
+def fixture_apps(path: str) -> Callable[[], list[App]]:
+    """Enumerator reading [[name, launch id], ...] from a JSON file (for tests)."""
+
+    def enumerate_apps() -> list[App]:
+        with open(path, "r", encoding="utf-8") as f:
+            return [(name, app_id) for name, app_id in json.load(f)]
+
+    return enumerate_apps
+
+
+# ================= Launchers =================
+def launch_start_app(app_id: str):
+    script = f'Start-Process "shell:AppsFolder\\{app_id}"'
+    launch_detached(["powershell", "-NoProfile", "-Command", script])
+
+
+def launch_desktop_entry(desktop_id: str):
+    launch_detached(["gtk-launch", desktop_id])
+
+
+def default_platform() -> tuple[Callable[[], list[App]], Callable[[str], None]]:
+    if sys.platform == "win32":
+        return start_menu_apps, launch_start_app
+    return desktop_entry_apps, launch_desktop_entry
+
+
+# ================= Index =================
+class AppIndex:
+    def __init__(
+        self,
+        enumerate_apps: Callable[[], list[App]] | None = None,
+        launch: Callable[[str], None] | None = None,
+        path: str | None = INDEX_FILE,
+        refresh_seconds: float = REFRESH_SECONDS,
+    ):
+        default_enumerate, default_launch = default_platform()
+        self.enumerate_apps = enumerate_apps or default_enumerate
+        # Starts an app from its launch id
+        self.launch = launch or default_launch
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+
+        # normalized name -> (name, launch id)
+        self._by_name: dict[str, App] = {}
+        self.refreshed_at = 0.0
+        self._lock = threading.Lock()
+        # Set once there is something to look up in (loaded or enumerated)
+        self.ready = threading.Event()
+
+        self._refresh_now = threading.Event()
+        self._last_miss_refresh = 0.0
+        self._thread = None
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def _set_apps(self, apps: list[App], refreshed_at: float):
+        by_name = {}
+        for name, app_id in apps:
+            key = normalize_text(name)
+            if key:
+                by_name.setdefault(key, (name, app_id))
+        with self._lock:
+            self._by_name = by_name
+            self.refreshed_at = refreshed_at
+        self.ready.set()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._set_apps([tuple(app) for app in data["apps"]], data["refreshed"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[!] Error loading app index: {e}")
+
+    def _save(self):
+        """Write the index atomically (temp file + rename)."""
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "refreshed": self.refreshed_at,
+                "apps": list(self._by_name.values()),
+            }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[!] Error saving app index: {e}")
+
+    def refresh(self) -> bool:
+        """Re-enumerates the applications (blocking)."""
+        try:
+            apps = self.enumerate_apps()
+        # PowerShell missing or failing, or output that isn't the expected JSON
+        except (OSError, subprocess.SubprocessError, ValueError, KeyError) as e:
+            print(f"[!] Error enumerating applications: {e}")
+            # Lookups waiting for the first enumeration get what there is
+            self.ready.set()
+            return False
+        self._set_apps(apps, time.time())
+        self._save()
+        return True
+
+    def start(self):
+        """Keep the index fresh on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            wait = self.refreshed_at + self.refresh_seconds - time.time()
+            if wait > 0:
+                self._refresh_now.wait(wait)
+            self._refresh_now.clear()
+            if not self.refresh():
+                # Don't retry a failing enumerator in a tight loop
+                self._refresh_now.wait(MISS_REFRESH_SECONDS)
+
+    def lookup(self, app_name: str) -> App | None:
+        """
+        Finds an application by name: exact (normalized) match first,
+        then the shortest name containing the query (like Get-StartApps -like '*name*').
+
+        Returns:
+            tuple: (name, launch id), None if nothing matches.
+        """
+        query = normalize_text(app_name)
+        if not query:
+            return None
+        if self._thread is not None:
+            # First run: nothing saved yet, the first enumeration is under way
+            self.ready.wait(READY_TIMEOUT)
+        with self._lock:
+            by_name = self._by_name
+
+        app = by_name.get(query)
+        if app is None:
+            matches = [key for key in by_name if query in key]
+            if matches:
+                # Prefer a match at the start of a word, then the closest length
+                best = min(
+                    matches, key=lambda key: (f" {query}" not in f" {key}", len(key))
+                )
+                app = by_name[best]
+
+        if app is None and self._thread is not None:
+            # Maybe installed since the last refresh
+            now = time.time()
+            if now - self._last_miss_refresh > MISS_REFRESH_SECONDS:
+                self._last_miss_refresh = now
+                self._refresh_now.set()
+        return app
+
+
+_index: AppIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_app_index() -> AppIndex:
+    """The session's index, loaded from disk and refreshed in the background."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            # The per-name lookup cache it replaces
+            if os.path.exists(LEGACY_CACHE_FILE):
+                os.remove(LEGACY_CACHE_FILE)
+            _index = AppIndex()
+            _index.start()
+    return _index
+
+
+if __name__ == "__main__":
+    # python -m tools.app_index
+    import random
+    import tempfile
+
+    # Lookup cost on a fixture the size of a typical Start menu
+    rng = random.Random(0)
+    # fmt: off
+    words = [
+        "Microsoft", "Visual", "Studio", "Code", "Spotify", "Discord", "MATLAB",
+        "Brave", "Settings", "Terminal", "PowerShell", "Office", "Word", "Excel",
+        "Teams", "Netflix", "Steam", "Zoom", "Python", "Git", "Bash", "Notepad",
+    ]
+    # fmt: on
+    apps = [
+        (" ".join(rng.sample(words, rng.randint(1, 3))) + f" {i}", f"App.{i}")
+        for i in range(300)
+    ]
+    apps += [
+        ("Spotify", "SpotifyAB.Spotify"),
+        ("Brave", "Brave"),
+        ("Settings", "windows.immersivecontrolpanel"),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, "apps.json")
+        with open(fixture, "w", encoding="utf-8") as f:
+            json.dump(apps, f)
+
+        index_path = os.path.join(tmp, os.path.basename(INDEX_FILE))
+        index = AppIndex(fixture_apps(fixture), path=index_path)
+        start_time = time.perf_counter()
+        index.refresh()
+        print(
+            f"Enumerated {len(index)} apps in {(time.perf_counter() - start_time) * 1000:.2f} ms"
+        )
+
+        for name in ("spotify", "Brave!", "settings", "visual studio", "nonexistent"):
+            print(f"  {name!r:16} -> {index.lookup(name)}")
+
+        queries = ["spotify", "visual studio", "matlab", "excel", "nonexistent"] * 200
+        start_time = time.perf_counter()
+        for query in queries:
+            index.lookup(query)
+        per_lookup = (time.perf_counter() - start_time) / len(queries)
+        print(f"Lookup: {per_lookup * 1e6:.1f} us")
+
+        reloaded = AppIndex(list, path=index.path)
+        print(
+            f"Reloaded from disk: {len(reloaded)} apps, "
+            f"{os.path.getsize(index.path) / 1024:.1f} KB"
+        )
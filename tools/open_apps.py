@@ -1,69 +1,28 @@
-import json
 import os
 import subprocess
-from datetime import datetime, timedelta
+
+# Launched apps keep running when the cycle is aborted
+from cancellation_token import launch_detached
+from tools.app_index import get_app_index
+from tools.project_index import get_project_index
 
 
 def open_application(app_name: str) -> str:
     print(f"[*] Opening Application: {app_name}")
 
-    cache_file = os.path.join(os.path.dirname(__file__), "app_cache.json")
-    cache = {}
-
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, "r") as f:
-                cache = json.load(f)
-        except Exception as e:
-            print(f"[!] Error loading cache: {e}")
-
-    # Remove entries older than 2 weeks
-    current_time = datetime.now()
-    cache = {
-        k: v
-        for k, v in cache.items()
-        if current_time
-        - datetime.fromisoformat(v.get("timestamp", "1970-01-01T00:00:00"))
-        < timedelta(weeks=2)
-    }
-
-    app_id = None
-    if app_name in cache:
-        app_id = cache[app_name]["app_id"]
-    else:
-        try:
-            # Find AppID
-            script = f"(Get-StartApps | Where-Object {{ $_.Name -like '*{app_name}*' }} | Select-Object -First 1).AppID"
-            result = subprocess.run(
-                ["powershell", "-Command", script], capture_output=True, text=True
-            )
-
-            if result.returncode == 0 and result.stdout.strip():
-                app_id = result.stdout.strip()
-                cache[app_name] = {
-                    "app_id": app_id,
-                    "timestamp": current_time.isoformat(),
-                }
-                try:
-                    with open(cache_file, "w") as f:
-                        json.dump(cache, f, indent=4)
-                except Exception as e:
-                    print(f"[!] Error saving cache: {e}")
-            else:
-                print(f"[!] Cloud not find AppID for: {app_name}")
-        except Exception as e:
-            print(f"[!] Error searching for app: {e}")
-
-    if app_id:
-        try:
-            script = f'Start-Process "shell:AppsFolder\\{app_id}"'
-            subprocess.run(["powershell", "-Command", script], check=True)
-            return "Opened"
-        except Exception as e:
-            print(f"[!] Error opening application {app_name}: {e}")
-            return "Failed"
+    # In-memory lookup, the index is refreshed in the background
+    app = get_app_index().lookup(app_name)
+    if app is None:
+        print(f"[!] Could not find AppID for: {app_name}")
+        return "Failed"
 
-    return "Failed"
+    name, app_id = app
+    try:
+        get_app_index().launch(app_id)
+        return "Opened"
+    except Exception as e:
+        print(f"[!] Error opening application {name}: {e}")
+        return "Failed"
 
 
 def open_directory(path: str) -> str:
@@ -71,6 +30,9 @@ def open_directory(path: str) -> str:
 
     # Clean up the path for Windows (handling / vs \)
     norm_path = os.path.normpath(path)
+    if not os.path.exists(norm_path):
+        # A spoken name ("el jarvis project") rather than a path
+        norm_path = get_project_index().resolve(path) or norm_path
 
     if os.path.exists(norm_path):
         try:
@@ -88,6 +50,9 @@ def open_vscode_project(path: str) -> str:
 
     # Clean up the path for Windows (handling / vs \)
     norm_path = os.path.normpath(path)
+    if not os.path.exists(norm_path):
+        # A spoken name ("el jarvis project") rather than a path
+        norm_path = get_project_index().resolve(path) or norm_path
 
     if os.path.exists(norm_path):
         try:
@@ -97,7 +62,7 @@ def open_vscode_project(path: str) -> str:
             vscode_path = os.path.join(
                 appdata_path, "Programs", "Microsoft VS Code", "Code.exe"
             )
-            subprocess.run(
+            launch_detached(
                 [vscode_path, norm_path],
                 shell=False,  # To be able to pass list of args
                 creationflags=subprocess.CREATE_NO_WINDOW,
@@ -0,0 +1,434 @@
+"""
+Local index of the project folders and the known directories, for
+open_vscode_project and open_directory.
+Spoken names ("el jarvis project", "جارفيس", "jarvs") are resolved to a path
+by, in order: exact normalized name, exact phonetic key (Arabic script and
+Arabizi transliterated, sound-alike letters merged, vowels dropped), all words
+contained in the name, and trigram similarity for misspellings.
+Refreshes are incremental: only directories whose mtime changed are listed again.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from normalization import normalize_text
+
+# Levels below each root that are indexed
+PROJECT_DEPTH = 2
+KNOWN_DIR_DEPTH = 1
+# Below this score nothing is resolved
+MIN_SCORE = 0.5
+REFRESH_SECONDS = 30
+# How long a lookup waits for the first build at startup
+READY_TIMEOUT = 5.0
+
+# Never indexed (besides hidden directories)
+SKIP_DIRS = {
+    "node_modules",
+    "__pycache__",
+    "venv",
+    "env",
+    "site-packages",
+    "dist",
+    "build",
+}
+
+# Spoken words around the name, dropped from queries
+FILLERS = {
+    "el",
+    "al",
+    "il",
+    "the",
+    "my",
+    "ya",
+    "li",
+    "please",
+    "open",
+    "fta7",
+    "ftah",
+    "efta7",
+    "eftah",
+    "project",
+    "projects",
+    "proj",
+    "folder",
+    "directory",
+    "dir",
+    "repo",
+    "ال",
+    "لي",
+    "يا",
+    "افتح",
+    "افتحلي",
+    "مشروع",
+    "مشاريع",
+    "المشروع",
+    "بروجكت",
+    "بروجيكت",
+    "ملف",
+    "مجلد",
+    "فولدر",
+}
+FILLERS = {normalize_text(word) for word in FILLERS}
+
+# Letter tables, aligned by hand
+# fmt: off
+# Arabic letters (after normalize_text folding) to their usual Latin spelling
+_TRANSLITERATION = str.maketrans(
+    {
+        "ا": "a", "ب": "b", "ت": "t", "ث": "th", "ج": "j", "ح": "h", "خ": "kh",
+        "د": "d", "ذ": "th", "ر": "r", "ز": "z", "س": "s", "ش": "sh", "ص": "s",
+        "ض": "d", "ط": "t", "ظ": "z", "ع": "a", "غ": "gh", "ف": "f", "ق": "q",
+        "ك": "k", "ل": "l", "م": "m", "ن": "n", "ه": "h", "و": "w", "ي": "y",
+        "ء": "", "پ": "p", "ڤ": "v", "گ": "g", "چ": "ch",
+    }
+)
+_DIGRAPHS = [("ph", "f"), ("th", "t"), ("sh", "s"), ("ch", "s"), ("kh", "k"),
+             ("gh", "g"), ("ck", "k"), ("qu", "k")]
+# Letters that sound alike or that Arabic doesn't tell apart
+_SOUND_ALIKE = str.maketrans({"v": "f", "p": "b", "q": "k", "c": "k", "z": "s",
+                              "x": "s", "g": "j", "y": "i", "w": "u"})
+# fmt: on
+_VOWELS = re.compile(r"(?<!^)[aeiou]+")
+_REPEATS = re.compile(r"(.)\1+")
+_CAMEL_CASE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_SEPARATORS = re.compile(r"[_\-.]+")
+
+
+def split_name(name: str) -> str:
+    """'JarvisAssistant' / 'jarvis_assistant' / 'jarvis-assistant' -> 'jarvis assistant'."""
+    return normalize_text(_SEPARATORS.sub(" ", _CAMEL_CASE.sub(" ", name)))
+
+
+def _strip_article(word: str) -> str:
+    # Attached Arabic article: "الجارفيس" -> "جارفيس"
+    return word[2:] if word.startswith("ال") and len(word) > 4 else word
+
+
+def phonetic_word(word: str) -> str:
+    word = word.translate(_TRANSLITERATION)
+    for digraph, letter in _DIGRAPHS:
+        word = word.replace(digraph, letter)
+    word = word.translate(_SOUND_ALIKE)
+    word = _REPEATS.sub(r"\1", word)
+    if word[:1] in "aeiou":
+        word = "a" + word[1:]  # Keep that it starts with a vowel, not which one
+    return _VOWELS.sub("", word)
+
+
+def phonetic_key(text: str) -> str:
+    return " ".join(filter(None, (phonetic_word(w) for w in text.split())))
+
+
+def clean_query(spoken: str) -> str:
+    """Normalized query without fillers; for a path, its last component."""
+    spoken = re.split(r"[\\/]", spoken.strip().rstrip("\\/"))[-1]
+    words = [_strip_article(w) for w in split_name(spoken).split()]
+    kept = [w for w in words if w not in FILLERS]
+    return " ".join(kept or words)
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f" {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class _Entry:
+    __slots__ = ("depth", "grams", "path", "phonetic", "text")
+
+    def __init__(self, path: str, depth: int):
+        self.path = path
+        self.depth = depth
+        self.text = split_name(os.path.basename(path.rstrip("\\/")) or path)
+        self.phonetic = phonetic_key(self.text)
+        # Text and phonetic trigrams in one set, phonetic ones marked with '#'
+        self.grams = trigrams(self.text) | {f"#{g}" for g in trigrams(self.phonetic)}
+
+
+class ProjectIndex:
+    def __init__(
+        self, roots: list[tuple[str, int]], refresh_seconds: float = REFRESH_SECONDS
+    ):
+        """
+        Args:
+            roots: (directory, levels indexed below it); the roots are indexed too.
+        """
+        self.roots = [(os.path.normpath(root), depth) for root, depth in roots]
+        self.refresh_seconds = refresh_seconds
+
+        self._entries: dict[str, _Entry] = {}
+        self._by_text: dict[str, set[str]] = {}
+        self._by_phonetic: dict[str, set[str]] = {}
+        self._words: dict[str, set[str]] = {}  # phonetic word -> paths
+        self._grams: dict[str, set[str]] = {}  # trigram -> paths
+
+        # Listed directories: path -> (mtime, child directories)
+        self._listed: dict[str, tuple[int, set[str]]] = {}
+        self._lock = threading.RLock()
+
+        # Set once the first refresh is done
+        self.ready = threading.Event()
+        self._refresh_now = threading.Event()
+        self._last_miss_refresh = 0.0
+        self._thread = None
+
+        # Stats
+        self.listings = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------- Maintenance ----------
+    def _add(self, path: str, depth: int):
+        if path in self._entries:
+            return
+        entry = _Entry(path, depth)
+        self._entries[path] = entry
+        self._by_text.setdefault(entry.text, set()).add(path)
+        self._by_phonetic.setdefault(entry.phonetic, set()).add(path)
+        for word in set(entry.phonetic.split()):
+            self._words.setdefault(word, set()).add(path)
+        for gram in entry.grams:
+            self._grams.setdefault(gram, set()).add(path)
+
+    def _remove(self, path: str):
+        """Removes a directory and everything indexed below it."""
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            for postings, key in (
+                [(self._by_text, entry.text), (self._by_phonetic, entry.phonetic)]
+                + [(self._words, word) for word in set(entry.phonetic.split())]
+                + [(self._grams, gram) for gram in entry.grams]
+            ):
+                paths = postings.get(key)
+                if paths is not None:
+                    paths.discard(path)
+                    if not paths:
+                        del postings[key]
+
+        listed = self._listed.pop(path, None)
+        if listed is not None:
+            for child in listed[1]:
+                self._remove(child)
+
+    def _list(self, directory: str) -> set[str]:
+        self.listings += 1
+        children = set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or entry.name in SKIP_DIRS:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        children.add(os.path.join(directory, entry.name))
+        except OSError:
+            pass
+        return children
+
+    def _update(self, directory: str, depth: int, max_depth: int):
+        """Re-lists the directory if its mtime changed, then descends."""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._remove(directory)
+            return
+
+        listed = self._listed.get(directory)
+        if listed is None or listed[0] != mtime:
+            children = self._list(directory)
+            old = listed[1] if listed else set()
+            for child in old - children:
+                self._remove(child)
+            for child in children - old:
+                self._add(child, depth + 1)
+            self._listed[directory] = (mtime, children)
+        else:
+            children = listed[1]
+
+        if depth + 1 < max_depth:
+            for child in children:
+                self._update(child, depth + 1, max_depth)
+
+    def refresh(self):
+        """Brings the index up to date (only changed directories are listed)."""
+        with self._lock:
+            for root, max_depth in self.roots:
+                if os.path.isdir(root):
+                    self._add(root, 0)
+                    self._update(root, 0, max_depth)
+                else:
+                    self._remove(root)
+        self.ready.set()
+
+    def start(self):
+        """Build the index and keep it fresh on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except OSError as e:
+                print(f"[!] Error refreshing project index: {e}")
+            self._refresh_now.wait(self.refresh_seconds)
+            self._refresh_now.clear()
+
+    # ---------- Lookup ----------
+    def search(self, spoken: str, limit: int = 5) -> list[tuple[float, str]]:
+        """
+        Best matching directories for a spoken name.
+
+        Returns:
+            list: (score between 0 and 1, path), best first.
+        """
+        query = clean_query(spoken)
+        if not query:
+            return []
+        phonetic = phonetic_key(query)
+
+        with self._lock:
+            scores: dict[str, float] = {}
+            for path in self._by_text.get(query, ()):
+                scores[path] = 1.0
+            for path in self._by_phonetic.get(phonetic, ()):
+                scores.setdefault(path, 0.95)
+
+            if not scores and phonetic:
+                # Every spoken word is a word of the name ("jarvis" -> "Jarvis-Assistant")
+                words = phonetic.split()
+                found = set.intersection(*(self._words.get(w, set()) for w in words))
+                for path in found:
+                    name_words = len(self._entries[path].phonetic.split())
+                    scores[path] = 0.75 + 0.2 * len(words) / name_words
+
+            if not scores:
+                # Trigram similarity (Dice) over the text and phonetic forms
+                grams = trigrams(query) | {f"#{g}" for g in trigrams(phonetic)}
+                common: Counter[str] = Counter()
+                for gram in grams:
+                    common.update(self._grams.get(gram, ()))
+                for path, count in common.items():
+                    scores[path] = (
+                        2 * count / (len(grams) + len(self._entries[path].grams))
+                    )
+
+            ranked = sorted(
+                scores.items(),
+                key=lambda item: (-item[1], self._entries[item[0]].depth, len(item[0])),
+            )
+        return [(round(score, 3), path) for path, score in ranked[:limit]]
+
+    def resolve(self, spoken: str) -> str | None:
+        """Path of the directory the user most likely meant, None if nothing is close."""
+        if self._thread is not None:
+            self.ready.wait(READY_TIMEOUT)
+        matches = self.search(spoken, limit=1)
+        if matches and matches[0][0] >= MIN_SCORE:
+            return matches[0][1]
+
+        if self._thread is not None:
+            # Maybe created since the last refresh
+            now = time.time()
+            if now - self._last_miss_refresh > 5:
+                self._last_miss_refresh = now
+                self._refresh_now.set()
+        return None
+
+
+_index: ProjectIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_project_index() -> ProjectIndex:
+    """The session's index over the projects and user folders, built in the background."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            # Imported here, constants imports the tools
+            from constants import DOWNLOADS_DIR, PROJECTS_DIR
+
+            home = os.path.expanduser("~")
+            _index = ProjectIndex(
+                [
+                    (PROJECTS_DIR, PROJECT_DEPTH),
+                    (DOWNLOADS_DIR, KNOWN_DIR_DEPTH),
+                    (os.path.join(home, "Desktop"), KNOWN_DIR_DEPTH),
+                    (os.path.join(home, "Documents"), KNOWN_DIR_DEPTH),
+                ]
+            )
+            _index.start()
+    return _index
+
+
+if __name__ == "__main__":
+    # python -m tools.project_index [directories]
+    import random
+    import sys
+    import tempfile
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(0)
+    # fmt: off
+    words = [
+        "web", "app", "api", "server", "client", "data", "ml", "bot", "game", "site",
+        "compiler", "parser", "chat", "notes", "portal", "vision", "audio", "tools",
+    ]
+    # fmt: on
+
+    with tempfile.TemporaryDirectory() as tmp:
+        groups = max(count // 100, 1)
+        for g in range(groups):
+            group = os.path.join(tmp, f"{rng.choice(words)}_group_{g}")
+            os.mkdir(group)
+            for i in range(count // groups - 1):
+                name = "-".join(rng.sample(words, 2)) + f"-{i}"
+                os.mkdir(os.path.join(group, name))
+        for name in (
+            "Jarvis-Assistant",
+            "jarvis",
+            "UniversityPortal",
+            "wake_word_training",
+        ):
+            os.mkdir(os.path.join(tmp, name))
+
+        index = ProjectIndex([(tmp, PROJECT_DEPTH)])
+        start_time = time.perf_counter()
+        index.refresh()
+        print(
+            f"Indexed {len(index)} directories in {time.perf_counter() - start_time:.2f}s"
+        )
+
+        queries = [
+            "el jarvis project",  # Fillers
+            "جارفيس",  # Arabic script
+            "university portal",  # Words of a CamelCase name
+            "wake word",  # Part of the name
+            "jarvs",  # Misspelled
+            "unversity portl",  # Misspelled, several words
+        ]
+        for query in queries:
+            runs = 200
+            start_time = time.perf_counter()
+            for _ in range(runs):
+                path = index.resolve(query)
+            elapsed = (time.perf_counter() - start_time) / runs
+            name = os.path.relpath(path, tmp) if path else None
+            print(f"  {query!r:22} -> {name!s:22} {elapsed * 1e6:8.1f} us")
+
+        start_time = time.perf_counter()
+        index.refresh()
+        unchanged = time.perf_counter() - start_time
+        os.mkdir(os.path.join(tmp, "new_project"))
+        listings = index.listings
+        start_time = time.perf_counter()
+        index.refresh()
+        print(
+            f"Refresh: unchanged {unchanged * 1000:.1f} ms, one new directory "
+            f"{(time.perf_counter() - start_time) * 1000:.1f} ms "
+            f"({index.listings - listings} listings), found: {index.resolve('new project')}"
+        )
@@ -0,0 +1,348 @@
+"""
+Lightweight span tracer for the conversation cycle.
+Each cycle is one trace; stages are nested spans with attributes (cache hits,
+model name, byte counts...). Finished traces are appended to a JSONL file, one
+line per span, and can be summarized with:
+    python tracing.py traces.jsonl
+
+Spans outside a trace are no-ops, and a span costs a few microseconds, so tracing
+can stay on in production.
+
+When stages overlap, the timeline view shows which ones set the cycle's length:
+    python tracing.py traces.jsonl --timeline 5
+"""
+
+import contextvars
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_FILE = "traces.jsonl"
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_ids = itertools.count(1)
+
+
+class Span:
+    __slots__ = (
+        "attributes",
+        "end_ns",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_ns",
+        "trace",
+    )
+
+    def __init__(self, name: str, trace: "_Trace | None", parent_id: int | None):
+        self.name = name
+        self.span_id = next(_ids)
+        self.parent_id = parent_id
+        self.trace = trace
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = 0
+        self.attributes: dict = {}
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds (so far, if still open)."""
+        end_ns = self.end_ns or time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set(self, **attributes):
+        """Attach attributes; dict values nest."""
+        self.attributes.update(attributes)
+
+
+class _Trace:
+    def __init__(self):
+        self.trace_id = f"{int(time.time() * 1000):x}-{next(_ids)}"
+        self.wall_start = time.time()
+        self.spans: list[Span] = []
+        self.lock = threading.Lock()
+
+
+class _NullSpan:
+    """Returned when there is no active trace, ignores everything."""
+
+    name = ""
+    duration = 0.0
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(
+        self,
+        path: str = TRACE_FILE,
+        enabled: bool = True,
+        echo: bool = True,
+        timeline: bool = False,
+    ):
+        self.path = path
+        self.enabled = enabled
+        # Print a one-line stage summary when a trace ends
+        self.echo = echo
+        # ...or the full timeline with the critical path
+        self.timeline = timeline
+        self._write_lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Start a new trace; its root span covers the whole block."""
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        trace = _Trace()
+        span = Span(name, trace, None)
+        span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(token)
+            with trace.lock:
+                trace.spans.append(span)
+            self._export(trace, span)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Nested span under the current one, a no-op outside a trace."""
+        parent = _current_span.get()
+        if parent is None or parent.trace is None:
+            yield _NULL_SPAN
+            return
+
+        span = Span(name, parent.trace, parent.span_id)
+        span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(token)
+            with parent.trace.lock:
+                parent.trace.spans.append(span)
+
+    def _export(self, trace: _Trace, root: Span):
+        records = []
+        for span in trace.spans:
+            record = {
+                "trace": trace.trace_id,
+                "span": span.span_id,
+                "parent": span.parent_id,
+                "name": span.name,
+                "start_ms": round((span.start_ns - root.start_ns) / 1e6, 3),
+                "duration_ms": round((span.end_ns - span.start_ns) / 1e6, 3),
+            }
+            if span is root:
+                record["time"] = trace.wall_start
+            if span.attributes:
+                record["attributes"] = span.attributes
+            records.append(record)
+        lines = [
+            json.dumps(record, ensure_ascii=False, default=str) for record in records
+        ]
+
+        try:
+            with self._write_lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"[!] Error writing trace: {e}")
+
+        if self.echo and self.timeline:
+            print(format_timeline(records))
+        elif self.echo:
+            stages = " | ".join(
+                f"{s.name} {s.duration:.2f}s" + _summary(s.attributes)
+                for s in trace.spans
+                if s.parent_id == root.span_id
+            )
+            print(f"⏱️ {stages} | total {root.duration:.2f}s")
+
+
+tracer = Tracer()
+
+
+def trace(name: str, **attributes):
+    return tracer.trace(name, **attributes)
+
+
+def span(name: str, **attributes):
+    return tracer.span(name, **attributes)
+
+
+def current_span() -> "Span | _NullSpan":
+    return _current_span.get() or _NULL_SPAN
+
+
+def set_attributes(**attributes):
+    """Attach attributes to the innermost open span."""
+    current_span().set(**attributes)
+
+
+def stage_timings() -> dict[str, float]:
+    """Durations (ms) of the spans of the current trace that have finished so far."""
+    span = _current_span.get()
+    if span is None or span.trace is None:
+        return {}
+    with span.trace.lock:
+        spans = list(span.trace.spans)
+    return {s.name: round((s.end_ns - s.start_ns) / 1e6, 1) for s in spans}
+
+
+# ================= Timeline =================
+def critical_path(records: list[dict]) -> list[dict]:
+    """
+    The stages (children of the root span) the trace's end waited on: walking
+    back from the end, each step takes the stage that finished last before the
+    current point.
+    """
+    root = next((r for r in records if r["parent"] is None), None)
+    if root is None:
+        return []
+    stages = [r for r in records if r["parent"] == root["span"]]
+
+    path = []
+    point = root["start_ms"] + root["duration_ms"]
+    while True:
+        candidates = [
+            r
+            for r in stages
+            if r not in path and r["start_ms"] + r["duration_ms"] <= point + 0.5
+        ]
+        if not candidates:
+            break
+        stage = max(candidates, key=lambda r: r["start_ms"] + r["duration_ms"])
+        path.append(stage)
+        point = stage["start_ms"]
+    return path[::-1]
+
+
+def _summary(attributes: dict) -> str:
+    """A span's "summary" attribute (e.g. the intent cache outcome), for the echo."""
+    return f" ({attributes['summary']})" if "summary" in attributes else ""
+
+
+def format_timeline(records: list[dict], width: int = 50) -> str:
+    """One bar per span, critical path stages drawn solid and marked with *."""
+    root = next((r for r in records if r["parent"] is None), None)
+    if root is None:
+        return ""
+    total = max(root["duration_ms"], 1e-3)
+    path = critical_path(records)
+    on_path = {r["span"] for r in path}
+
+    depth = {root["span"]: 0}
+    for record in sorted(records, key=lambda r: r["span"]):
+        if record["parent"] is not None:
+            depth[record["span"]] = depth.get(record["parent"], 0) + 1
+
+    lines = [
+        f"{root['name']} {total / 1000:.2f}s, critical path: "
+        + " -> ".join(r["name"] for r in path)
+    ]
+    for record in sorted(records, key=lambda r: (r["start_ms"], r["span"])):
+        if record is root:
+            continue
+        start = int(record["start_ms"] / total * width)
+        length = max(1, round(record["duration_ms"] / total * width))
+        bar = ("█" if record["span"] in on_path else "░") * length
+        name = "  " * (depth[record["span"]] - 1) + record["name"]
+        lines.append(
+            f"  {name:24} |{' ' * start}{bar:{width - start}}| "
+            f"{record['start_ms']:7.0f} {record['start_ms'] + record['duration_ms']:7.0f} ms"
+            + (" *" if record["span"] in on_path else "")
+            + _summary(record.get("attributes", {}))
+        )
+    return "\n".join(lines)
+
+
+def _read_traces(path: str) -> dict[str, list[dict]]:
+    traces: dict[str, list[dict]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            traces.setdefault(record["trace"], []).append(record)
+    return traces
+
+
+# ================= Summarizer =================
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    index = max(0, math.ceil(q / 100 * len(values)) - 1)
+    return values[index]
+
+
+def summarize(path: str = TRACE_FILE) -> dict[str, dict[str, float]]:
+    """Duration percentiles (ms) per span name."""
+    durations: dict[str, list[float]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            durations.setdefault(record["name"], []).append(record["duration_ms"])
+
+    summary = {}
+    for name, values in durations.items():
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "max": values[-1],
+        }
+    return summary
+
+
+def print_summary(summary: dict[str, dict[str, float]]):
+    print(
+        f"{'stage':28} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}"
+    )
+    for name, s in sorted(summary.items()):
+        print(
+            f"{name:28} {s['count']:7d} {s['p50']:10.1f} {s['p95']:10.1f} "
+            f"{s['p99']:10.1f} {s['max']:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Summarize recorded traces.")
+    parser.add_argument("path", nargs="?", default=TRACE_FILE)
+    parser.add_argument(
+        "--timeline",
+        type=int,
+        metavar="N",
+        help="Show the timelines of the last N traces",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No trace file at {args.path}")
+        sys.exit(1)
+    if args.timeline:
+        for records in list(_read_traces(args.path).values())[-args.timeline :]:
+            print(format_timeline(records) + "\n")
+    else:
+        print_summary(summarize(args.path))
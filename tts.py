@@ -1,21 +1,19 @@
 import asyncio
+import io
 import json
 import os
-import uuid
+import threading
+import time
 
 import edge_tts
-import pygame
+import numpy as np
 import soundfile as sf
-from pedalboard import (
-    Chorus,
-    Compressor,
-    Gain,
-    HighpassFilter,
-    LowpassFilter,
-    Pedalboard,
-    Phaser,  # noqa: F401
-    Reverb,
-)
+
+import audio_output
+import effects
+import tracing
+from cancellation_token import current_token
+from tts_cache import TTSCache
 
 # --- 1. BASE VOICE TUNING (The Source) ---
 # Ryan is the best base.
@@ -25,169 +23,379 @@ PITCH = "-8Hz"
 # Rate: Faster = more efficient/computer-like. +10% to +15%.
 RATE = "+15%"
 
-# Files
-BUFFER_FILE = "raw_audio.mp3"
-PROCESSED_FILE = "jarvis_output.wav"
+# Streaming
+# Decode once this many more MP3 frames have arrived (576 samples each at 24 kHz)
+DECODE_STEP_FRAMES = 8
+
+
+def voice_fingerprint() -> str:
+    """Everything besides the text that shapes a clip."""
+    return json.dumps(
+        {
+            "voice": VOICE,
+            "rate": RATE,
+            "pitch": PITCH,
+            "effects": effects.fingerprint(),
+        },
+        sort_keys=True,
+    )
+
+
+# Index of the previous cache layout
+LEGACY_CACHE_FILE = "responses_cache.json"
+
+# Clips keyed on (text, voice fingerprint), bounded in size.
+# Opened on first use, so processes that only render (warmup.py) never scan it.
+_response_cache: TTSCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> TTSCache:
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            if os.path.exists(LEGACY_CACHE_FILE):
+                os.remove(LEGACY_CACHE_FILE)
+            _response_cache = TTSCache(voice_fingerprint())
+    return _response_cache
+
+
+# ================= MP3 frames =================
+# Layer III only, which is what edge-tts sends (24 kHz mono MPEG-2)
+_BITRATES_KBPS = {
+    "mpeg1": (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    "mpeg2": (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by the header's version bits (0: MPEG-2.5, 2: MPEG-2, 3: MPEG-1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+# How far back (bytes) a frame's main data may start, in earlier frames
+_MAX_RESERVOIR_BYTES = 511
+
+
+def _mp3_frame(data: bytearray, pos: int) -> tuple[int, int, int] | None:
+    """
+    Parses the Layer III frame header at pos.
 
-# Cache
-CACHE_DIR = "responses"
-CACHE_FILE = "responses_cache.json"
+    Returns:
+        tuple: (frame length, side info start, side info length) in bytes,
+            None if there is no valid header at pos.
+    """
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 0b11
+    layer = (data[pos + 1] >> 1) & 0b11
+    bitrate_index = data[pos + 2] >> 4
+    rate_index = (data[pos + 2] >> 2) & 0b11
+    if version == 1 or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
 
-# In-memory cache
-_cache: dict[str, str] = {}
+    mpeg1 = version == 3
+    bitrate = _BITRATES_KBPS["mpeg1" if mpeg1 else "mpeg2"][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (data[pos + 2] >> 1) & 1
+    length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
 
+    mono = data[pos + 3] >> 6 == 0b11
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    crc = 0 if data[pos + 1] & 1 else 2
+    return length, pos + 4 + crc, side_info
 
-def _load_cache() -> dict[str, str]:
-    """Load cache from disk into memory."""
-    global _cache
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            _cache = json.load(f)
-    else:
-        _cache = {}
-    return _cache
 
+def _is_mpeg1(frame: bytearray) -> bool:
+    return frame[1] & 0x18 == 0x18
 
-def _save_cache():
-    """Save in-memory cache to disk."""
-    global _cache
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(_cache, f, indent=4, ensure_ascii=False)
 
+def _main_data_begin(frame: bytearray, side: int) -> int:
+    if _is_mpeg1(frame):  # 9 bits
+        return frame[side] << 1 | frame[side + 1] >> 7
+    return frame[side]
 
-def _get_cached_file(text: str) -> str | None:
-    """Check if text is cached and return the file path if it exists."""
-    if text in _cache:
-        cached_path = os.path.join(CACHE_DIR, _cache[text])
-        if os.path.exists(cached_path):
-            return cached_path
-    return None
 
+def _silence(frame: bytearray, side: int, side_info: int, main_data_begin: int):
+    """
+    Empties the frame's side info so it decodes to silence. It keeps a
+    main_data_begin: the decoder carries that much of the reservoir forward.
+    """
+    frame[side : side + side_info] = bytes(side_info)
+    if _is_mpeg1(frame):
+        main_data_begin = min(main_data_begin, _MAX_RESERVOIR_BYTES)
+        frame[side] = main_data_begin >> 1
+        frame[side + 1] = (main_data_begin & 1) << 7
+    else:
+        frame[side] = min(main_data_begin, 255)  # 8 bits in MPEG-2
 
-def _add_to_cache(text: str, filename: str):
-    """Add a new entry to the cache."""
-    _cache[text] = filename
-    _save_cache()
 
+class _StreamDecoder:
+    """
+    Decodes an MP3 stream that arrives in chunks, incrementally.
+    Only the frames that arrived since the last decode are decoded, after a few
+    warm-up frames that rebuild the decoder's state (the bit reservoir and the
+    filter bank overlap); their output is dropped. Only complete frames are
+    decoded, so nothing has to be held back.
+    """
 
-# Initialize cache on module load
-os.makedirs(CACHE_DIR, exist_ok=True)
-_load_cache()
+    def __init__(self):
+        self._data = bytearray()
+        # (offset, length, side info start, side info length) of complete frames
+        self._frames: list[tuple[int, int, int, int]] = []
+        self._parsed = 0  # End of the last complete frame (or skipped bytes)
+        self._released = 0  # Frames decoded so far
+        self._frame_samples = 576
+        self.sample_rate: int | None = None
+
+    def _parse(self):
+        data = self._data
+        while self._parsed + 4 <= len(data):
+            pos = self._parsed
+            if data[pos : pos + 3] == b"ID3":
+                if pos + 10 > len(data):
+                    return
+                size = 0
+                for byte in data[pos + 6 : pos + 10]:  # Syncsafe
+                    size = size << 7 | byte & 0x7F
+                if pos + 10 + size > len(data):
+                    return
+                self._parsed = pos + 10 + size
+                continue
+
+            frame = _mp3_frame(data, pos)
+            if frame is None:
+                self._parsed += 1  # Resync on the next header
+                continue
+            length, side_start, side_info = frame
+            if pos + length > len(data):
+                return  # Incomplete, wait for the rest
+            tag = data[side_start + side_info : side_start + side_info + 4]
+            if tag not in (b"Xing", b"Info") and data[pos + 36 : pos + 40] != b"VBRI":
+                self._frames.append((pos, *frame))  # Not a header frame without audio
+            self._frame_samples = 1152 if _is_mpeg1(data[pos : pos + 2]) else 576
+            self._parsed = pos + length
+
+    def _window(self) -> tuple[bytes, int]:
+        """
+        The new frames, after enough earlier frames for their bit reservoir and
+        one for the overlap. Warm-up frames whose own reservoir isn't in the window
+        are turned silent so the decoder doesn't reject them.
+        A silent frame is appended: the decoder's length estimate can fall a few
+        samples short of the last frame.
+
+        Returns:
+            tuple: (MP3 data, number of warm-up frames)
+        """
+        first = max(0, self._released - 2)
+        reservoir = 0
+        while first > 0 and reservoir < _MAX_RESERVOIR_BYTES:
+            first -= 1
+            offset, length, side_start, side_info = self._frames[first]
+            reservoir += offset + length - side_start - side_info
+
+        window = bytearray()
+        # The decoder can step back into the previous frame's data and the part
+        # of the reservoir that frame stepped back into itself
+        available = 0
+        for offset, length, side_start, side_info in self._frames[first:]:
+            frame = self._data[offset : offset + length]
+            side = side_start - offset
+            main_data_begin = _main_data_begin(frame, side)
+            if main_data_begin > available:
+                # Still carries its data for the next frames
+                _silence(frame, side, side_info, available)
+                main_data_begin = _main_data_begin(frame, side)
+            window += frame
+            available = main_data_begin + length - side - side_info
+
+        # The last frame's header, with nothing after it
+        window += self._data[offset:side_start] + bytes(length - side)
+        return bytes(window), self._released - first
+
+    def _decode(self) -> np.ndarray:
+        """The frames that arrived since the last decode."""
+        new_frames = len(self._frames) - self._released
+        if not new_frames:
+            return np.zeros(0, dtype=np.float32)
+        window, warm_up = self._window()
+        try:
+            audio, self.sample_rate = sf.read(io.BytesIO(window), dtype="float32")
+        except sf.SoundFileError:
+            return np.zeros(0, dtype=np.float32)
+        self._released = len(self._frames)
+        audio = audio if audio.ndim == 1 else audio.mean(axis=1)
+        start = warm_up * self._frame_samples
+        return audio[start : start + new_frames * self._frame_samples]
+
+    def feed(self, chunk: bytes) -> np.ndarray:
+        """Adds MP3 bytes, returns the newly decoded samples (maybe none)."""
+        self._data += chunk
+        self._parse()
+        if len(self._frames) - self._released < DECODE_STEP_FRAMES:
+            return np.zeros(0, dtype=np.float32)
+        return self._decode()
+
+    def finish(self) -> np.ndarray:
+        """The rest of the audio, once the stream has ended."""
+        return self._decode()
+
+
+async def _stream_blocks(text: str, on_block):
+    """Synthesizes text and calls on_block(samples, sample_rate) as audio is decoded."""
+    communicate = edge_tts.Communicate(text, VOICE, rate=RATE, pitch=PITCH)
+    decoder = _StreamDecoder()
+    async for chunk in communicate.stream():
+        if chunk["type"] != "audio":
+            continue
+        block = decoder.feed(chunk["data"])
+        if len(block):
+            on_block(block, decoder.sample_rate)
+
+    block = decoder.finish()
+    if len(block):
+        on_block(block, decoder.sample_rate)
+
+
+def play(path: str):
+    """Plays a clip returned by synthesize() and waits for it to finish."""
+    with tracing.span("tts.playback") as span:
+        start_time = time.perf_counter()
+        playback = audio_output.get_engine().play_file(path)
+        # An abort cuts the response off instead of letting it finish
+        remove = current_token().on_cancel(playback.stop)
+        try:
+            playback.started.wait()
+            span.set(start_ms=round((playback.started_at - start_time) * 1000, 2))
+            playback.wait()
+        finally:
+            remove()
 
 
-async def _generate_audio(text):
-    communicate = edge_tts.Communicate(text, VOICE, rate=RATE, pitch=PITCH)
-    await communicate.save(BUFFER_FILE)
+def preload(text: str) -> bool:
+    """Decodes the cached clip for the text into the playback engine's memory."""
+    path = get_response_cache().peek(text)
+    if path is None:
+        return False
+    audio_output.get_engine().preload(path)
+    return True
 
 
-def _process_audio_dsp():
+def render(text: str) -> tuple[np.ndarray, int] | None:
     """
-    Applies the 'Iron Man Helmet' effects chain.
+    Synthesizes and processes a clip in memory, without touching the cache
+    (safe to run in worker processes).
+
+    Returns:
+        tuple: (samples, sample_rate), None on failure.
     """
     try:
-        # Load audio (Pedalboard requires reading via soundfile)
-        audio, sample_rate = sf.read(BUFFER_FILE)
-
-        # --- 2. THE EFFECT CHAIN (The Tuning Lab) ---
-        # Modify these numbers to change the 'flavor' of the robot
-
-        board = Pedalboard(
-            [
-                # A. PRE-FILTERING
-                # Cutting lows makes him sound crisp/digital.
-                HighpassFilter(cutoff_frequency_hz=200),
-                # B. COMPRESSION
-                # Keeps his voice volume perfectly steady, never whispering, never shouting.
-                Compressor(threshold_db=-15, ratio=4),
-                #
-                # C. THE ROBOTIC TEXTURE (Choose ONE or mix gently)
-                # OPTION 1: CHORUS (The "Metallic Sheen") - Preferred for Jarvis
-                # Makes it sound like the voice is coming from multiple slightly sync-off speakers.
-                Chorus(rate_hz=1.0, depth=0.1, mix=0.3),
-                # OPTION 2: PHASER (The "Sci-Fi" wobble) - Use very low mix or it sounds like C-3PO
-                # Phaser(rate_hz=0.5, depth=0.1, mix=0.1),
-                #
-                # D. SPACE (The "Helmet" Environment)
-                Reverb(room_size=0.1, damping=0.8, wet_level=0.1, dry_level=0.9),
-                #
-                # E. FINAL POLISH
-                # Cutting ultra-high frequencies removes digital hiss
-                LowpassFilter(cutoff_frequency_hz=7000),
-                # Boost volume back up after filtering
-                Gain(gain_db=3),
-            ]
-        )
-
-        # Run the effects
-        processed_audio = board(audio, sample_rate)
-
-        # Save result
-        sf.write(PROCESSED_FILE, processed_audio, sample_rate)
-        return True
+        with effects.effects_engine() as fx:
+            blocks = []
+            sample_rate = 0
+
+            def on_block(block: np.ndarray, rate: int):
+                nonlocal sample_rate
+                sample_rate = rate
+                blocks.append(fx.process(block, rate))
+
+            asyncio.run(_stream_blocks(text, on_block))
+            if not sample_rate:
+                return None
+            blocks.append(fx.flush(sample_rate))
+        return np.concatenate(blocks), sample_rate
 
     except Exception as e:
-        print(f"[!] DSP Error: {e}")
-        return False
+        print(f"[!] Synthesis Error: {e}")
+        return None
+
+
+def synthesize(text: str) -> str | None:
+    """
+    Generates the processed clip for the text, or finds it in the cache.
+    Split from playback so synthesis can overlap other work (see pipeline.py).
+
+    Returns:
+        str: Path of the clip to play, None on failure.
+    """
+    with tracing.span("tts.synth", chars=len(text), voice=VOICE) as span:
+        # Check cache first
+        cached_file = get_response_cache().get(text)
+        span.set(cached=cached_file is not None)
+        if cached_file:
+            return cached_file
+
+        clip = render(text)
+        if clip is None:
+            return None
+        return get_response_cache().put(text, *clip)
+
+
+def _speak_streaming(text: str):
+    """
+    Plays the response while it is still being synthesized: every decoded block
+    goes through the effects and straight to the output, and is kept in memory
+    for the cache.
+    """
+    with tracing.span("tts.stream", chars=len(text), voice=VOICE) as span:
+        start_time = time.perf_counter()
+        playback = audio_output.get_engine().stream()
+        blocks = []
+        sample_rate = 0
+
+        with effects.effects_engine() as fx:
+
+            def on_block(block: np.ndarray, rate: int):
+                nonlocal sample_rate
+                sample_rate = rate
+                processed = fx.process(block, rate)
+                if not len(processed):
+                    return  # Less than a block so far
+                if not blocks:
+                    span.set(
+                        first_audio_ms=round(
+                            (time.perf_counter() - start_time) * 1000, 1
+                        )
+                    )
+                blocks.append(processed)
+                playback.append(audio_output.resample(processed, rate))
+
+            # An abort cuts the response off, the clip is still cached
+            remove = current_token().on_cancel(playback.stop)
+            try:
+                asyncio.run(_stream_blocks(text, on_block))
+                if sample_rate:
+                    # The rest, with the reverb tail
+                    blocks.append(fx.flush(sample_rate))
+                    playback.append(audio_output.resample(blocks[-1], sample_rate))
+            finally:
+                playback.close()
+        try:
+            playback.wait()
+        finally:
+            remove()
+
+        if blocks:
+            get_response_cache().put(text, np.concatenate(blocks), sample_rate)
+        span.set(blocks=len(blocks))
 
 
 def speak(text: str):
     print(f"🗣️ Jarvis: {text}")
 
     # Check cache first
-    cached_file = _get_cached_file(text)
+    cached_file = get_response_cache().get(text)
     if cached_file:
         try:
-            pygame.mixer.init()
-            pygame.mixer.music.load(cached_file)
-            pygame.mixer.music.play()
-
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
+            play(cached_file)
             return
         except Exception as e:
             print(f"[!] Cache Playback Error: {e}")
             # Fall through to regenerate
-        finally:
-            pygame.mixer.quit()
 
     try:
-        # 1. Generate Raw
-        asyncio.run(_generate_audio(text))
-
-        # 2. Process
-        if _process_audio_dsp():
-            # Generate unique filename and cache it
-            unique_id = uuid.uuid4().hex[:8]
-            cached_filename = f"response_{unique_id}.wav"
-            cached_path = os.path.join(CACHE_DIR, cached_filename)
-
-            # Move processed file to cache
-            os.rename(PROCESSED_FILE, cached_path)
-            _add_to_cache(text, cached_filename)
-
-            playback_file = cached_path
-        else:
-            playback_file = BUFFER_FILE
-
-        # 3. Play
-        pygame.mixer.init()
-        try:
-            pygame.mixer.music.load(playback_file)
-            pygame.mixer.music.play()
-
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-        finally:
-            pygame.mixer.quit()
-
+        _speak_streaming(text)
     except Exception as e:
         print(f"[!] Playback Error: {e}")
-    finally:
-        # Cleanup temp files only (cached files are kept)
-        if os.path.exists(BUFFER_FILE):
-            os.remove(BUFFER_FILE)
-        if os.path.exists(PROCESSED_FILE):
-            os.remove(PROCESSED_FILE)
 
 
 if __name__ == "__main__":
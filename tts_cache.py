@@ -0,0 +1,205 @@
+"""
+Content-addressed cache of synthesized responses.
+A clip is stored as <sha256>.wav, keyed on the text and a fingerprint of
+everything that shapes the audio (voice, rate, pitch, effects chain), so
+retuning the voice simply stops matching the old clips, which then age out.
+
+The index is a small SQLite table (one row per clip, updated in place), clip
+files are written atomically, and the least recently used clips are evicted
+once the cache is over its byte budget. A startup scan drops index rows whose
+file is gone and files the index doesn't know about.
+"""
+
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+CACHE_DIR = "responses"
+INDEX_FILE = "index.sqlite3"
+MAX_BYTES = 200 * 1024 * 1024
+
+
+class TTSCache:
+    def __init__(
+        self, fingerprint: str, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES
+    ):
+        self.fingerprint = fingerprint
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, INDEX_FILE),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS clips ("
+            " key TEXT PRIMARY KEY, text TEXT, size INTEGER,"
+            " created REAL, last_used REAL, hits INTEGER DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS clips_last_used ON clips (last_used)"
+        )
+
+        self._scan()
+        self.total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM clips"
+        ).fetchone()[0]
+        self._evict()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.fingerprint}\0{text}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def _scan(self):
+        """Startup integrity check between the index and the files on disk."""
+        files = {}
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp") or name.startswith("response_"):
+                # Interrupted writes, and clips from the old layout
+                os.remove(path)
+            elif name.endswith(".wav"):
+                files[name[:-4]] = os.path.getsize(path)
+
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM clips").fetchall():
+            if files.pop(key, None) != size:
+                stale.append((key,))
+        self._db.executemany("DELETE FROM clips WHERE key = ?", stale)
+
+        # Whatever is left isn't indexed
+        for key in files:
+            os.remove(self._path(key))
+
+    def get(self, text: str) -> str | None:
+        """Path of the cached clip for the text, if any."""
+        key = self.key(text)
+        path = self._path(key)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size FROM clips WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(path):
+                self._db.execute("DELETE FROM clips WHERE key = ?", (key,))
+                self.total_bytes -= row[0]
+                return None
+            self._db.execute(
+                "UPDATE clips SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+        return path
+
+    def peek(self, text: str) -> str | None:
+        """Like get(), without counting as a use."""
+        key = self.key(text)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM clips WHERE key = ?", (key,)
+            ).fetchone()
+        path = self._path(key)
+        return path if row is not None and os.path.exists(path) else None
+
+    def contains(self, text: str) -> bool:
+        return self.peek(text) is not None
+
+    def most_used(self, limit: int) -> list[str]:
+        """Texts of the most played clips."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT text FROM clips ORDER BY hits DESC, last_used DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [text for (text,) in rows]
+
+    def put(self, text: str, audio: np.ndarray, sample_rate: int) -> str:
+        """Stores a clip (atomically) and returns its path."""
+        key = self.key(text)
+        path = self._path(key)
+
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, sample_rate, format="WAV", subtype="PCM_16")
+        data = buffer.getvalue()
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size FROM clips WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO clips (key, text, size, created, last_used, hits)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, text, len(data), now, now),
+            )
+            self.total_bytes += len(data) - (old[0] if old else 0)
+            self._evict()
+        return path
+
+    def _evict(self):
+        """Drop the least recently used clips until the cache fits its budget."""
+        while self.total_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM clips ORDER BY last_used LIMIT 16"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+                self._db.execute("DELETE FROM clips WHERE key = ?", (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            count, hits = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM clips"
+            ).fetchone()
+        return {"clips": count, "hits": hits, "bytes": self.total_bytes}
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio = np.zeros(24000, dtype=np.float32)  # 1 s, about 48 KB as 16-bit WAV
+        cache = TTSCache("voice-a", tmp, max_bytes=150 * 1024)
+
+        start_time = time.perf_counter()
+        for i in range(10):
+            cache.put(f"phrase {i}", audio, 24000)
+        per_put = (time.perf_counter() - start_time) / 10
+        print(f"Put: {per_put * 1000:.2f} ms per clip, {cache.stats()}")
+
+        print(f"Recent clip hit: {cache.get('phrase 9') is not None}")
+        print(f"Evicted oldest: {cache.get('phrase 0') is None}")
+        print(f"Other voice misses: {TTSCache('voice-b', tmp).get('phrase 9') is None}")
+
+        os.remove(cache._path(cache.key("phrase 9")))
+        open(os.path.join(tmp, "stray.wav"), "wb").close()
+        rescanned = TTSCache("voice-a", tmp)
+        print(
+            f"After scan: {rescanned.stats()}, stray removed: "
+            f"{not os.path.exists(os.path.join(tmp, 'stray.wav'))}"
+        )
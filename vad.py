@@ -0,0 +1,252 @@
+"""
+Frame-level voice activity endpointer.
+Decides when a spoken command has ended, replacing the fixed 1.3 s pause
+threshold and static energy threshold of speech_recognition.
+
+Energy is computed per 10 ms subframe in one vectorized pass per frame, against a
+noise floor that adapts to the room. The command ends after a short hangover of
+silence following speech.
+"""
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+SUBFRAME_SAMPLES = 160  # 10 ms
+
+# Speech must be this much louder than the noise floor
+SPEECH_MARGIN_DB = 12.0
+# ...and never quieter than this (dBFS), so a silent room isn't "speech"
+MIN_SPEECH_DB = -50.0
+# Consecutive speech needed before the command counts as started
+START_SECONDS = 0.06
+# Silence after speech that ends the command (tuned for short commands)
+HANGOVER_SECONDS = 0.5
+
+# Noise floor tracking per subframe: follow drops quickly, rises slowly.
+# It still creeps up during speech so steady loud noise can't stay "speech" forever.
+FLOOR_FALL = 0.5
+FLOOR_RISE = 0.02
+FLOOR_RISE_IN_SPEECH = 0.002
+
+
+def energies_db(samples: np.ndarray) -> np.ndarray:
+    """
+    Energy in dBFS of every 10 ms subframe of int16 samples
+    (trailing samples that don't fill a subframe are ignored).
+    """
+    count = len(samples) // SUBFRAME_SAMPLES
+    subframes = samples[: count * SUBFRAME_SAMPLES].reshape(count, SUBFRAME_SAMPLES)
+    power = np.mean(np.square(subframes, dtype=np.float64), axis=1) / (32768.0**2)
+    return 10.0 * np.log10(power + 1e-10)
+
+
+class Endpointer:
+    """
+    Streaming end-of-speech detector. Feed int16 frames of any size in order.
+    """
+
+    def __init__(
+        self,
+        hangover_seconds: float = HANGOVER_SECONDS,
+        margin_db: float = SPEECH_MARGIN_DB,
+        min_speech_db: float = MIN_SPEECH_DB,
+        start_seconds: float = START_SECONDS,
+    ):
+        subframe_seconds = SUBFRAME_SAMPLES / SAMPLE_RATE
+        self.hangover_subframes = max(1, round(hangover_seconds / subframe_seconds))
+        self.start_subframes = max(1, round(start_seconds / subframe_seconds))
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.reset()
+
+    def reset(self):
+        self.noise_floor: float | None = None
+        self.speech_detected = False
+        # Sample positions (from the first sample fed) of the detected speech
+        self.speech_start_sample = 0
+        self.speech_end_sample = 0
+
+        self._subframe = 0
+        self._speech_run = 0
+        self._silence_run = 0
+        self._in_speech = False
+        self._leftover = np.zeros(0, dtype=np.int16)
+
+    @property
+    def silence_seconds(self) -> float:
+        """Length of the current run of silence."""
+        return self._silence_run * SUBFRAME_SAMPLES / SAMPLE_RATE
+
+    @property
+    def is_speaking(self) -> bool:
+        return self._in_speech
+
+    def process(self, frame: np.ndarray) -> bool:
+        """
+        Feed the next frame of audio.
+
+        Returns:
+            bool: True while the command is over (speech was heard and has been
+                followed by at least the hangover of silence).
+        """
+        samples = (
+            np.concatenate([self._leftover, frame]) if len(self._leftover) else frame
+        )
+        usable = len(samples) - len(samples) % SUBFRAME_SAMPLES
+        self._leftover = samples[usable:]
+
+        for energy in energies_db(samples[:usable]):
+            self._update(float(energy))
+
+        return self.speech_detected and self._silence_run >= self.hangover_subframes
+
+    def _update(self, energy: float):
+        if self.noise_floor is None:
+            self.noise_floor = energy
+
+        is_speech = energy > max(self.noise_floor + self.margin_db, self.min_speech_db)
+
+        # Adapt the noise floor
+        if energy < self.noise_floor:
+            self.noise_floor += FLOOR_FALL * (energy - self.noise_floor)
+        elif is_speech or self._in_speech:
+            self.noise_floor += FLOOR_RISE_IN_SPEECH * (energy - self.noise_floor)
+        else:
+            self.noise_floor += FLOOR_RISE * (energy - self.noise_floor)
+
+        if is_speech:
+            self._speech_run += 1
+            self._silence_run = 0
+            if self._speech_run >= self.start_subframes:
+                if not self.speech_detected:
+                    self.speech_detected = True
+                    self.speech_start_sample = (
+                        self._subframe - self._speech_run + 1
+                    ) * SUBFRAME_SAMPLES
+                self._in_speech = True
+            if self._in_speech:
+                self.speech_end_sample = (self._subframe + 1) * SUBFRAME_SAMPLES
+        else:
+            self._speech_run = 0
+            self._silence_run += 1
+            if self._silence_run >= self.hangover_subframes:
+                self._in_speech = False
+
+        self._subframe += 1
+
+
+# ================= Offline evaluation =================
+# Recordings made with the old speech_recognition recorder keep
+# non_speaking_duration (0.5 s) of silence after the end of speech.
+LEGACY_TRAILING_SILENCE = 0.5
+
+
+def evaluate(
+    directory: str,
+    labels: dict[str, float] | None = None,
+    hangover_seconds: float = HANGOVER_SECONDS,
+    frame_samples: int = 1280,
+) -> list[dict]:
+    """
+    Streams every recording in a directory through the endpointer, frame by frame as it
+    would arrive from the microphone, and measures endpoint latency.
+
+    Args:
+        directory (str): Folder with 16 kHz recordings (FLAC or WAV).
+        labels (dict | None): filename -> true end of speech in seconds.
+            Files without a label use their duration minus LEGACY_TRAILING_SILENCE.
+        hangover_seconds (float): Hangover to evaluate.
+
+    Returns:
+        list[dict]: One result per file.
+    """
+    import os
+
+    from recording_archive import list_recordings, read_recording
+
+    results = []
+    for path in list_recordings(directory):
+        samples = read_recording(path, SAMPLE_RATE)
+        if samples is None:
+            continue
+
+        name = os.path.basename(path)
+        duration = len(samples) / SAMPLE_RATE
+        true_end = (labels or {}).get(name, duration - LEGACY_TRAILING_SILENCE)
+
+        # Pad with low-level noise so the endpoint can fire after the file ends
+        rng = np.random.default_rng(0)
+        padding = rng.normal(0, 20, 3 * SAMPLE_RATE).astype(np.int16)
+        stream = np.concatenate([samples, padding])
+
+        endpointer = Endpointer(hangover_seconds=hangover_seconds)
+        detected = None
+        for start in range(0, len(stream), frame_samples):
+            if endpointer.process(stream[start : start + frame_samples]):
+                detected = min(start + frame_samples, len(stream)) / SAMPLE_RATE
+                break
+
+        results.append(
+            {
+                "file": name,
+                "true_end": true_end,
+                "detected": detected,
+                "latency": None if detected is None else detected - true_end,
+                "speech_end": endpointer.speech_end_sample / SAMPLE_RATE,
+            }
+        )
+    return results
+
+
+def _load_labels(path: str) -> dict[str, float]:
+    """CSV lines of: filename,end_of_speech_seconds"""
+    import csv
+
+    labels = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and not row[0].startswith("#"):
+                try:
+                    labels[row[0].strip()] = float(row[1])
+                except ValueError:
+                    continue  # Header
+    return labels
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Evaluate the endpointer on saved recordings."
+    )
+    parser.add_argument("directory", nargs="?", default="recordings")
+    parser.add_argument("--labels", help="CSV of filename,end_of_speech_seconds")
+    parser.add_argument("--hangover", type=float, default=HANGOVER_SECONDS)
+    args = parser.parse_args()
+
+    results = evaluate(
+        args.directory,
+        _load_labels(args.labels) if args.labels else None,
+        hangover_seconds=args.hangover,
+    )
+    if not results:
+        print(f"No 16 kHz recordings found in {args.directory}")
+        sys.exit(1)
+
+    for r in results:
+        latency = "missed" if r["latency"] is None else f"{r['latency'] * 1000:+.0f} ms"
+        print(f"{r['file']:40} true end {r['true_end']:6.2f}s  endpoint {latency}")
+
+    latencies = np.array([r["latency"] for r in results if r["latency"] is not None])
+    missed = len(results) - len(latencies)
+    print(f"\nFiles: {len(results)}, missed: {missed}")
+    if len(latencies):
+        early = int(np.sum(latencies < 0))
+        print(
+            f"Endpoint latency: mean {latencies.mean() * 1000:.0f} ms, "
+            f"p50 {np.percentile(latencies, 50) * 1000:.0f} ms, "
+            f"p95 {np.percentile(latencies, 95) * 1000:.0f} ms, "
+            f"cut early: {early}"
+        )
+        print("Previous fixed pause threshold: 1300 ms")
@@ -0,0 +1,283 @@
+"""
+Wake-word engine shared by every keyword.
+One openWakeWord Model holds all keyword heads, so the melspectrogram and
+embedding front-end runs once per frame and every head scores the same features.
+One thread reads the shared capture; keywords are armed by state ("jarvis" while
+idle, "insa" while processing) and the front-end is skipped while nothing is armed.
+
+The inference backend (TFLite or ONNX), thread count and catch-up size are set
+in constants; python wakeword.py benchmarks them on this machine. The thread
+count is openWakeWord's ncpu, which only applies to the shared front-end (not to
+the keyword heads). Catch-up is not batching: openWakeWord still scores the
+frames of a predict call one by one, it only lets a lagging engine clear its
+backlog in fewer calls.
+"""
+
+import threading
+from collections.abc import Callable
+
+import numpy as np
+from openwakeword.model import Model
+
+from audio_capture import MicrophoneCapture
+from constants import (
+    INSA_DETECTION_THRESHOLD,
+    JARVIS_DETECTION_THRESHOLD,
+    WAKEWORD_BACKEND,
+    WAKEWORD_CATCHUP_FRAMES,
+    WAKEWORD_THREADS,
+)
+
+# Keyword -> detection threshold, the model file is <keyword>.tflite or .onnx
+KEYWORDS = {
+    "jarvis": JARVIS_DETECTION_THRESHOLD,
+    "insa": INSA_DETECTION_THRESHOLD,
+}
+
+# Backend -> model file extension (both are shipped for every keyword)
+BACKENDS = {"tflite": "tflite", "onnx": "onnx"}
+
+
+def load_model(
+    names, backend: str = WAKEWORD_BACKEND, threads: int = WAKEWORD_THREADS
+) -> Model:
+    """One openWakeWord model scoring every keyword in names."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown wake word backend: {backend}")
+    return Model(
+        wakeword_models=[f"{name}.{BACKENDS[backend]}" for name in names],
+        inference_framework=backend,
+        ncpu=threads,
+    )
+
+
+class WakeWordEngine:
+    def __init__(
+        self,
+        capture: MicrophoneCapture,
+        keywords: dict[str, float] = KEYWORDS,
+        backend: str = WAKEWORD_BACKEND,
+        threads: int = WAKEWORD_THREADS,
+        catchup_frames: int = WAKEWORD_CATCHUP_FRAMES,
+    ):
+        self.capture = capture
+        self.thresholds = dict(keywords)
+        self.model = load_model(keywords, backend, threads)
+        self.catchup_frames = max(1, catchup_frames)
+
+        self._armed: set[str] = set()
+        self._listeners: dict[str, list[Callable[[str, int], None]]] = {
+            name: [] for name in keywords
+        }
+        self._events = {name: threading.Event() for name in keywords}
+        # Capture frame index right after the last detection of each keyword
+        self.detection_frame = {name: 0 for name in keywords}
+
+        self._lock = threading.Lock()
+        self._reset_pending = False
+        self._running = False
+        self._thread = None
+
+        # Stats
+        self.frames_scored = 0
+
+    def add_listener(self, name: str, callback: Callable[[str, int], None]):
+        """callback(name, frame) runs on the engine thread when the keyword fires."""
+        self._listeners[name].append(callback)
+
+    def arm(self, *names: str):
+        """Start scoring keywords. A detection disarms the keyword until armed again."""
+        with self._lock:
+            for name in names:
+                self._events[name].clear()
+            self._armed.update(names)
+            # Features and score history from before are stale
+            # (and a continuous wake word would fire again)
+            self._reset_pending = True
+
+    def disarm(self, *names: str):
+        with self._lock:
+            self._armed.difference_update(names)
+
+    def wait(self, name: str, timeout: float | None = None) -> bool:
+        """Block until the keyword is detected (after it was armed)."""
+        return self._events[name].wait(timeout)
+
+    def _run(self):
+        try:
+            with self.capture.subscribe() as subscription:
+                while self._running:
+                    audio_np = subscription.read(timeout=0.5)
+                    if audio_np is None:
+                        continue
+
+                    with self._lock:
+                        armed = tuple(self._armed)
+                        reset, self._reset_pending = self._reset_pending, False
+                    if not armed:
+                        continue  # Nothing to listen for, skip inference
+                    if reset:
+                        self.model.reset()
+
+                    # When behind, catch up on the queued frames in one call
+                    # (scored one by one inside, the max score is returned)
+                    frames = [audio_np]
+                    while len(frames) < self.catchup_frames and subscription.pending():
+                        frame = subscription.read(timeout=0)
+                        if frame is None:
+                            break
+                        frames.append(frame)
+                    if len(frames) > 1:
+                        audio_np = np.concatenate(frames)
+
+                    predictions = self.model.predict(audio_np)
+                    self.frames_scored += len(frames)
+
+                    for name in armed:
+                        if predictions.get(name, 0) >= self.thresholds[name]:
+                            self._fire(name, subscription.last_index + 1)
+
+        # The engine stops on any model or capture error, reported in one line
+        except Exception as e:  # noqa: BLE001
+            print(f"Error in wake word thread: {e}")
+
+    def _fire(self, name: str, frame: int):
+        with self._lock:
+            if name not in self._armed:
+                return  # Disarmed meanwhile
+            self._armed.discard(name)
+        self.detection_frame[name] = frame
+        self._events[name].set()
+        for callback in self._listeners[name]:
+            # A failing listener must not keep the others from running
+            try:
+                callback(name, frame)
+            except Exception as e:  # noqa: BLE001
+                print(f"[!] Error in wake word listener: {e}")
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+# ================= Benchmark =================
+def _bench(
+    backend: str,
+    threads: int,
+    catchup_frames: int,
+    shared: bool,
+    seconds: float,
+    wav_path: str | None,
+) -> dict[str, float]:
+    """
+    Scores the same audio for a fixed time and measures wall and CPU time per
+    frame, and the memory taken by the models. Runs in a fresh process.
+    With catch-up > 1 the per-frame latency is a call's time divided by its
+    frames, a detection still waits for the whole call.
+    """
+    import time
+
+    from benchmark_utils import current_rss_mb
+
+    if wav_path:
+        import wave
+
+        with wave.open(wav_path, "rb") as wf:
+            audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    else:
+        audio = np.random.default_rng(0).normal(0, 300, 8 * 16000).astype(np.int16)
+
+    chunk = 1280 * catchup_frames
+    chunks = [audio[i : i + chunk] for i in range(0, len(audio) - chunk + 1, chunk)]
+
+    rss_before = current_rss_mb()
+    if shared:
+        models = [load_model(KEYWORDS, backend, threads)]
+    else:
+        models = [load_model([name], backend, threads) for name in KEYWORDS]
+
+    # Warm up
+    for audio_chunk in chunks[:10]:
+        for model in models:
+            model.predict(audio_chunk)
+
+    latencies = []
+    cpu_start = time.process_time()
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < seconds:
+        audio_chunk = chunks[len(latencies) % len(chunks)]
+        call_start = time.perf_counter()
+        for model in models:
+            model.predict(audio_chunk)
+        latencies.append((time.perf_counter() - call_start) / catchup_frames)
+    elapsed = time.perf_counter() - start_time
+    cpu = time.process_time() - cpu_start
+    rss_after = current_rss_mb()
+
+    frames = len(latencies) * catchup_frames
+    latencies.sort()
+    return {
+        "frames_per_second": frames / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "cpu_ms": cpu / frames * 1000,
+        "rss_mb": None if rss_before is None else rss_after - rss_before,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import multiprocessing
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark wake word inference per backend, thread count and catch-up size."
+    )
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--threads", nargs="+", type=int, default=[1])
+    parser.add_argument("--catchup", nargs="+", type=int, default=[1])
+    parser.add_argument(
+        "--separate", action="store_true", help="Also run one model per keyword"
+    )
+    parser.add_argument("--wav", help="16 kHz recording to score (default: noise)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    setups = [
+        (backend, threads, catchup, shared)
+        for backend in args.backends
+        for threads in args.threads
+        for catchup in args.catchup
+        for shared in ((False, True) if args.separate else (True,))
+    ]
+
+    print(
+        f"{'backend':8} {'threads':>7} {'catchup':>7} {'models':>8} {'frames/s':>9} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'cpu ms':>7} {'RSS MB':>7}"
+    )
+    # Each setup in a fresh process so memory is measured separately
+    context = multiprocessing.get_context("spawn")
+    for backend, threads, catchup, shared in setups:
+        with context.Pool(1) as pool:
+            try:
+                r = pool.apply(
+                    _bench, (backend, threads, catchup, shared, args.seconds, args.wav)
+                )
+            # Missing runtime or model file, unknown backend, inference failure
+            except (ImportError, OSError, RuntimeError, ValueError) as e:
+                print(f"[!] {backend}: {e}")
+                continue
+        rss = "n/a" if r["rss_mb"] is None else f"{r['rss_mb']:.1f}"
+        print(
+            f"{backend:8} {threads:7d} {catchup:7d} {'shared' if shared else 'separate':>8} "
+            f"{r['frames_per_second']:9.0f} {r['p50_ms']:7.2f} {r['p95_ms']:7.2f} "
+            f"{r['cpu_ms']:7.2f} {rss:>7}"
+        )
@@ -0,0 +1,183 @@
+"""
+Offline wake-word evaluation and threshold sweep.
+Streams labelled corpora through the detector, as fast as the CPU allows:
+    positive/  one utterance of the keyword per file
+    negative/  anything else (speech, music, room noise), ideally hours of it
+
+Files are scored in parallel (one model per worker process) and the per-frame
+scores are swept over thresholds, reporting false accepts per hour on the
+negatives and the false reject rate on the positives:
+    python wakeword_eval.py jarvis --positive data/jarvis --negative data/negative
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from constants import WAKEWORD_BACKEND
+from recording_archive import list_recordings, read_recording
+from wakeword import KEYWORDS, load_model
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 1280
+FRAME_SECONDS = FRAME_SAMPLES / SAMPLE_RATE
+
+# After an accept, detections this close count as the same one
+REFRACTORY_SECONDS = 1.0
+
+# Per worker process
+_model = None
+_keyword = ""
+
+
+def _init_worker(keyword: str, backend: str):
+    global _model, _keyword
+    _keyword = keyword
+    _model = load_model([keyword], backend)
+
+
+def _score_file(path: str) -> tuple[str, np.ndarray | None]:
+    """Per-frame scores of one file, streamed frame by frame like the live engine."""
+    samples = read_recording(path, SAMPLE_RATE)
+    if samples is None:
+        return path, None
+
+    # Pad to whole frames and frame everything in one reshape
+    count = -(-len(samples) // FRAME_SAMPLES)
+    padded = np.zeros(count * FRAME_SAMPLES, dtype=np.int16)
+    padded[: len(samples)] = samples
+    frames = padded.reshape(count, FRAME_SAMPLES)
+
+    _model.reset()
+    scores = np.empty(count, dtype=np.float32)
+    for i, frame in enumerate(frames):
+        scores[i] = _model.predict(frame)[_keyword]
+    return path, scores
+
+
+def count_accepts(scores: np.ndarray, threshold: float, refractory_frames: int) -> int:
+    """Rising edges over the threshold, ignoring any within the refractory period."""
+    above = scores >= threshold
+    edges = np.flatnonzero(above & ~np.concatenate(([False], above[:-1])))
+
+    accepts = 0
+    last = -refractory_frames - 1
+    for edge in edges:
+        if edge - last > refractory_frames:
+            accepts += 1
+            last = edge
+    return accepts
+
+
+def score_corpus(
+    paths: list[str],
+    keyword: str,
+    backend: str = WAKEWORD_BACKEND,
+    workers: int | None = None,
+) -> list[np.ndarray]:
+    """Scores every file in parallel, one model per worker process."""
+    with multiprocessing.Pool(
+        workers, initializer=_init_worker, initargs=(keyword, backend)
+    ) as pool:
+        results = pool.map(_score_file, paths, chunksize=1)
+    return [scores for _, scores in results if scores is not None]
+
+
+def sweep(
+    positives: list[np.ndarray],
+    negatives: list[np.ndarray],
+    thresholds: np.ndarray,
+    refractory_seconds: float = REFRACTORY_SECONDS,
+) -> list[dict]:
+    """
+    False accepts per hour of negative audio and false reject rate of the
+    positive files, for every threshold.
+    """
+    refractory_frames = round(refractory_seconds / FRAME_SECONDS)
+    negative_hours = sum(len(s) for s in negatives) * FRAME_SECONDS / 3600
+    positive_peaks = np.array([s.max() if len(s) else 0.0 for s in positives])
+
+    results = []
+    for threshold in thresholds:
+        false_accepts = sum(
+            count_accepts(s, threshold, refractory_frames) for s in negatives
+        )
+        results.append(
+            {
+                "threshold": float(threshold),
+                "false_accepts": false_accepts,
+                "fa_per_hour": false_accepts / negative_hours
+                if negative_hours
+                else None,
+                "frr": float(np.mean(positive_peaks < threshold))
+                if len(positives)
+                else None,
+            }
+        )
+    return results
+
+
+def _list_recordings(directory: str | None) -> list[str]:
+    if not directory:
+        return []
+    return list_recordings(directory, recursive=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sweep wake word thresholds on WAV corpora."
+    )
+    parser.add_argument("keyword", choices=list(KEYWORDS))
+    parser.add_argument("--positive", help="Folder of files that contain the keyword")
+    parser.add_argument("--negative", help="Folder of files that don't")
+    parser.add_argument("--backend", default=WAKEWORD_BACKEND)
+    parser.add_argument("--workers", type=int, help="Processes (default: all CPUs)")
+    parser.add_argument("--min", type=float, default=0.05)
+    parser.add_argument("--max", type=float, default=0.95)
+    parser.add_argument("--step", type=float, default=0.05)
+    parser.add_argument("--refractory", type=float, default=REFRACTORY_SECONDS)
+    parser.add_argument("--csv", help="Also write the curve to this CSV file")
+    args = parser.parse_args()
+
+    positive_paths = _list_recordings(args.positive)
+    negative_paths = _list_recordings(args.negative)
+    if not positive_paths and not negative_paths:
+        print("No WAV files found, pass --positive and/or --negative")
+        sys.exit(1)
+
+    start_time = time.perf_counter()
+    positives = score_corpus(positive_paths, args.keyword, args.backend, args.workers)
+    negatives = score_corpus(negative_paths, args.keyword, args.backend, args.workers)
+    elapsed = time.perf_counter() - start_time
+
+    audio_seconds = sum(len(s) for s in positives + negatives) * FRAME_SECONDS
+    print(
+        f"Scored {len(positives)} positive and {len(negatives)} negative files, "
+        f"{audio_seconds / 60:.1f} min of audio in {elapsed:.1f} s "
+        f"({audio_seconds / elapsed:.0f}x real time)\n"
+    )
+
+    thresholds = np.round(np.arange(args.min, args.max + 1e-9, args.step), 4)
+    results = sweep(positives, negatives, thresholds, args.refractory)
+
+    current = KEYWORDS[args.keyword]
+    print(f"{'threshold':>9} {'FA':>6} {'FA/hour':>9} {'FRR':>7}")
+    for r in results:
+        fa_per_hour = "n/a" if r["fa_per_hour"] is None else f"{r['fa_per_hour']:.2f}"
+        frr = "n/a" if r["frr"] is None else f"{r['frr'] * 100:.1f}%"
+        marker = "  <- current" if abs(r["threshold"] - current) < args.step / 2 else ""
+        print(
+            f"{r['threshold']:9.2f} {r['false_accepts']:6d} {fa_per_hour:>9} {frr:>7}{marker}"
+        )
+
+    if args.csv:
+        import csv
+
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"\nCurve written to {args.csv}")
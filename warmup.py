@@ -0,0 +1,109 @@
+"""
+Pre-synthesis of the phrases spoken most often.
+At startup the known phrase set (fixed phrases, fast-path responses and the
+most played cached clips) is checked against the response cache, and missing
+clips are rendered in a background process pool, so the first "Yes sir." after
+a cache wipe or a voice change doesn't pay for a full synth + DSP round trip.
+The phrases are then decoded into the playback engine's memory (see
+audio_output.py). Runs on its own thread and never delays the first activation.
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import tts
+from constants import FIXED_PHRASES
+from fast_intent import fast_path_phrases
+
+# Most played cached clips that are kept warm as well
+TOP_CACHED_PHRASES = 20
+# Worker processes (synthesis is mostly network, DSP is the CPU part)
+WORKERS = 2
+
+
+def collect_phrases(top_cached: int = TOP_CACHED_PHRASES) -> list[str]:
+    """Known phrases, most important first, without duplicates."""
+    phrases = [
+        *FIXED_PHRASES,
+        *fast_path_phrases(),
+        *tts.get_response_cache().most_used(top_cached),
+    ]
+    return list(dict.fromkeys(phrases))
+
+
+class Warmup:
+    def __init__(self, phrases: list[str] | None = None, workers: int = WORKERS):
+        self.phrases = phrases
+        self.workers = workers
+
+        self.ready = threading.Event()
+        self.total = 0
+        self.rendered = 0
+        self.failed = 0
+        self.preloaded = 0
+        self.elapsed = 0.0
+        self._thread = None
+
+    def start(self):
+        """Render the missing phrases in the background."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self.ready.wait(timeout)
+
+    def _run(self):
+        start_time = time.perf_counter()
+        try:
+            cache = tts.get_response_cache()
+            phrases = self.phrases if self.phrases is not None else collect_phrases()
+            missing = [p for p in phrases if not cache.contains(p)]
+            self.total = len(missing)
+            if missing:
+                print(f"🔥 Warming up {len(missing)} of {len(phrases)} phrases...")
+                self._render(cache, missing)
+
+            # Decoded in memory as well, so they start without touching the disk
+            self.preloaded = sum(tts.preload(phrase) for phrase in phrases)
+
+        # Cache index, clip files, or the worker pool breaking
+        except (sqlite3.Error, OSError, RuntimeError) as e:
+            print(f"[!] Warm-up error: {e}")
+        finally:
+            self.elapsed = time.perf_counter() - start_time
+            if self.total:
+                print(
+                    f"🔥 Warm-up done: {self.rendered} rendered, {self.failed} failed, "
+                    f"ready after {self.elapsed:.1f}s"
+                )
+            self.ready.set()
+
+    def _render(self, cache, missing: list[str]):
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(tts.render, phrase): phrase for phrase in missing}
+            for future in as_completed(futures):
+                phrase = futures[future]
+                try:
+                    clip = future.result()
+                except (OSError, RuntimeError) as e:  # A worker died
+                    print(f"[!] Warm-up error for '{phrase}': {e}")
+                    clip = None
+
+                if clip is None:
+                    self.failed += 1
+                    continue
+                # Stored from this process only, workers never open the index
+                cache.put(phrase, *clip)
+                self.rendered += 1
+                print(f"🔥 [{self.rendered + self.failed}/{self.total}] {phrase}")
+
+
+if __name__ == "__main__":
+    warmup = Warmup()
+    warmup.start()
+    warmup.wait()
+    print(
+        f"Time to full readiness: {warmup.elapsed:.2f}s ({warmup.total} phrases rendered)"
+    )